@@ -0,0 +1,150 @@
+"""
+EasyOCR recognizer backend comparison
+
+Reads every region crop of a labelled corpus with each EasyOCR backend
+(see ocr.recognizers) and reports exact accuracy, similarity, latency
+percentiles, resident memory after loading and peak RSS. Each backend runs in
+its own process so the memory figures are not polluted by the others.
+
+Usage (from the app directory):
+    python -m benchmark.recognizer --corpus bench_corpus --output recognizer.json
+    python -m benchmark.recognizer --backends torch,onnx
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from PIL import Image
+
+from service.metrics import peak_rss_mb
+
+from .run import OCR_AVAILABLE, environment_info, expected_text, latency_summary, text_similarity
+from .synthetic import generate_corpus, load_corpus
+
+if OCR_AVAILABLE:
+    from ocr.image_processor import ImageProcessor
+    from ocr.recognizers import BACKENDS, create_easyocr_reader
+    from ocr.text_cleaner import TextCleaner
+else:
+    BACKENDS = ('torch', 'quantized', 'onnx')
+
+
+def run_backend(backend: str, corpus_dir: str, warmup: int = 3) -> Dict[str, Any]:
+    template, samples = load_corpus(corpus_dir)
+
+    load_start = time.perf_counter()
+    reader = create_easyocr_reader(backend)
+    load_time = time.perf_counter() - load_start
+    loaded_rss = peak_rss_mb()
+
+    crops = []
+    for image_path, truth in samples:
+        image = np.array(Image.open(image_path).convert('RGB'))
+        for region_key, region_data in template['regions'].items():
+            coords = region_data['coordinates']
+            crop = image[coords['y']:coords['y'] + coords['height'], coords['x']:coords['x'] + coords['width']]
+            region_type = region_data['type']
+            crops.append((ImageProcessor.to_gray(crop), region_type,
+                          expected_text(truth.get(region_key, ''), region_type)))
+
+    for gray, _, _ in crops[:warmup]:
+        reader.readtext(gray)
+
+    latencies = []
+    texts = []
+    exact = 0
+    similarity = 0.0
+    for gray, region_type, expected in crops:
+        started = time.perf_counter()
+        results = reader.readtext(gray)
+        latencies.append(time.perf_counter() - started)
+
+        text = TextCleaner.clean_text(' '.join(result[1] for result in results), region_type)
+        texts.append(text)
+        exact += int(text == expected)
+        similarity += text_similarity(expected, text)
+
+    count = len(crops) or 1
+    return {
+        'backend': backend,
+        'recognizer': type(reader.recognizer).__name__,
+        'regions': len(crops),
+        'exact_accuracy': exact / count,
+        'mean_similarity': similarity / count,
+        'latency': latency_summary(latencies),
+        'load_time': load_time,
+        'loaded_rss_mb': loaded_rss,
+        'peak_rss_mb': peak_rss_mb(),
+        'texts': texts
+    }
+
+
+def compare_backends(backends: List[str], corpus_dir: str) -> Dict[str, Any]:
+    reports = {}
+    for backend in backends:
+        completed = subprocess.run(
+            [sys.executable, '-m', 'benchmark.recognizer', '--worker', backend, '--corpus', corpus_dir],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            reports[backend] = {'backend': backend, 'error': completed.stderr.strip().splitlines()[-1:]}
+            continue
+        reports[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    # Agreement with the stock reader shows whether a faster backend changes what is read
+    reference = reports.get('torch', {}).get('texts')
+    for report in reports.values():
+        texts = report.pop('texts', None)
+        if reference and texts and len(texts) == len(reference):
+            report['agreement_with_torch'] = sum(a == b for a, b in zip(texts, reference)) / len(reference)
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare EasyOCR recognizer backends")
+    parser.add_argument('--corpus', help="Labelled corpus directory (see benchmark.synthetic)")
+    parser.add_argument('--tables', type=int, default=5, help="Tables to render when no corpus is given")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    parser.add_argument('--output', default='recognizer_results.json')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if not OCR_AVAILABLE:
+        parser.error("OCR engine not available - install dependencies: pytesseract, easyocr, opencv-python")
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.corpus)))
+        return
+
+    corpus_dir = args.corpus
+    if not corpus_dir:
+        corpus_dir = tempfile.mkdtemp(prefix='poker_recognizer_')
+        generate_corpus(corpus_dir, args.tables, 6, args.seed)
+
+    reports = compare_backends([backend.strip() for backend in args.backends.split(',') if backend.strip()],
+                               corpus_dir)
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment_info(), 'corpus': corpus_dir, 'backends': reports}, f, indent=2)
+
+    print(f"{'backend':<11}{'exact':>8}{'similar':>9}{'agree':>8}{'p50 ms':>9}{'p99 ms':>9}{'load MB':>9}{'peak MB':>9}")
+    for backend, report in reports.items():
+        if 'error' in report:
+            print(f"{backend:<11} failed: {' '.join(report['error'])}")
+            continue
+        agreement = report.get('agreement_with_torch')
+        print(f"{backend:<11}{report['exact_accuracy']:>8.1%}{report['mean_similarity']:>9.1%}"
+              f"{(f'{agreement:.1%}' if agreement is not None else '-'):>8}"
+              f"{report['latency']['p50'] * 1000:>9.1f}{report['latency']['p99'] * 1000:>9.1f}"
+              f"{report['loaded_rss_mb'] or 0:>9.0f}{report['peak_rss_mb'] or 0:>9.0f}")
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
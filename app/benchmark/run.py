@@ -0,0 +1,265 @@
+"""
+End-to-end OCR benchmark
+
+Runs PokerAnalysisEngine over a labelled corpus (by default a freshly
+rendered synthetic one) and reports per-region accuracy, latency
+percentiles, regions/s and peak RSS. Results are written as JSON so runs
+can be compared between versions.
+
+Usage (from the app directory):
+    python -m benchmark.run --tables 20 --output bench.json
+    python -m benchmark.run --corpus bench_corpus --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Any, Dict, List
+
+from service.metrics import peak_rss_mb
+
+from .synthetic import generate_corpus, load_corpus
+
+try:
+    from ocr.analysis_engine import PokerAnalysisEngine
+    from ocr.config import OCRConfig
+    from ocr.empty_detector import EmptyRegionDetector
+    from ocr.name_lexicon import NameLexicon
+    from ocr.text_cleaner import TextCleaner
+    from ocr.text_extractor import TextExtractor
+    from ocr.variant_stats import VariantSelector
+    OCR_AVAILABLE = True
+except ImportError:
+    PokerAnalysisEngine = None
+    OCRConfig = None
+    EmptyRegionDetector = None
+    NameLexicon = None
+    TextCleaner = None
+    TextExtractor = None
+    VariantSelector = None
+    OCR_AVAILABLE = False
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    return {
+        'mean': sum(values) / len(values) if values else 0.0,
+        'p50': percentile(values, 0.50),
+        'p90': percentile(values, 0.90),
+        'p99': percentile(values, 0.99),
+        'max': max(values) if values else 0.0
+    }
+
+
+def text_similarity(expected: str, actual: str) -> float:
+    if not expected and not actual:
+        return 1.0
+    return SequenceMatcher(None, expected, actual).ratio()
+
+
+def expected_text(truth: str, region_type: str) -> str:
+    return TextCleaner.clean_text(truth, region_type)
+
+
+def benchmark_engine(seed: int = 0):
+    """
+    An engine whose learned state starts empty and stays in memory, so runs
+    are reproducible and the synthetic corpus never reaches the statistics,
+    lexicon or candidate log under OCRConfig.DATA_DIR.
+    """
+    variant_selector = VariantSelector(stats_path='', seed=seed) if OCRConfig.ADAPTIVE_SELECTION else None
+    engine = PokerAnalysisEngine(
+        name_lexicon=NameLexicon(path='') if OCRConfig.NAME_LEXICON_ENABLED else None,
+        empty_detector=EmptyRegionDetector(stats_path='', seed=seed) if OCRConfig.EMPTY_DETECTION_ENABLED else None,
+        text_extractor=TextExtractor(variant_selector=variant_selector)
+    )
+    engine.candidate_log = None
+    return engine
+
+
+def run_benchmark(template: Dict[str, Any], samples, engine=None, warmup: int = 1) -> Dict[str, Any]:
+    engine = engine or benchmark_engine()
+
+    for image_path, _ in samples[:warmup]:
+        engine.analyze_poker_image(image_path, template)
+
+    per_region = {}
+    image_latencies = []
+    total_regions = 0
+    errors = 0
+    started = time.perf_counter()
+
+    for image_path, truth in samples:
+        image_start = time.perf_counter()
+        previous_elapsed = 0.0
+        analysis_results = None
+
+        for event in engine.iter_analysis(image_path, template):
+            if event['event'] == 'region':
+                region_time = event['elapsed'] - previous_elapsed
+                previous_elapsed = event['elapsed']
+                stats = per_region.setdefault(event['region_key'], {
+                    'exact': 0, 'similarity': [], 'latency': [], 'success': 0, 'samples': 0
+                })
+                stats['latency'].append(region_time)
+            else:
+                analysis_results = event['results']
+
+        image_latencies.append(time.perf_counter() - image_start)
+
+        if 'error' in analysis_results:
+            errors += 1
+            continue
+
+        for region_key, region_result in analysis_results['extracted_data'].items():
+            stats = per_region[region_key]
+            expected = expected_text(truth.get(region_key, ''), region_result['type'])
+            stats['samples'] += 1
+            stats['exact'] += int(region_result['text'] == expected)
+            stats['similarity'].append(text_similarity(expected, region_result['text']))
+            stats['success'] += int(region_result['success'])
+            total_regions += 1
+
+    wall_time = time.perf_counter() - started
+
+    regions_report = {}
+    for region_key, stats in sorted(per_region.items()):
+        samples_count = stats['samples'] or 1
+        regions_report[region_key] = {
+            'exact_accuracy': stats['exact'] / samples_count,
+            'mean_similarity': sum(stats['similarity']) / samples_count,
+            'success_rate': stats['success'] / samples_count,
+            'latency': latency_summary(stats['latency'])
+        }
+
+    exact_total = sum(stats['exact'] for stats in per_region.values())
+    return {
+        'summary': {
+            'images': len(samples),
+            'errors': errors,
+            'regions': total_regions,
+            'exact_accuracy': exact_total / total_regions if total_regions else 0.0,
+            'mean_similarity': (sum(r['mean_similarity'] for r in regions_report.values()) / len(regions_report)
+                                if regions_report else 0.0),
+            'regions_per_second': total_regions / wall_time if wall_time > 0 else 0.0,
+            'wall_time': wall_time,
+            'image_latency': latency_summary(image_latencies),
+            'peak_rss_mb': peak_rss_mb()
+        },
+        'regions': regions_report
+    }
+
+
+def environment_info() -> Dict[str, Any]:
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                  text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'git_revision': revision,
+        'python': sys.version.split()[0],
+        'platform': platform.platform()
+    }
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    lines = []
+    for key in ('exact_accuracy', 'mean_similarity', 'regions_per_second', 'peak_rss_mb'):
+        new, old = current['summary'].get(key), baseline['summary'].get(key)
+        if new is not None and old is not None:
+            lines.append(f"{key:>20}: {old:10.3f} -> {new:10.3f} ({new - old:+.3f})")
+    new_p50 = current['summary']['image_latency']['p50']
+    old_p50 = baseline['summary']['image_latency']['p50']
+    lines.append(f"{'image p50 (s)':>20}: {old_p50:10.3f} -> {new_p50:10.3f} ({new_p50 - old_p50:+.3f})")
+
+    for region_key, region in current['regions'].items():
+        old_region = baseline.get('regions', {}).get(region_key)
+        if old_region and abs(region['exact_accuracy'] - old_region['exact_accuracy']) >= 0.05:
+            lines.append(f"{region_key:>20}: accuracy {old_region['exact_accuracy']:.2f} -> "
+                         f"{region['exact_accuracy']:.2f}")
+    return lines
+
+
+def print_report(report: Dict[str, Any]):
+    summary = report['summary']
+    print(f"Images: {summary['images']} ({summary['errors']} errors), regions: {summary['regions']}")
+    print(f"Exact accuracy: {summary['exact_accuracy']:.1%}, mean similarity: {summary['mean_similarity']:.1%}")
+    print(f"Regions/s: {summary['regions_per_second']:.2f}, image latency p50/p90/p99: "
+          f"{summary['image_latency']['p50']:.2f}/{summary['image_latency']['p90']:.2f}/"
+          f"{summary['image_latency']['p99']:.2f}s")
+    if summary['peak_rss_mb'] is not None:
+        print(f"Peak RSS: {summary['peak_rss_mb']:.0f} MB")
+    print()
+    print(f"{'region':<20}{'exact':>8}{'similar':>9}{'p50 s':>8}{'p99 s':>8}")
+    for region_key, region in report['regions'].items():
+        print(f"{region_key:<20}{region['exact_accuracy']:>8.1%}{region['mean_similarity']:>9.1%}"
+              f"{region['latency']['p50']:>8.3f}{region['latency']['p99']:>8.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark OCR accuracy and latency")
+    parser.add_argument('--corpus', help="Existing corpus directory (see benchmark.synthetic)")
+    parser.add_argument('--tables', type=int, default=20, help="Tables to render when no corpus is given")
+    parser.add_argument('--players', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--noise', type=float, default=6.0)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help="Previous results JSON to diff against")
+    parser.add_argument('--mosaic', action='store_true', help="Batch same-config regions into one Tesseract call")
+    parser.add_argument('--easyocr-backend', choices=['torch', 'quantized', 'onnx'],
+                        help="EasyOCR recognizer backend (see benchmark.recognizer for a side-by-side comparison)")
+    args = parser.parse_args(argv)
+
+    if not OCR_AVAILABLE:
+        parser.error("OCR engine not available - install dependencies: pytesseract, easyocr, opencv-python")
+
+    corpus_dir = args.corpus
+    if not corpus_dir:
+        corpus_dir = tempfile.mkdtemp(prefix='poker_bench_')
+        generate_corpus(corpus_dir, args.tables, args.players, args.seed, args.scale, args.noise)
+
+    if args.mosaic:
+        OCRConfig.MOSAIC_ENABLED = True
+    if args.easyocr_backend:
+        OCRConfig.EASYOCR_BACKEND = args.easyocr_backend
+    
+    template, samples = load_corpus(corpus_dir)
+    report = run_benchmark(template, samples, engine=benchmark_engine(args.seed), warmup=args.warmup)
+    report['environment'] = environment_info()
+    report['corpus'] = {'path': os.path.abspath(corpus_dir), 'images': len(samples)}
+    report['settings'] = {'mosaic': OCRConfig.MOSAIC_ENABLED, 'easyocr_backend': OCRConfig.EASYOCR_BACKEND}
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_report(report)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare}:")
+        for line in compare_reports(report, baseline):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
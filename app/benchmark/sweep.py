@@ -0,0 +1,238 @@
+"""
+Accuracy-vs-latency sweep over preprocessing variants and OCR engines
+
+Runs every (variant, engine, Tesseract config) combination for each region
+of a labelled corpus, records accuracy and cost per region category, and
+writes a profile with the Pareto frontier and a recommended minimal
+attempt set. TextExtractor loads the profile from
+OCRConfig.VARIANT_PROFILE_PATH and only makes (and preprocesses) the
+recommended attempts. The sweep writes the profile to ``--output``; only
+``--install`` also replaces the one the app loads.
+
+Usage (from the app directory):
+    python -m benchmark.sweep --corpus bench_corpus --output ocr_profile.json
+    python -m benchmark.sweep --corpus bench_corpus --install
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .run import OCR_AVAILABLE, environment_info, expected_text, text_similarity
+from .synthetic import generate_corpus, load_corpus
+
+if OCR_AVAILABLE:
+    from ocr.config import OCRConfig
+    from ocr.image_processor import ImageProcessor
+    from ocr.text_extractor import TextExtractor
+
+Combination = Tuple[int, str, Optional[str]]
+
+
+def candidate_attempts(region_type: str, variant_count: int, config_mode: str = 'region') -> List[Dict[str, Any]]:
+    if config_mode == 'all':
+        config_keys = list(OCRConfig.TESSERACT_CONFIGS)
+    else:
+        config_keys = list(dict.fromkeys([OCRConfig.get_config_key_for_region(region_type), 'default']))
+
+    attempts = []
+    for variant in range(variant_count):
+        for config_key in config_keys:
+            attempts.append({'variant': variant, 'engine': 'tesseract', 'config': config_key})
+        attempts.append({'variant': variant, 'engine': 'easyocr', 'config': None})
+    return attempts
+
+
+def run_sweep(template: Dict[str, Any], samples, extractor, config_mode: str = 'region'):
+    """
+    Returns ``(stats, coverage)``: per category, combination -> accumulated
+    accuracy/cost, and per category a list with the set of combinations that
+    read each region sample correctly.
+    """
+    stats = {}
+    coverage = {}
+
+    for image_path, truth in samples:
+        image = Image.open(image_path).convert('RGB')
+
+        for region_key, region_data in template['regions'].items():
+            region_type = region_data['type']
+            category = ImageProcessor.region_category(region_type)
+            expected = expected_text(truth.get(region_key, ''), region_type)
+
+            coords = region_data['coordinates']
+            region = image.crop((coords['x'], coords['y'],
+                                 coords['x'] + coords['width'], coords['y'] + coords['height']))
+            variants = ImageProcessor.preprocess_region(np.array(region), region_type)
+
+            correct = set()
+            for attempt in candidate_attempts(region_type, len(variants), config_mode):
+                started = time.perf_counter()
+                result = extractor._run_attempt(variants[attempt['variant']], region_type, attempt)
+                text = extractor.text_cleaner.clean_text(result['raw_text'], region_type) if result else ''
+                elapsed = time.perf_counter() - started
+
+                combination = (attempt['variant'], attempt['engine'], attempt['config'])
+                entry = stats.setdefault(category, {}).setdefault(combination, {
+                    'correct': 0, 'similarity': 0.0, 'time': 0.0, 'count': 0
+                })
+                entry['count'] += 1
+                entry['time'] += elapsed
+                entry['similarity'] += text_similarity(expected, text)
+                if text and text == expected:
+                    entry['correct'] += 1
+                    correct.add(combination)
+
+            coverage.setdefault(category, []).append(correct)
+
+    return stats, coverage
+
+
+def pareto_frontier(points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    frontier = []
+    best_accuracy = -1.0
+    for point in sorted(points, key=lambda p: (p['mean_cost'], -p['accuracy'])):
+        if point['accuracy'] > best_accuracy:
+            frontier.append(point)
+            best_accuracy = point['accuracy']
+    return frontier
+
+
+def recommend_attempts(combination_stats: Dict[Combination, Dict[str, Any]], samples: List[Set[Combination]],
+                       target: float = 0.98, max_attempts: int = 3) -> Tuple[List[Combination], float, float]:
+    """
+    Greedy set cover: repeatedly add the combination that fixes the most
+    still-unread samples (cheapest first on ties) until ``target`` of what
+    any combination can read is covered.
+    """
+    readable = [index for index, combos in enumerate(samples) if combos]
+    if not readable:
+        return [], 0.0, 0.0
+
+    mean_cost = {combo: entry['time'] / entry['count'] for combo, entry in combination_stats.items()}
+    uncovered = set(readable)
+    chosen = []
+
+    while uncovered and len(chosen) < max_attempts:
+        def gain(combo):
+            return sum(1 for index in uncovered if combo in samples[index])
+
+        best = max(mean_cost, key=lambda combo: (gain(combo), -mean_cost[combo]))
+        if gain(best) == 0:
+            break
+        chosen.append(best)
+        uncovered = {index for index in uncovered if best not in samples[index]}
+        if 1 - len(uncovered) / len(readable) >= target:
+            break
+
+    oracle_accuracy = len(readable) / len(samples)
+    covered_accuracy = (len(readable) - len(uncovered)) / len(samples)
+    return chosen, oracle_accuracy, covered_accuracy
+
+
+def build_profile(stats, coverage, target: float, max_attempts: int) -> Dict[str, Any]:
+    categories = {}
+    combinations = []
+
+    for category, combination_stats in sorted(stats.items()):
+        points = []
+        for (variant, engine, config), entry in combination_stats.items():
+            point = {
+                'variant': variant,
+                'engine': engine,
+                'config': config,
+                'accuracy': entry['correct'] / entry['count'],
+                'mean_similarity': entry['similarity'] / entry['count'],
+                'mean_cost': entry['time'] / entry['count'],
+                'samples': entry['count']
+            }
+            points.append(point)
+            combinations.append({'category': category, **point})
+
+        chosen, oracle_accuracy, covered_accuracy = recommend_attempts(
+            combination_stats, coverage[category], target, max_attempts
+        )
+        full_cost = sum(point['mean_cost'] for point in points)
+        chosen_cost = sum(combination_stats[combo]['time'] / combination_stats[combo]['count'] for combo in chosen)
+
+        category_profile = {
+            'oracle_accuracy': oracle_accuracy,
+            'expected_accuracy': covered_accuracy,
+            'full_cost': full_cost,
+            'expected_cost': chosen_cost,
+            'frontier': pareto_frontier(points)
+        }
+        if chosen:
+            category_profile['attempts'] = [
+                {'variant': variant, 'engine': engine, 'config': config}
+                for variant, engine, config in chosen
+            ]
+        categories[category] = category_profile
+
+    return {
+        'version': 1,
+        'created': datetime.now().isoformat(),
+        'environment': environment_info(),
+        'settings': {'target': target, 'max_attempts': max_attempts},
+        'categories': categories,
+        'combinations': combinations
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep preprocessing variants, engines and Tesseract configs")
+    parser.add_argument('--corpus', help="Labelled corpus directory (see benchmark.synthetic)")
+    parser.add_argument('--tables', type=int, default=10, help="Tables to render when no corpus is given")
+    parser.add_argument('--players', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--configs', choices=['region', 'all'], default='region',
+                        help="Tesseract configs to try: the region's own plus 'default', or every config")
+    parser.add_argument('--target', type=float, default=0.98,
+                        help="Share of oracle accuracy the recommended set must reach")
+    parser.add_argument('--max-attempts', type=int, default=3)
+    parser.add_argument('--output', default='ocr_profile.json', help="Profile path")
+    parser.add_argument('--install', action='store_true',
+                        help="Also write the profile to OCRConfig.VARIANT_PROFILE_PATH, where the app loads it")
+    args = parser.parse_args(argv)
+
+    if not OCR_AVAILABLE:
+        parser.error("OCR engine not available - install dependencies: pytesseract, easyocr, opencv-python")
+
+    corpus_dir = args.corpus
+    if not corpus_dir:
+        corpus_dir = tempfile.mkdtemp(prefix='poker_sweep_')
+        generate_corpus(corpus_dir, args.tables, args.players, args.seed)
+
+    template, samples = load_corpus(corpus_dir)
+    extractor = TextExtractor(variant_profile={})
+    stats, coverage = run_sweep(template, samples, extractor, args.configs)
+    profile = build_profile(stats, coverage, args.target, args.max_attempts)
+    profile['corpus'] = corpus_dir
+
+    outputs = [args.output]
+    if args.install:
+        outputs.append(OCRConfig.VARIANT_PROFILE_PATH)
+    for output in outputs:
+        if os.path.dirname(output):
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(profile, f, indent=2)
+
+    print(f"{'category':<12}{'attempts':>9}{'oracle':>8}{'expected':>10}{'cost':>16}")
+    for category, category_profile in profile['categories'].items():
+        attempts = len(category_profile.get('attempts', []))
+        print(f"{category:<12}{attempts:>9}{category_profile['oracle_accuracy']:>8.1%}"
+              f"{category_profile['expected_accuracy']:>10.1%}"
+              f"{category_profile['full_cost']:>8.2f}->{category_profile['expected_cost']:.2f}s")
+    print(f"\nProfile written to {', '.join(outputs)}")
+
+
+if __name__ == "__main__":
+    main()
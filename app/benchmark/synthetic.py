@@ -0,0 +1,275 @@
+"""
+Synthetic YAYA table renderer
+
+Draws offline table screenshots with PIL from the region definitions in
+regions_definitions.py, together with a matching template and the ground
+truth text for every region. Used by the benchmark and tuning tools so
+results are reproducible without a screenshot archive.
+
+Usage (from the app directory):
+    python -m benchmark.synthetic bench_corpus --tables 50 --players 6 --seed 1
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageFont
+
+from config.regions_definitions import get_regions_for_site
+
+REFERENCE_SIZE = (1444, 1112)
+
+# Region boxes at REFERENCE_SIZE, modelled on the YAYA 6-max client layout
+YAYA_BASE_LAYOUT = {
+    'tournament_header': (30, 12, 420, 24),
+    'blinds_info': (460, 12, 330, 24),
+    'position_stats': (830, 42, 585, 72),
+    'hand_history': (36, 48, 230, 48),
+    'total_pot': (630, 424, 210, 38),
+    'current_pot': (645, 628, 160, 34),
+    'hero_cards': (665, 812, 190, 70),
+    'hero_stack': (650, 714, 200, 38),
+    'hero_name': (660, 905, 200, 40)
+}
+
+YAYA_SEAT_LAYOUT = {
+    'top_left': {'name': (110, 290, 220, 38), 'stack': (110, 338, 220, 38), 'bet': (335, 346, 95, 38)},
+    'top_right': {'name': (1115, 292, 220, 38), 'stack': (1115, 338, 220, 38), 'bet': (990, 346, 95, 38)},
+    'left': {'name': (30, 592, 220, 38), 'stack': (30, 640, 220, 38), 'bet': (290, 516, 115, 38)},
+    'right': {'name': (1200, 592, 210, 38), 'stack': (1200, 640, 210, 38), 'bet': (1060, 516, 115, 38)},
+    'bottom_left': {'name': (240, 822, 170, 38), 'stack': (240, 868, 170, 38), 'bet': (420, 760, 95, 38)},
+    'bottom_right': {'name': (1000, 822, 210, 38), 'stack': (1000, 868, 210, 38), 'bet': (900, 760, 95, 38)}
+}
+
+# Regions whose examples are rendered over two lines, split at this separator
+MULTILINE_REGIONS = {'hand_history': ', ', 'position_stats': ', '}
+
+FONT_CANDIDATES = ['DejaVuSans-Bold.ttf', 'DejaVuSans.ttf', 'Arial.ttf', 'arial.ttf',
+                   'LiberationSans-Regular.ttf', 'Roboto-Regular.ttf']
+
+NAME_POOL = ['USAWasteland', 'campana17', 'GodsWay', 'Chiliquaro', 'Skrimples', 'Push0rdie',
+             'BelezIIAAa', 'RiverRat42', 'NitKing', 'foldpre', 'AceHunter', 'LuckyLuke88']
+
+
+def region_layout(region_key: str, region_def: Dict[str, Any]) -> Optional[Tuple[int, int, int, int]]:
+    if region_key in YAYA_BASE_LAYOUT:
+        return YAYA_BASE_LAYOUT[region_key]
+
+    position = region_def.get('position')
+    if position not in YAYA_SEAT_LAYOUT:
+        return None
+    if region_key.endswith('_stack'):
+        return YAYA_SEAT_LAYOUT[position]['stack']
+    if region_key.endswith('_bet'):
+        return YAYA_SEAT_LAYOUT[position]['bet']
+    return YAYA_SEAT_LAYOUT[position]['name']
+
+
+class SyntheticTableRenderer:
+    def __init__(self, player_count: int = 6, seed: int = 0, scale: float = 1.0, noise: float = 6.0,
+                 blur: float = 0.0, vary: bool = True):
+        self.player_count = player_count
+        self.scale = scale
+        self.noise = noise
+        self.blur = blur
+        self.vary = vary
+        self.rng = random.Random(seed)
+        self.region_definitions = get_regions_for_site('yaya', player_count)
+        self._font_cache = {}
+
+    def build_template(self) -> Dict[str, Any]:
+        regions = {}
+        created = datetime.now().isoformat()
+        for region_key, region_def in self.region_definitions.items():
+            box = region_layout(region_key, region_def)
+            if box is None:
+                continue
+            x, y, width, height = (int(round(v * self.scale)) for v in box)
+            regions[region_key] = {
+                'type': region_key,
+                'display_name': region_def.get('display_name', region_key),
+                'coordinates': {'x': x, 'y': y, 'width': width, 'height': height},
+                'created_at': created
+            }
+
+        width, height = self.image_size
+        return {
+            'site': 'yaya',
+            'created': created,
+            'regions': regions,
+            'metadata': {
+                'total_regions_available': len(self.region_definitions),
+                'regions_defined': len(regions),
+                'synthetic': True
+            },
+            'player_count': self.player_count,
+            'image_size': {'width': width, 'height': height}
+        }
+
+    @property
+    def image_size(self) -> Tuple[int, int]:
+        return (int(round(REFERENCE_SIZE[0] * self.scale)), int(round(REFERENCE_SIZE[1] * self.scale)))
+
+    def render(self, template: Dict[str, Any]) -> Tuple[Image.Image, Dict[str, str]]:
+        """Render one table; returns the image and the text drawn in each region."""
+        width, height = self.image_size
+        image = Image.new('RGB', (width, height), (28, 30, 36))
+        draw = ImageDraw.Draw(image)
+
+        draw.ellipse([int(width * 0.12), int(height * 0.22), int(width * 0.88), int(height * 0.78)],
+                     fill=(18, 110, 52), outline=(70, 70, 90), width=max(2, int(8 * self.scale)))
+
+        names = list(NAME_POOL)
+        self.rng.shuffle(names)
+        ground_truth = {}
+
+        for region_key, region_data in template['regions'].items():
+            example = self.region_definitions.get(region_key, {}).get('example', '')
+            text = self._region_text(region_key, example, names)
+            ground_truth[region_key] = text.replace('\n', ' ')
+            self._draw_region(draw, region_data['coordinates'], text)
+
+        if self.blur > 0:
+            image = image.filter(ImageFilter.GaussianBlur(self.blur))
+        if self.noise > 0:
+            noise = Image.effect_noise((width, height), self.noise).convert('RGB')
+            image = ImageChops.add(image, noise, scale=1.0, offset=-128)
+
+        return image, ground_truth
+
+    def _region_text(self, region_key: str, example: str, names: List[str]) -> str:
+        if region_key.startswith('seat_') and not region_key.endswith(('_stack', '_bet')):
+            text = names[int(region_key.split('_')[1]) % len(names)]
+        elif region_key == 'hero_name':
+            text = example
+        else:
+            text = self._vary_digits(example) if self.vary else example
+
+        separator = MULTILINE_REGIONS.get(region_key)
+        if separator and separator in text:
+            parts = text.split(separator)
+            middle = (len(parts) + 1) // 2
+            text = separator.join(parts[:middle]) + '\n' + separator.join(parts[middle:])
+        return text
+
+    def _vary_digits(self, text: str) -> str:
+        def replace(match):
+            digits = match.group(0)
+            first = str(self.rng.randint(1, 9))
+            return first + ''.join(str(self.rng.randint(0, 9)) for _ in digits[1:])
+        return re.sub(r'\d+', replace, text)
+
+    def _draw_region(self, draw: ImageDraw.ImageDraw, coordinates: Dict[str, int], text: str):
+        x, y = coordinates['x'], coordinates['y']
+        width, height = coordinates['width'], coordinates['height']
+        draw.rectangle([x, y, x + width, y + height], fill=(22, 24, 28))
+
+        lines = text.split('\n')
+        font = self._fit_font(lines, width, height)
+        line_height = height / len(lines)
+        for index, line in enumerate(lines):
+            left, top, right, bottom = draw.textbbox((0, 0), line, font=font)
+            text_x = x + max(2, (width - (right - left)) // 2) - left
+            text_y = y + int(index * line_height + (line_height - (bottom - top)) / 2) - top
+            draw.text((text_x, text_y), line, font=font, fill=(235, 235, 235))
+
+    def _fit_font(self, lines: List[str], width: int, height: int):
+        size = max(8, int(height / len(lines) * 0.75))
+        while size > 8:
+            font = self._font(size)
+            widest = max(font.getbbox(line)[2] for line in lines)
+            if widest <= width - 4:
+                return font
+            size -= 1
+        return self._font(size)
+
+    def _font(self, size: int):
+        if size not in self._font_cache:
+            font = None
+            for candidate in FONT_CANDIDATES:
+                try:
+                    font = ImageFont.truetype(candidate, size)
+                    break
+                except OSError:
+                    continue
+            if font is None:
+                try:
+                    font = ImageFont.load_default(size=size)
+                except TypeError:
+                    font = ImageFont.load_default()
+            self._font_cache[size] = font
+        return self._font_cache[size]
+
+
+def generate_corpus(output_dir: str, tables: int = 20, player_count: int = 6, seed: int = 0,
+                    scale: float = 1.0, noise: float = 6.0, blur: float = 0.0) -> Dict[str, Any]:
+    """
+    Write ``tables`` rendered screenshots, the matching template and a
+    ground_truth.json mapping image file -> region -> text.
+    """
+    renderer = SyntheticTableRenderer(player_count, seed=seed, scale=scale, noise=noise, blur=blur)
+    template = renderer.build_template()
+
+    images_dir = os.path.join(output_dir, 'images')
+    os.makedirs(images_dir, exist_ok=True)
+
+    ground_truth = {}
+    for index in range(tables):
+        image, truth = renderer.render(template)
+        filename = f"table_{index:04d}.png"
+        image.save(os.path.join(images_dir, filename))
+        ground_truth[filename] = truth
+
+    template_path = os.path.join(output_dir, f"yaya_{player_count}p_template.json")
+    with open(template_path, 'w') as f:
+        json.dump(template, f, indent=2)
+
+    manifest = {
+        'template': os.path.basename(template_path),
+        'images_dir': 'images',
+        'settings': {'tables': tables, 'player_count': player_count, 'seed': seed,
+                     'scale': scale, 'noise': noise, 'blur': blur},
+        'ground_truth': ground_truth
+    }
+    with open(os.path.join(output_dir, 'ground_truth.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    return manifest
+
+
+def load_corpus(corpus_dir: str) -> Tuple[Dict[str, Any], List[Tuple[str, Dict[str, str]]]]:
+    """Return the corpus template and a list of ``(image_path, ground_truth)`` pairs."""
+    with open(os.path.join(corpus_dir, 'ground_truth.json'), 'r') as f:
+        manifest = json.load(f)
+    with open(os.path.join(corpus_dir, manifest['template']), 'r') as f:
+        template = json.load(f)
+
+    images_dir = os.path.join(corpus_dir, manifest.get('images_dir', 'images'))
+    samples = [(os.path.join(images_dir, filename), truth)
+               for filename, truth in sorted(manifest['ground_truth'].items())]
+    return template, samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a synthetic YAYA table corpus")
+    parser.add_argument('output_dir')
+    parser.add_argument('--tables', type=int, default=20)
+    parser.add_argument('--players', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--noise', type=float, default=6.0, help="Gaussian noise sigma (0 disables)")
+    parser.add_argument('--blur', type=float, default=0.0, help="Gaussian blur radius (0 disables)")
+    args = parser.parse_args(argv)
+
+    manifest = generate_corpus(args.output_dir, args.tables, args.players, args.seed,
+                               args.scale, args.noise, args.blur)
+    print(f"Wrote {len(manifest['ground_truth'])} tables to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Micro-benchmark for TextCleaner/TextValidator
+
+Times the current table-driven cleaner against the previous
+implementation (per-call regex compilation lookups, sequential
+str.replace fix loops, if/elif dispatch on every call), kept below as
+a reference, and checks both produce identical output.
+
+Usage (from the app directory):
+    python -m benchmark.text_cleaning --strings 1000000
+"""
+
+import argparse
+import random
+import re
+import time
+
+from ocr.text_cleaner import TextCleaner, TextValidator
+
+REGION_TYPES = ['total_pot', 'current_pot', 'hero_stack', 'seat_1_stack', 'hand_history', 'hero_cards',
+                'hero_name', 'seat_1', 'tournament_header', 'blinds_info', 'position_stats', 'seat_1_bet']
+
+SAMPLE_TEXTS = {
+    'total_pot': ['Total: 34.19 BB', 'Tota1 : 34.19 BB', 'Total:  5.5BB'],
+    'current_pot': ['Pot: 0.9 BB', 'Pot 12.5 BB', 'P0t: 3 BB'],
+    'hero_stack': ['31.79 BB, 35s', '31.79 BB', '0 BB'],
+    'seat_1_stack': ['13.07 BB', '13.O7 BB', '7.17 BB'],
+    'hand_history': ['Current: 2492611261, Previous: 2492610659', 'Current:2492611261 Previous:2492610659'],
+    'hero_cards': ['5♠ 5♦', 'A♥ K♣', '5s 5d'],
+    'hero_name': ['BelezIIAAa', 'Belez llAAa!', 'Belez_IIAAa'],
+    'seat_1': ['USAWasteland', 'campana17', 'Push0rdie'],
+    'tournament_header': ['S215 - Surday Special - S100,000 GTD, Table 46', '$215 - Sunday Special - $100,000 GTD'],
+    'blinds_info': ['No Limit - 35,OOO/70,OOO, Arte 9,OOC', 'No Limit - 35,000/70,000, Ante 9,000'],
+    'position_stats': ['Your Position: 11 of 33, DDpvgstack: 27.18 BB, Prize Paol: S125,600',
+                       'Your Position: 11 of 33, Avg Stack: 27.18 BB, Prize Pool: $125,600'],
+    'seat_1_bet': ['1 BB', '0.5 BB', '2.5BB']
+}
+
+
+class LegacyTextCleaner:
+
+    @staticmethod
+    def clean_text(text, region_type):
+        text = text.strip()
+        text = re.sub(r'\s+', ' ', text)
+        if region_type in ['total_pot']:
+            text = re.sub(r'\s+', ' ', re.sub(r'[^\d\.\sBB:Total]', '', text))
+            if 'Total' in text and not text.startswith('Total'):
+                text = 'Total:' + text.replace('Total', '').strip()
+            return text.strip()
+        elif region_type in ['current_pot']:
+            text = re.sub(r'\s+', ' ', re.sub(r'[^\d\.\sBB:Pot]', '', text))
+            if 'Pot' in text and not text.startswith('Pot'):
+                text = 'Pot ' + text.replace('Pot', '').strip()
+            return text.strip()
+        elif region_type in ['hero_stack'] or '_stack' in region_type:
+            return re.sub(r'\s+', ' ', re.sub(r'[^\d\.\sBB]', '', text)).strip()
+        elif region_type == 'hand_history':
+            return re.sub(r'[^\d:]', '', text).strip()
+        elif region_type == 'hero_cards':
+            return re.sub(r'\s+', ' ', re.sub(r'[^\dAKQJT♠♥♦♣\s]', '', text)).strip()
+        elif region_type == 'hero_name' or '_name' in region_type:
+            return re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', '', text)).strip()
+        elif region_type in ['tournament_header']:
+            fixes = {'S215': '$215', 'S100': '$100', 'S125': '$125', 'Surday': 'Sunday',
+                     'S1OO': '$100', 'S1O0': '$100', '5215': '$215'}
+        elif region_type in ['blinds_info']:
+            fixes = {'Arte': 'Ante', '9,OOC': '9,000', '9,O00': '9,000', 'O': '0'}
+        elif region_type in ['position_stats']:
+            fixes = {'Paol': 'Pool', 'DDpvgstack': 'Avg Stack', 'S125': '$125', 'S25': '$25'}
+        else:
+            return text.strip()
+
+        text = re.sub(r'\s+', ' ', text)
+        for wrong, correct in fixes.items():
+            text = text.replace(wrong, correct)
+        return text.strip()
+
+
+def build_workload(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(count):
+        region_type = rng.choice(REGION_TYPES)
+        workload.append((rng.choice(SAMPLE_TEXTS[region_type]), region_type))
+    return workload
+
+
+def time_cleaner(clean_text, workload) -> float:
+    started = time.perf_counter()
+    for text, region_type in workload:
+        clean_text(text, region_type)
+    return time.perf_counter() - started
+
+
+def time_pipeline(workload) -> float:
+    started = time.perf_counter()
+    for text, region_type in workload:
+        cleaned = TextCleaner.clean_text(text, region_type)
+        TextValidator.validate_extraction(cleaned, region_type, 80.0)
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark text cleaning throughput")
+    parser.add_argument('--strings', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    workload = build_workload(args.strings, args.seed)
+
+    mismatches = sum(1 for text, region_type in workload[:10000]
+                     if TextCleaner.clean_text(text, region_type) != LegacyTextCleaner.clean_text(text, region_type))
+    if mismatches:
+        print(f"WARNING: {mismatches} outputs differ from the legacy cleaner")
+
+    legacy = time_cleaner(LegacyTextCleaner.clean_text, workload)
+    current = time_cleaner(TextCleaner.clean_text, workload)
+    pipeline = time_pipeline(workload)
+
+    print(f"{args.strings} strings")
+    print(f"  legacy cleaner:   {legacy:7.2f}s ({args.strings / legacy:,.0f}/s)")
+    print(f"  current cleaner:  {current:7.2f}s ({args.strings / current:,.0f}/s)  {legacy / current:.2f}x")
+    print(f"  clean + validate: {pipeline:7.2f}s ({args.strings / pipeline:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import json
 from datetime import datetime
 
 from regions.utils.tooltip import ToolTip
+from service.results_store import ResultsStore
 
 class PokerAnalyzerUI:
     def __init__(self, root, ocr_available, analysis_engine, config_class, results_viewer_class, results_browser_class):
@@ -24,6 +25,7 @@ class PokerAnalyzerUI:
         self.templates = {}
         
         self.setup_directories()
+        self.results_store = ResultsStore("results")
         self.setup_ui()
         self.load_existing_templates()
         
@@ -392,7 +394,24 @@ class PokerAnalyzerUI:
         if not self.analysis_engine:
             messagebox.showerror("Error", "OCR engine not available. Please check dependencies.")
             return
-            
+        
+        # The log is refreshed between regions, so nothing may change the image or template meanwhile
+        control_states = self._disable_controls()
+        try:
+            self._run_analysis()
+        finally:
+            for control, state in control_states.items():
+                control.config(state=state)
+    
+    def _disable_controls(self):
+        controls = [self.upload_btn, self.select_template_btn, self.configure_btn,
+                    self.edit_template_btn, self.analyze_btn]
+        control_states = {control: str(control.cget('state')) for control in controls}
+        for control in controls:
+            control.config(state=tk.DISABLED)
+        return control_states
+    
+    def _run_analysis(self):
         self.log_message(f"🔍 Starting OCR analysis using {self.poker_site} template...")
         self.status_label.config(text="Analyzing... Please wait", foreground='orange')
         self.root.update()
@@ -403,9 +422,15 @@ class PokerAnalyzerUI:
             
             self.log_message(f"  → Processing {len(regions)} regions with OCR engines...")
             
-            analysis_results = self.analysis_engine.analyze_poker_image(
-                self.current_image_path, template
-            )
+            self.log_message("📊 Extraction Results:")
+            
+            analysis_results = None
+            for event in self.analysis_engine.iter_analysis(self.current_image_path, template):
+                if event['event'] == 'region':
+                    self._log_region_result(event['result'])
+                    self.root.update()
+                elif event['event'] == 'complete':
+                    analysis_results = event['results']
             
             if 'error' in analysis_results:
                 self.log_message(f"✗ Analysis failed: {analysis_results['error']}", "ERROR")
@@ -421,11 +446,15 @@ class PokerAnalyzerUI:
             self.log_message(f"✓ OCR Analysis completed!")
             self.log_message(f"  → Results auto-saved: {os.path.basename(auto_save_path)}")
             self.log_message(f"  → Successful extractions: {summary['successful_extractions']}/{summary['successful_extractions'] + summary['failed_extractions']}")
+            if summary.get('empty_regions'):
+                self.log_message(f"  → Empty regions (OCR skipped): {summary['empty_regions']}")
+            if summary.get('reread_regions'):
+                self.log_message(f"  → Re-read after consistency checks: {summary['reread_regions']}")
+            for issue in summary.get('consistency_issues', []):
+                self.log_message(f"  ⚠ {issue['check']}: {issue['detail']}")
             self.log_message(f"  → Average confidence: {summary['average_confidence']:.1f}%")
             self.log_message(f"  → High confidence results: {summary['high_confidence_count']}")
             
-            self._log_extraction_details()
-            
             self.status_label.config(text="Analysis complete - Results saved", foreground='green')
             self.export_btn.config(state=tk.NORMAL)
             self.view_results_btn.config(state=tk.NORMAL)
@@ -437,21 +466,7 @@ class PokerAnalyzerUI:
             messagebox.showerror("Analysis Error", error_msg)
     
     def auto_save_results(self, analysis_results):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        if self.poker_site == 'yaya' and 'player_count' in analysis_results.get('template_info', {}):
-            player_count = analysis_results['template_info']['player_count']
-            filename = f"{self.poker_site}_{player_count}p_analysis_{timestamp}.yml"
-        else:
-            filename = f"{self.poker_site}_analysis_{timestamp}.yml"
-        
-        filepath = os.path.join("results", filename)
-        
-        with open(filepath, 'w') as f:
-            yaml.dump(analysis_results, f, default_flow_style=False, 
-                     sort_keys=False, allow_unicode=True)
-        
-        return filepath
+        return self.results_store.save(analysis_results, self.poker_site)
     
     def view_last_results(self):
         if not self.extracted_data:
@@ -468,21 +483,15 @@ class PokerAnalyzerUI:
         
         self.results_browser_class(self.root, self.results_viewer_class)
             
-    def _log_extraction_details(self):
-        if not self.extracted_data or 'extracted_data' not in self.extracted_data:
-            return
-            
-        self.log_message("📊 Extraction Results:")
+    def _log_region_result(self, result):
+        status = "✓" if result['success'] else "✗"
+        confidence = result['confidence']
+        text_preview = result['text'][:50] + "..." if len(result['text']) > 50 else result['text']
         
-        for region_key, result in self.extracted_data['extracted_data'].items():
-            status = "✓" if result['success'] else "✗"
-            confidence = result['confidence']
-            text_preview = result['text'][:50] + "..." if len(result['text']) > 50 else result['text']
-            
-            if result['success']:
-                self.log_message(f"  {status} {result['display_name']}: '{text_preview}' ({confidence:.1f}%)")
-            else:
-                self.log_message(f"  {status} {result['display_name']}: Failed extraction", "ERROR")
+        if result['success']:
+            self.log_message(f"  {status} {result['display_name']}: '{text_preview}' ({confidence:.1f}%)")
+        else:
+            self.log_message(f"  {status} {result['display_name']}: Failed extraction", "ERROR")
                 
     def export_results(self):
         if not self.extracted_data:
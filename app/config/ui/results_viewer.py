@@ -79,7 +79,8 @@ class ResultsViewer:
         
         successful = summary.get('successful_extractions', 0)
         failed = summary.get('failed_extractions', 0)
-        total = successful + failed
+        empty = summary.get('empty_regions', 0)
+        total = successful + failed + empty
         avg_confidence = summary.get('average_confidence', 0)
         high_confidence = summary.get('high_confidence_count', 0)
         
@@ -88,6 +89,15 @@ class ResultsViewer:
                  font=('Arial', 11), foreground='green' if successful > 0 else 'red').pack(anchor=tk.W)
         ttk.Label(stats_frame, text=f"Failed Extractions: {failed}", 
                  font=('Arial', 11), foreground='red' if failed > 0 else 'green').pack(anchor=tk.W)
+        if empty:
+            ttk.Label(stats_frame, text=f"Empty Regions (OCR skipped): {empty}",
+                     font=('Arial', 11)).pack(anchor=tk.W)
+        if summary.get('reread_regions'):
+            ttk.Label(stats_frame, text=f"Re-read After Consistency Checks: {summary['reread_regions']}",
+                     font=('Arial', 11)).pack(anchor=tk.W)
+        for issue in summary.get('consistency_issues', []):
+            ttk.Label(stats_frame, text=f"Inconsistent ({issue['check']}): {issue['detail']}",
+                     font=('Arial', 11), foreground='orange').pack(anchor=tk.W)
         ttk.Label(stats_frame, text=f"Average Confidence: {avg_confidence:.1f}%", 
                  font=('Arial', 11)).pack(anchor=tk.W)
         ttk.Label(stats_frame, text=f"High Confidence (>70%): {high_confidence}", 
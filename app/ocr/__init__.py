@@ -1,4 +1,5 @@
 from .analysis_engine import PokerAnalysisEngine
+from .async_engine import AsyncPokerAnalysisEngine
 from .text_extractor import TextExtractor
 from .image_processor import ImageProcessor
 from .text_cleaner import TextCleaner, TextValidator
@@ -6,6 +7,7 @@ from .config import OCRConfig
 
 __all__ = [
     'PokerAnalysisEngine',
+    'AsyncPokerAnalysisEngine',
     'TextExtractor', 
     'ImageProcessor',
     'TextCleaner',
@@ -1,188 +1,391 @@
 import os
+import time
+import numpy as np
 from datetime import datetime
 from PIL import Image
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional, Union
 
 from .text_extractor import TextExtractor
+from .scheduler import RegionScheduler
+from .parsing import is_name_region, parse_text
+from .insights import build_poker_insights
+from .name_lexicon import NameLexicon
+from .empty_detector import EmptyRegionDetector, region_features
+from .candidate_log import CandidateLog, compact_candidates
+from .consistency import ConsistencyChecker
+from .config import OCRConfig
 
 class PokerAnalysisEngine:
-    def __init__(self):
-        self.text_extractor = TextExtractor()
+    def __init__(self, scheduler: Optional[RegionScheduler] = None, name_lexicon: Optional[NameLexicon] = None,
+                 empty_detector: Optional[EmptyRegionDetector] = None,
+                 candidate_log: Optional[CandidateLog] = None, text_extractor: Optional[TextExtractor] = None,
+                 consistency_checker: Optional[ConsistencyChecker] = None, effort: Optional[str] = None):
+        self.text_extractor = text_extractor or TextExtractor()
+        self.scheduler = scheduler or RegionScheduler()
+        if name_lexicon is None and OCRConfig.NAME_LEXICON_ENABLED:
+            name_lexicon = NameLexicon()
+        self.name_lexicon = name_lexicon
+        if empty_detector is None and OCRConfig.EMPTY_DETECTION_ENABLED:
+            empty_detector = EmptyRegionDetector()
+        self.empty_detector = empty_detector
+        if candidate_log is None and OCRConfig.CANDIDATE_LOG_ENABLED:
+            candidate_log = CandidateLog()
+        self.candidate_log = candidate_log
+        if consistency_checker is None and OCRConfig.CONSISTENCY_ENABLED:
+            consistency_checker = ConsistencyChecker()
+        self.consistency_checker = consistency_checker
+        # With a checker the first pass is cheap; inconsistent regions are re-read in full
+        self.effort = effort or ('cheap' if consistency_checker else 'default')
         
-    def analyze_poker_image(self, image_path: str, template: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze_poker_image(self, image_path: Union[str, Image.Image, np.ndarray], template: Dict[str, Any],
+                            image_name: Optional[str] = None, deadline: Optional[float] = None) -> Dict[str, Any]:
+        analysis_results = None
+        for event in self.iter_analysis(image_path, template, image_name, deadline):
+            if event['event'] == 'complete':
+                analysis_results = event['results']
+        return analysis_results
+    
+    def iter_analysis(self, image_path: Union[str, Image.Image, np.ndarray], template: Dict[str, Any],
+                      image_name: Optional[str] = None, deadline: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield ``{'event': 'region', 'region_key', 'result', 'elapsed'}`` as soon as
+        each region is read, then ``{'event': 'complete', 'results'}`` with the
+        full analysis including insights.
+        
+        Regions are read in latency-class order. ``deadline`` is a time budget
+        in seconds; regions not read within it are marked as pending.
+        """
+        image_name = image_name or self._image_name(image_path)
         try:
-            image = Image.open(image_path)
-            regions = template.get('regions', {})
-            
-            analysis_results = {
-                'site': template.get('site', 'unknown'),
-                'timestamp': None,
-                'image_file': os.path.basename(image_path),
-                'image_size': {'width': image.width, 'height': image.height},
-                'template_info': {
-                    'total_regions': len(regions),
-                    'player_count': template.get('player_count')
-                },
-                'extracted_data': {},
-                'analysis_summary': {
-                    'successful_extractions': 0,
-                    'failed_extractions': 0,
-                    'average_confidence': 0,
-                    'high_confidence_count': 0,
-                    'validation_issues': []
-                },
-                'performance_metrics': {
-                    'processing_time': 0,
-                    'regions_per_second': 0
-                }
+            image = self._load_image(image_path)
+            analysis_results = self._new_results(image, template, image_name)
+        except Exception as e:
+            yield {'event': 'complete', 'results': self._error_results(e, template, image_name)}
+            return
+        
+        start_time = datetime.now()
+        regions = template.get('regions', {})
+        template_key = self._template_key(template)
+        site = template.get('site')
+        absolute_deadline = time.monotonic() + deadline if deadline is not None else None
+        
+        mosaic_extractions = self._mosaic_extractions(image, regions)
+        
+        region_results = self.scheduler.run(
+            template,
+            lambda region_key, region_data: self._analyze_region(image, region_key, region_data, template_key, site,
+                                                                 mosaic_extractions.get(region_key)),
+            absolute_deadline
+        )
+        for region_key, region_result, completed in region_results:
+            if not completed:
+                region_result = self._pending_result(region_key, regions[region_key])
+            analysis_results['extracted_data'][region_key] = region_result
+            yield {
+                'event': 'region',
+                'region_key': region_key,
+                'result': region_result,
+                'elapsed': (datetime.now() - start_time).total_seconds()
             }
-            
-            start_time = datetime.now()
-            confidences = []
-            successful = 0
-            failed = 0
-            all_validation_issues = []
-            
-            for region_key, region_data in regions.items():
-                try:
-                    coordinates = region_data['coordinates']
-                    region_type = region_data['type']
-                    
-                    extraction_result = self.text_extractor.extract_text_from_region(
-                        image, coordinates, region_type
-                    )
-                    
-                    is_successful = bool(extraction_result['text'] and extraction_result['confidence'] > 30)
-                    
-                    region_result = {
-                        'display_name': region_data.get('display_name', region_key),
-                        'type': region_type,
-                        'coordinates': coordinates,
-                        'text': extraction_result['text'],
-                        'confidence': extraction_result['confidence'],
-                        'method': extraction_result['method'],
-                        'success': is_successful
-                    }
-                    
-                    if is_successful:
-                        successful += 1
-                        confidences.append(extraction_result['confidence'])
-                        if extraction_result['confidence'] > 70:
-                            analysis_results['analysis_summary']['high_confidence_count'] += 1
-                    else:
-                        failed += 1
-                    
-                    analysis_results['extracted_data'][region_key] = region_result
-                        
-                except Exception as e:
-                    analysis_results['extracted_data'][region_key] = {
-                        'display_name': region_data.get('display_name', region_key),
-                        'type': region_data.get('type', 'unknown'),
-                        'coordinates': region_data.get('coordinates', {}),
-                        'text': '',
-                        'confidence': 0,
-                        'method': 'error',
-                        'success': False,
-                        'error': str(e)
-                    }
-                    failed += 1
-            
-            end_time = datetime.now()
-            processing_time = (end_time - start_time).total_seconds()
-            
-            analysis_results['analysis_summary']['successful_extractions'] = successful
-            analysis_results['analysis_summary']['failed_extractions'] = failed
-            analysis_results['analysis_summary']['average_confidence'] = (
-                sum(confidences) / len(confidences) if confidences else 0
-            )
-            analysis_results['analysis_summary']['validation_issues'] = all_validation_issues
-            
-            analysis_results['performance_metrics']['processing_time'] = processing_time
-            analysis_results['performance_metrics']['regions_per_second'] = (
-                len(regions) / processing_time if processing_time > 0 else 0
-            )
-            
-            analysis_results = self._add_poker_insights(analysis_results)
-            
-            return analysis_results
-            
+        
+        if self.consistency_checker:
+            for region_key in self.consistency_checker.regions_to_reread(analysis_results['extracted_data']):
+                if absolute_deadline is not None and time.monotonic() >= absolute_deadline:
+                    break
+                region_result = self._reread_region(image, region_key, regions[region_key], template_key, site)
+                analysis_results['extracted_data'][region_key] = region_result
+                yield {
+                    'event': 'region',
+                    'region_key': region_key,
+                    'result': region_result,
+                    'elapsed': (datetime.now() - start_time).total_seconds()
+                }
+        
+        analysis_results['extracted_data'] = {
+            key: analysis_results['extracted_data'][key] for key in regions
+        }
+        processing_time = (datetime.now() - start_time).total_seconds()
+        
+        try:
+            analysis_results = self._finalize_results(analysis_results, processing_time)
         except Exception as e:
-            return {
-                'error': f"Analysis failed: {str(e)}",
-                'site': template.get('site', 'unknown'),
-                'image_file': os.path.basename(image_path) if image_path else 'unknown'
+            analysis_results = self._error_results(e, template, image_name)
+        
+        yield {'event': 'complete', 'results': analysis_results}
+    
+    def _mosaic_extractions(self, image: Union[Image.Image, np.ndarray],
+                            regions: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Regions read by the mosaic pre-pass when it is enabled; they skip their own OCR."""
+        if not OCRConfig.MOSAIC_ENABLED:
+            return {}
+        return self.text_extractor.extract_mosaic(image, regions)
+    
+    def _new_results(self, image: Union[Image.Image, np.ndarray], template: Dict[str, Any], image_name: str) -> Dict[str, Any]:
+        regions = template.get('regions', {})
+        return {
+            'site': template.get('site', 'unknown'),
+            'timestamp': None,
+            'image_file': image_name,
+            'image_size': self._image_size(image),
+            'template_info': {
+                'total_regions': len(regions),
+                'player_count': template.get('player_count')
+            },
+            'extracted_data': {},
+            'analysis_summary': {
+                'successful_extractions': 0,
+                'failed_extractions': 0,
+                'pending_extractions': 0,
+                'empty_regions': 0,
+                'reread_regions': 0,
+                'average_confidence': 0,
+                'high_confidence_count': 0,
+                'validation_issues': [],
+                'consistency_issues': []
+            },
+            'performance_metrics': {
+                'processing_time': 0,
+                'regions_per_second': 0
             }
+        }
     
-    def _add_poker_insights(self, analysis_results: Dict[str, Any]) -> Dict[str, Any]:
-        extracted_data = analysis_results.get('extracted_data', {})
+    @staticmethod
+    def _template_key(template: Dict[str, Any]) -> str:
+        site = template.get('site', 'unknown')
+        player_count = template.get('player_count')
+        return f"{site}_{player_count}p" if player_count else site
+    
+    def _analyze_region(self, image: Union[Image.Image, np.ndarray], region_key: str, region_data: Dict[str, Any],
+                        template_key: Optional[str] = None, site: Optional[str] = None,
+                        extraction_result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        try:
+            if extraction_result is None:
+                prepared = self._prepare_region(image, region_key, region_data, template_key)
+                if 'prepared' not in prepared:
+                    return prepared
+                extraction_result = self._select_region(self.text_extractor.recognize(prepared['prepared']),
+                                                        prepared.get('features'))
+            return self._region_result(region_key, region_data, extraction_result, site)
+        except Exception as e:
+            return self._failed_result(region_key, region_data, e)
+    
+    def _prepare_region(self, image: Union[Image.Image, np.ndarray], region_key: str, region_data: Dict[str, Any],
+                        template_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Crop, preprocess and plan a region's OCR. Returns the final region
+        result for a blank region, otherwise ``{'prepared', 'features'}`` to
+        pass through ``text_extractor.recognize`` and ``_select_region``.
+        """
+        coordinates = region_data['coordinates']
+        region_type = region_data['type']
+        
+        features = None
+        if self.empty_detector:
+            features = region_features(self.text_extractor.image_processor.to_gray(
+                self.text_extractor._crop(image, coordinates)
+            ))
+            if self.empty_detector.is_empty(features, region_type, template_key):
+                return self._empty_result(region_key, region_data)
+        
+        return {
+            'prepared': self.text_extractor.prepare(image, coordinates, region_type, template_key, self.effort),
+            'features': features
+        }
+    
+    def _select_region(self, recognized: Dict[str, Any], features: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        extraction_result = self.text_extractor.select(recognized)
+        if features is not None:
+            self.empty_detector.record(features, bool(extraction_result['text']), recognized['region_type'],
+                                       recognized['template_key'])
+        return extraction_result
+    
+    def _region_result(self, region_key: str, region_data: Dict[str, Any], extraction_result: Dict[str, Any],
+                       site: Optional[str] = None) -> Dict[str, Any]:
+        region_type = region_data['type']
+        is_successful = bool(extraction_result['text'] and extraction_result['confidence'] > 30)
         
-        insights = {
-            'game_state': {},
-            'player_info': {},
-            'pot_analysis': {},
-            'tournament_info': {}
+        region_result = {
+            'display_name': region_data.get('display_name', region_key),
+            'type': region_type,
+            'coordinates': region_data['coordinates'],
+            'text': extraction_result['text'],
+            'confidence': extraction_result['confidence'],
+            'method': extraction_result['method'],
+            'success': is_successful
         }
         
+        if self.name_lexicon and site and is_name_region(region_type) and region_result['text']:
+            self._apply_name_lexicon(region_result, site)
+            is_successful = region_result['success']
+        
+        if is_successful:
+            parsed = parse_text(region_result['text'], region_type).to_dict()
+            if parsed:
+                region_result['parsed'] = parsed
+        
+        if self.candidate_log:
+            # Moved to the candidate log by _finalize_results
+            region_result['candidates'] = compact_candidates(extraction_result.get('all_results', []))
+        
+        return region_result
+    
+    def _reread_region(self, image: Union[Image.Image, np.ndarray], region_key: str, region_data: Dict[str, Any],
+                       template_key: Optional[str] = None, site: Optional[str] = None) -> Dict[str, Any]:
+        """Read a region again with every variant and engine after a failed consistency check."""
         try:
-            if 'total_pot' in extracted_data and extracted_data['total_pot']['success']:
-                total_pot_text = extracted_data['total_pot']['text']
-                pot_value = self._extract_numeric_value(total_pot_text)
-                if pot_value:
-                    insights['pot_analysis']['total_pot_bb'] = pot_value
-            
-            if 'current_pot' in extracted_data and extracted_data['current_pot']['success']:
-                current_pot_text = extracted_data['current_pot']['text']
-                pot_value = self._extract_numeric_value(current_pot_text)
-                if pot_value:
-                    insights['pot_analysis']['current_pot_bb'] = pot_value
-            
-            if 'hero_stack' in extracted_data and extracted_data['hero_stack']['success']:
-                hero_stack_text = extracted_data['hero_stack']['text']
-                stack_value = self._extract_numeric_value(hero_stack_text)
-                if stack_value:
-                    insights['player_info']['hero_stack_bb'] = stack_value
-            
-            if 'hero_name' in extracted_data and extracted_data['hero_name']['success']:
-                insights['player_info']['hero_name'] = extracted_data['hero_name']['text']
-            
-            if 'hero_cards' in extracted_data and extracted_data['hero_cards']['success']:
-                insights['player_info']['hero_cards'] = extracted_data['hero_cards']['text']
-            
-            active_players = []
-            for key, data in extracted_data.items():
-                if key.startswith('seat_') and not key.endswith('_stack') and not key.endswith('_bet'):
-                    if data['success']:
-                        player_name = data['text']
-                        stack_key = f"{key}_stack"
-                        stack_value = None
-                        if stack_key in extracted_data and extracted_data[stack_key]['success']:
-                            stack_value = self._extract_numeric_value(extracted_data[stack_key]['text'])
-                        
-                        active_players.append({
-                            'seat': key,
-                            'name': player_name,
-                            'stack_bb': stack_value
-                        })
-            
-            insights['player_info']['active_players'] = active_players
-            insights['player_info']['player_count'] = len(active_players)
-            
-            if 'position_stats' in extracted_data and extracted_data['position_stats']['success']:
-                position_text = extracted_data['position_stats']['text']
-                insights['tournament_info']['position_text'] = position_text
-            
+            extraction_result = self.text_extractor.extract_text_from_region(
+                image, region_data['coordinates'], region_data['type'], template_key, effort='full'
+            )
+            region_result = self._region_result(region_key, region_data, extraction_result, site)
         except Exception as e:
-            insights['extraction_error'] = str(e)
+            region_result = self._failed_result(region_key, region_data, e)
+        region_result['reread'] = True
+        return region_result
+    
+    def _failed_result(self, region_key: str, region_data: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        return {
+            'display_name': region_data.get('display_name', region_key),
+            'type': region_data.get('type', 'unknown'),
+            'coordinates': region_data.get('coordinates', {}),
+            'text': '',
+            'confidence': 0,
+            'method': 'error',
+            'success': False,
+            'error': str(error)
+        }
+    
+    def _apply_name_lexicon(self, region_result: Dict[str, Any], site: str):
+        """Learn confidently read names; snap low-confidence reads to the closest known name."""
+        text = region_result['text']
+        confidence = region_result['confidence']
+        
+        if confidence >= OCRConfig.NAME_LEXICON_LEARN_CONFIDENCE:
+            self.name_lexicon.observe(site, text)
+            return
+        if confidence >= OCRConfig.NAME_LEXICON_SNAP_CONFIDENCE:
+            return
         
-        analysis_results['poker_insights'] = insights
+        match = self.name_lexicon.lookup(site, text)
+        if not match or match[0] == text:
+            return
+        
+        region_result['lexicon_corrected_from'] = text
+        region_result['text'] = match[0]
+        region_result['method'] = f"{region_result['method']}+lexicon"
+        region_result['success'] = True
+    
+    def _pending_result(self, region_key: str, region_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'display_name': region_data.get('display_name', region_key),
+            'type': region_data.get('type', 'unknown'),
+            'coordinates': region_data.get('coordinates', {}),
+            'text': '',
+            'confidence': 0,
+            'method': 'pending',
+            'success': False,
+            'pending': True
+        }
+    
+    def _empty_result(self, region_key: str, region_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'display_name': region_data.get('display_name', region_key),
+            'type': region_data['type'],
+            'coordinates': region_data['coordinates'],
+            'text': '',
+            'confidence': 0,
+            'method': 'empty',
+            'success': False,
+            'empty': True
+        }
+    
+    def _finalize_results(self, analysis_results: Dict[str, Any], processing_time: float,
+                          log_candidates: bool = True) -> Dict[str, Any]:
+        summary = analysis_results['analysis_summary']
+        candidates = {
+            region_key: region_result.pop('candidates')
+            for region_key, region_result in analysis_results['extracted_data'].items() if 'candidates' in region_result
+        }
+        confidences = []
+        successful = 0
+        failed = 0
+        pending = 0
+        empty = 0
+        reread = 0
+        
+        for region_result in analysis_results['extracted_data'].values():
+            if region_result.get('reread'):
+                reread += 1
+            if region_result.get('pending'):
+                pending += 1
+            elif region_result.get('empty'):
+                empty += 1
+            elif region_result['success']:
+                successful += 1
+                confidences.append(region_result['confidence'])
+                if region_result['confidence'] > 70:
+                    summary['high_confidence_count'] += 1
+            else:
+                failed += 1
+        
+        summary['successful_extractions'] = successful
+        summary['failed_extractions'] = failed
+        summary['pending_extractions'] = pending
+        summary['empty_regions'] = empty
+        summary['reread_regions'] = reread
+        if self.consistency_checker:
+            summary['consistency_issues'] = self.consistency_checker.check(analysis_results['extracted_data'])
+        summary['average_confidence'] = (
+            sum(confidences) / len(confidences) if confidences else 0
+        )
+        
+        region_count = analysis_results['template_info']['total_regions']
+        analysis_results['performance_metrics']['processing_time'] = processing_time
+        analysis_results['performance_metrics']['regions_per_second'] = (
+            region_count / processing_time if processing_time > 0 else 0
+        )
+        
+        if self.candidate_log and log_candidates:
+            self.candidate_log.record(analysis_results, candidates, processing_time)
+        
+        return self._add_poker_insights(analysis_results)
+    
+    def _error_results(self, error: Exception, template: Dict[str, Any], image_name: str) -> Dict[str, Any]:
+        return {
+            'error': f"Analysis failed: {str(error)}",
+            'site': template.get('site', 'unknown'),
+            'image_file': image_name
+        }
+    
+    @staticmethod
+    def _load_image(source: Union[str, Image.Image, np.ndarray]) -> Union[Image.Image, np.ndarray]:
+        # Arrays (RGB/BGR or already grayscale) are used as-is; regions are sliced as views
+        if isinstance(source, (Image.Image, np.ndarray)):
+            return source
+        image = Image.open(source)
+        # Decode up front so concurrent region crops do not race on lazy loading
+        image.load()
+        return image
+    
+    @staticmethod
+    def _image_size(image: Union[Image.Image, np.ndarray, Dict[str, int]]) -> Dict[str, int]:
+        # A size dict stands in for the image when reprocessing stored candidates
+        if isinstance(image, dict):
+            return {'width': image['width'], 'height': image['height']}
+        if isinstance(image, np.ndarray):
+            return {'width': int(image.shape[1]), 'height': int(image.shape[0])}
+        return {'width': image.width, 'height': image.height}
+    
+    @staticmethod
+    def _image_name(source) -> str:
+        if isinstance(source, str) and source:
+            return os.path.basename(source)
+        if isinstance(source, (Image.Image, np.ndarray)):
+            return 'memory'
+        return 'unknown'
+    
+    def _add_poker_insights(self, analysis_results: Dict[str, Any]) -> Dict[str, Any]:
+        analysis_results['poker_insights'] = build_poker_insights(analysis_results.get('extracted_data', {}))
         return analysis_results
     
-    def _extract_numeric_value(self, text: str) -> float:
-        import re
-        numbers = re.findall(r'\d+\.?\d*', text)
-        if numbers:
-            try:
-                return float(numbers[0])
-            except ValueError:
-                pass
-        return None
\ No newline at end of file
+    def _extract_numeric_value(self, text: str, region_type: str = 'hero_stack') -> Optional[float]:
+        return parse_text(text, region_type).amount
@@ -0,0 +1,154 @@
+"""
+Asyncio front-end for PokerAnalysisEngine
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from .analysis_engine import PokerAnalysisEngine
+
+
+class AsyncPokerAnalysisEngine:
+    """
+    Runs the blocking OCR work on an executor so an event loop can drive
+    many tables at once. ``max_concurrency`` bounds the number of regions
+    being read at the same time across every image in flight.
+    """
+
+    def __init__(self, engine: Optional[PokerAnalysisEngine] = None, max_concurrency: int = 4,
+                 executor: Optional[Executor] = None):
+        self.engine = engine or PokerAnalysisEngine()
+        self.max_concurrency = max(1, max_concurrency)
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                        thread_name_prefix='async-ocr')
+        self._semaphore = None
+
+    async def analyze(self, image_source, template: Dict[str, Any], image_name: Optional[str] = None,
+                      deadline: Optional[float] = None) -> Dict[str, Any]:
+        analysis_results = None
+        async for event in self.stream(image_source, template, image_name, deadline):
+            if event['event'] == 'complete':
+                analysis_results = event['results']
+        return analysis_results
+
+    async def analyze_many(self, items: Iterable[Tuple[Any, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Analyse ``(image_source, template)`` pairs concurrently, preserving order."""
+        return await asyncio.gather(*(self.analyze(source, template) for source, template in items))
+
+    async def stream(self, image_source, template: Dict[str, Any], image_name: Optional[str] = None,
+                     deadline: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield ``{'event': 'region', 'region_key', 'result', 'elapsed'}`` for each
+        region as it finishes, then ``{'event': 'complete', 'results'}`` with the full
+        analysis in the same shape as ``analyze_poker_image``. As there,
+        ``deadline`` is a time budget in seconds; regions not read within it
+        are marked as pending.
+        """
+        loop = asyncio.get_running_loop()
+        image_name = image_name or self.engine._image_name(image_source)
+
+        try:
+            image = await loop.run_in_executor(self._executor, self.engine._load_image, image_source)
+        except Exception as e:
+            yield {'event': 'complete', 'results': self.engine._error_results(e, template, image_name)}
+            return
+
+        regions = template.get('regions', {})
+        analysis_results = self.engine._new_results(image, template, image_name)
+        extracted_data = {}
+        start_time = time.perf_counter()
+        absolute_deadline = time.monotonic() + deadline if deadline is not None else None
+
+        template_key = self.engine._template_key(template)
+        site = template.get('site')
+        try:
+            mosaic_extractions = await loop.run_in_executor(self._executor, self.engine._mosaic_extractions,
+                                                            image, regions)
+        except Exception as e:
+            yield {'event': 'complete', 'results': self.engine._error_results(e, template, image_name)}
+            return
+
+        tasks = {
+            asyncio.ensure_future(self._analyze_region(image, region_key, region_data, template_key, site,
+                                                       mosaic_extractions.get(region_key))): region_key
+            for region_key, region_data in self.engine.scheduler.order(template)
+        }
+        async for region_key, region_result in self._completed(tasks, absolute_deadline):
+            if region_result is None:
+                region_result = self.engine._pending_result(region_key, regions[region_key])
+            extracted_data[region_key] = region_result
+            yield {'event': 'region', 'region_key': region_key, 'result': region_result,
+                   'elapsed': time.perf_counter() - start_time}
+
+        if self.engine.consistency_checker:
+            tasks = {
+                asyncio.ensure_future(self._analyze_region(image, region_key, regions[region_key], template_key,
+                                                           site, reread=True)): region_key
+                for region_key in self.engine.consistency_checker.regions_to_reread(extracted_data)
+            }
+            async for region_key, region_result in self._completed(tasks, absolute_deadline):
+                # A re-read cut off by the deadline keeps the first read
+                if region_result is not None:
+                    extracted_data[region_key] = region_result
+                    yield {'event': 'region', 'region_key': region_key, 'result': region_result,
+                           'elapsed': time.perf_counter() - start_time}
+
+        analysis_results['extracted_data'] = {key: extracted_data[key] for key in regions if key in extracted_data}
+        processing_time = time.perf_counter() - start_time
+        try:
+            # Insights, lexicon updates and the candidate log are blocking work too
+            analysis_results = await loop.run_in_executor(self._executor, self.engine._finalize_results,
+                                                          analysis_results, processing_time)
+        except Exception as e:
+            analysis_results = self.engine._error_results(e, template, image_name)
+        yield {'event': 'complete', 'results': analysis_results}
+
+    async def close(self):
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @staticmethod
+    async def _completed(tasks: Dict[asyncio.Future, str],
+                         absolute_deadline: Optional[float]) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """``(region_key, result)`` as tasks finish, then ``(region_key, None)`` for those the deadline cut off."""
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = None if absolute_deadline is None else max(0.0, absolute_deadline - time.monotonic())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+        for task in tasks:
+            if task in pending:
+                yield tasks[task], None
+
+    async def _analyze_region(self, image: Image.Image, region_key: str, region_data: Dict[str, Any],
+                              template_key: Optional[str] = None, site: Optional[str] = None,
+                              extraction_result: Optional[Dict[str, Any]] = None, reread: bool = False):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        loop = asyncio.get_running_loop()
+        if reread:
+            call = (self.engine._reread_region, image, region_key, region_data, template_key, site)
+        else:
+            call = (self.engine._analyze_region, image, region_key, region_data, template_key, site, extraction_result)
+        async with self._semaphore:
+            region_result = await loop.run_in_executor(self._executor, *call)
+        return region_key, region_result
@@ -0,0 +1,127 @@
+"""
+Log of raw OCR candidates per analysis
+
+``TextExtractor`` reads each region with several preprocessing variants and
+engines but the analysis only keeps the winner. The candidate log keeps
+every candidate that passed the engine's confidence floor, before cleaning,
+as ``[method, raw_text, confidence]``. With it, service.reprocess can redo
+cleaning, validation, selection, parsing and insights after any of them
+change, without OCR.
+
+One JSON line per analysis. Records are buffered and appended every
+``flush_every`` analyses as one gzip member; a gzip file of concatenated
+members reads back as a single stream. Each member is written with a
+single ``write`` in append mode, so several processes can share the log.
+
+The engine only keeps the log when POKER_OCR_CANDIDATE_LOG names the file.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import threading
+import weakref
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import OCRConfig
+
+RECORD_VERSION = 1
+
+# Logs still buffering records; one exit hook flushes them all without keeping them alive
+_open_logs = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_logs():
+    for log in list(_open_logs):
+        log.flush()
+
+
+def compact_candidates(all_results: List[Dict[str, Any]]) -> List[list]:
+    return [[result['method'], result.get('raw_text', result['text']), round(float(result['confidence']), 2)]
+            for result in all_results]
+
+
+def region_status(region_result: Dict[str, Any]) -> Optional[str]:
+    """``empty``, ``pending`` or ``error`` for regions OCR did not read, else None."""
+    if region_result.get('empty'):
+        return 'empty'
+    if region_result.get('pending'):
+        return 'pending'
+    if region_result.get('method') == 'error':
+        return 'error'
+    return None
+
+
+class CandidateLog:
+    def __init__(self, path: Optional[str] = None, flush_every: int = 50):
+        self.path = path or OCRConfig.CANDIDATE_LOG_PATH
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._buffer = []
+        _open_logs.add(self)
+
+    def record(self, analysis_results: Dict[str, Any], candidates: Dict[str, List[list]], processing_time: float):
+        regions = {}
+        for region_key, region_result in analysis_results['extracted_data'].items():
+            entry = {
+                'type': region_result['type'],
+                'display_name': region_result['display_name'],
+                'coordinates': region_result['coordinates'],
+                'text': region_result['text']
+            }
+            status = region_status(region_result)
+            if status:
+                entry['status'] = status
+                if status == 'error':
+                    entry['error'] = region_result.get('error', '')
+            else:
+                entry['candidates'] = candidates.get(region_key, [])
+            regions[region_key] = entry
+
+        line = json.dumps({
+            'v': RECORD_VERSION,
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'site': analysis_results['site'],
+            'image_file': analysis_results['image_file'],
+            'image_size': analysis_results['image_size'],
+            'template_info': analysis_results['template_info'],
+            'processing_time': round(processing_time, 4),
+            'regions': regions
+        }, ensure_ascii=False, separators=(',', ':'))
+
+        with self._lock:
+            self._buffer.append(line)
+            should_flush = len(self._buffer) >= self.flush_every
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        member = gzip.compress(('\n'.join(lines) + '\n').encode('utf-8'))
+        with open(self.path, 'ab') as f:
+            f.write(member)
+
+
+def read_lines(path: str) -> Iterator[str]:
+    """JSON lines of a candidate log; a member cut short by a crash ends the iteration."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                if line.endswith('\n'):
+                    yield line
+        except (EOFError, gzip.BadGzipFile):
+            return
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    for line in read_lines(path):
+        yield json.loads(line)
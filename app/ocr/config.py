@@ -2,7 +2,15 @@
 OCR Configuration Settings
 """
 
+import json
+import os
+from fnmatch import fnmatch
+
 class OCRConfig:
+
+    # Learned statistics, the variant profile and the candidate log live here
+    # rather than in whatever directory the app was started from
+    DATA_DIR = os.environ.get('POKER_OCR_DATA_DIR', os.path.expanduser('~/.local/share/poker_ocr'))
     
     TESSERACT_CONFIGS = {
         'default': '--psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz$.,/:- ',
@@ -32,18 +40,38 @@ class OCRConfig:
     }
     
     @classmethod
-    def get_config_for_region(cls, region_type):
+    def get_config_key_for_region(cls, region_type):
         if '_name' in region_type:
-            return cls.TESSERACT_CONFIGS['player_name']
+            return 'player_name'
         elif '_stack' in region_type:
-            return cls.TESSERACT_CONFIGS['currency_precise']
+            return 'currency_precise'
         elif '_bet' in region_type:
-            return cls.TESSERACT_CONFIGS['currency_precise']
+            return 'currency_precise'
         elif region_type.startswith('seat_'):
-            return cls.TESSERACT_CONFIGS['default']
+            return 'default'
         
-        config_key = cls.REGION_CONFIG_MAP.get(region_type, 'default')
-        return cls.TESSERACT_CONFIGS[config_key]
+        return cls.REGION_CONFIG_MAP.get(region_type, 'default')
+    
+    @classmethod
+    def get_config_for_region(cls, region_type):
+        return cls.TESSERACT_CONFIGS[cls.get_config_key_for_region(region_type)]
+    
+    # Regions are read class by class in this order; within a class by the
+    # template priority from regions_definitions. Patterns use fnmatch syntax.
+    REGION_LATENCY_CLASSES = {
+        'critical': ['hero_cards', 'total_pot', 'current_pot', 'hero_stack'],
+        'standard': ['*_stack', '*_bet', 'hand_history', 'blinds_info', 'hero_name'],
+        'background': ['seat_*', 'position_stats', 'tournament_header']
+    }
+    DEFAULT_LATENCY_CLASS = 'standard'
+    SCHEDULER_MAX_WORKERS = 1
+    
+    @classmethod
+    def get_latency_class(cls, region_type, latency_classes=None):
+        for latency_class, patterns in (latency_classes or cls.REGION_LATENCY_CLASSES).items():
+            if any(fnmatch(region_type, pattern) for pattern in patterns):
+                return latency_class
+        return cls.DEFAULT_LATENCY_CLASS
     
     CONFIDENCE_THRESHOLDS = {
         'minimum_success': 30,
@@ -58,4 +86,86 @@ class OCRConfig:
         'hand_numbers': ['binary_threshold', 'morphological_operations'],
         'tournament_info': ['moderate_contrast', 'denoising'],
         'default': ['basic_contrast', 'binary_threshold']
-    }
\ No newline at end of file
+    }
+    
+    # Written by benchmark.sweep; restricts which (variant, engine, config)
+    # attempts the extractor makes per region category
+    VARIANT_PROFILE_PATH = os.environ.get('POKER_OCR_PROFILE', os.path.join(DATA_DIR, 'ocr_profile.json'))
+    
+    @classmethod
+    def load_variant_profile(cls, path=None):
+        path = path or cls.VARIANT_PROFILE_PATH
+        if not path or not os.path.exists(path):
+            return {}
+        with open(path, 'r') as f:
+            profile = json.load(f)
+        return profile.get('categories', {})
+    
+    # Online narrowing of OCR attempts to the methods that keep winning
+    ADAPTIVE_SELECTION = True
+    ADAPTIVE_TOP_K = 3
+    ADAPTIVE_WARMUP = 30
+    ADAPTIVE_EXPLORE_RATE = 0.1
+    VARIANT_STATS_PATH = os.environ.get('POKER_OCR_VARIANT_STATS', os.path.join(DATA_DIR, 'ocr_variant_stats.json'))
+    
+    # Known player names per site; low-confidence name reads snap to the
+    # closest known name within NAME_LEXICON_MAX_DISTANCE edits
+    NAME_LEXICON_ENABLED = True
+    NAME_LEXICON_PATH = os.environ.get('POKER_OCR_NAME_LEXICON', os.path.join(DATA_DIR, 'name_lexicon.json'))
+    NAME_LEXICON_MAX_DISTANCE = 2
+    NAME_LEXICON_SNAP_CONFIDENCE = 70
+    NAME_LEXICON_LEARN_CONFIDENCE = 85
+
+    # Skip OCR for regions whose crop looks blank; thresholds are learned per
+    # region kind from OCR outcomes once EMPTY_WARMUP of each are recorded
+    EMPTY_DETECTION_ENABLED = True
+    EMPTY_STATS_PATH = os.environ.get('POKER_OCR_EMPTY_STATS', os.path.join(DATA_DIR, 'empty_region_stats.json'))
+    EMPTY_WARMUP = 30
+    EMPTY_VERIFY_RATE = 0.05
+
+    # Whole-frame gate before analysis: Laplacian variance floor over the
+    # region union, anchor match score and allowed size difference in pixels
+    FRAME_GATE_MIN_SHARPNESS = 50.0
+    FRAME_GATE_ANCHOR_THRESHOLD = 0.7
+    FRAME_GATE_ANCHOR_SEARCH = 8
+    FRAME_GATE_SIZE_TOLERANCE = 0
+
+    # Perceptual dedupe of repeated screenshots: hash cell size in pixels,
+    # bits a region may differ by and frames kept in the recent-hash index.
+    # Coarser cells or any tolerance let one-digit amount changes match
+    DEDUPE_CELL = 1
+    DEDUPE_MAX_DISTANCE = 0
+    DEDUPE_MAX_ENTRIES = 256
+
+    # Raw per-variant OCR candidates of every analysis, appended as gzip JSON
+    # Lines so service.reprocess can redo cleaning and selection without OCR.
+    # The log grows with every analysis, so it is only kept when
+    # POKER_OCR_CANDIDATE_LOG names the file
+    CANDIDATE_LOG_ENABLED = bool(os.environ.get('POKER_OCR_CANDIDATE_LOG'))
+    CANDIDATE_LOG_PATH = os.environ.get('POKER_OCR_CANDIDATE_LOG', os.path.join(DATA_DIR, 'ocr_candidates.jsonl.gz'))
+
+    # Cheap first pass (the CHEAP_TOP_K most winning attempts per region once
+    # the variant selector is warm) followed by cross-field consistency
+    # checks; regions in a failed check are re-read with every variant/engine.
+    # Off unless POKER_OCR_CONSISTENCY=1, as it lowers the effort of every read
+    CONSISTENCY_ENABLED = os.environ.get('POKER_OCR_CONSISTENCY', '0') == '1'
+    CHEAP_TOP_K = 1
+    CONSISTENCY_MIN_CONFIDENCE = 60
+    CONSISTENCY_HAND_ID_MAX_GAP = 10000000
+    CONSISTENCY_STACK_AVG_RATIO = 50
+    
+    # Read regions that share one of these Tesseract configs with a single
+    # call over a stacked mosaic of their crops; rejected reads fall back to
+    # per-region extraction
+    MOSAIC_ENABLED = False
+    MOSAIC_CONFIG_KEYS = ['currency_precise']
+    MOSAIC_LINE_HEIGHT = 40
+    MOSAIC_SEPARATOR = 24
+    MOSAIC_MIN_CONFIDENCE = 60
+
+    # EasyOCR recognizer backend on CPU: 'torch' (stock fp32), 'quantized'
+    # (dynamic int8) or 'onnx' (ONNX Runtime, exported once into the cache);
+    # EASYOCR_THREADS caps intra-op threads per process, 0 keeps the default
+    EASYOCR_BACKEND = os.environ.get('POKER_OCR_EASYOCR_BACKEND', 'torch')
+    EASYOCR_MODEL_CACHE = os.environ.get('POKER_OCR_MODEL_CACHE', os.path.expanduser('~/.cache/poker_ocr'))
+    EASYOCR_THREADS = int(os.environ.get('POKER_OCR_EASYOCR_THREADS', '0'))
@@ -0,0 +1,113 @@
+"""
+Cross-field consistency checks over parsed region results
+
+With the checker enabled the engine reads every region with a cheap
+attempt set first (see ``TextExtractor.prepare`` effort levels). Only the
+regions involved in a failed check are read again with every variant and
+engine. Checks:
+
+    pot_order       the total pot is at least the current pot
+    hand_ids        the current and previous hand numbers have the same
+                    number of digits and are at most CONSISTENCY_HAND_ID_MAX_GAP
+                    apart
+    stack_range     a stack in BB is at most the chips in play: the average
+                    stack times the players left, from position_stats (or
+                    CONSISTENCY_STACK_AVG_RATIO average stacks without a position)
+    low_confidence  a successful read below CONSISTENCY_MIN_CONFIDENCE
+
+A check only runs when the fields it compares were parsed, so a missing
+region never counts as inconsistent.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from .config import OCRConfig
+
+
+def _parsed(extracted_data: Dict[str, Any], region_key: str) -> Dict[str, Any]:
+    region_result = extracted_data.get(region_key)
+    if not region_result or not region_result['success']:
+        return {}
+    return region_result.get('parsed', {})
+
+
+def _issue(check: str, regions: List[str], detail: str) -> Dict[str, Any]:
+    return {'check': check, 'regions': regions, 'detail': detail}
+
+
+class ConsistencyChecker:
+    def __init__(self, min_confidence: Optional[float] = None, hand_id_max_gap: Optional[int] = None,
+                 stack_avg_ratio: Optional[float] = None):
+        self.min_confidence = min_confidence if min_confidence is not None else OCRConfig.CONSISTENCY_MIN_CONFIDENCE
+        self.hand_id_max_gap = hand_id_max_gap or OCRConfig.CONSISTENCY_HAND_ID_MAX_GAP
+        self.stack_avg_ratio = stack_avg_ratio or OCRConfig.CONSISTENCY_STACK_AVG_RATIO
+
+    def check(self, extracted_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Failed checks as ``{'check', 'regions', 'detail'}``."""
+        issues = []
+        issues.extend(self._check_pots(extracted_data))
+        issues.extend(self._check_hand_ids(extracted_data))
+        issues.extend(self._check_stacks(extracted_data))
+        issues.extend(self._check_confidence(extracted_data))
+        return issues
+
+    def regions_to_reread(self, extracted_data: Dict[str, Any]) -> List[str]:
+        """Regions in a failed check that OCR read and that were not re-read yet."""
+        region_keys = []
+        for issue in self.check(extracted_data):
+            for region_key in issue['regions']:
+                region_result = extracted_data[region_key]
+                if region_key in region_keys or region_result.get('reread'):
+                    continue
+                if region_result.get('empty') or region_result.get('pending') or region_result['method'] == 'error':
+                    continue
+                region_keys.append(region_key)
+        return region_keys
+
+    @staticmethod
+    def _check_pots(extracted_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        total_pot = _parsed(extracted_data, 'total_pot')
+        current_pot = _parsed(extracted_data, 'current_pot')
+        if 'amount' not in total_pot or 'amount' not in current_pot or total_pot.get('unit') != current_pot.get('unit'):
+            return []
+        if total_pot['amount'] >= current_pot['amount']:
+            return []
+        return [_issue('pot_order', ['total_pot', 'current_pot'],
+                       f"total pot {total_pot['amount']:g} < current pot {current_pot['amount']:g}")]
+
+    def _check_hand_ids(self, extracted_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        hand_ids = _parsed(extracted_data, 'hand_history').get('hand_ids', [])
+        if len(hand_ids) < 2:
+            return []
+        current, previous = hand_ids[:2]
+        if len(str(current)) == len(str(previous)) and abs(current - previous) <= self.hand_id_max_gap:
+            return []
+        return [_issue('hand_ids', ['hand_history'], f"hand numbers {current} and {previous} too far apart")]
+
+    def _check_stacks(self, extracted_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        position_stats = _parsed(extracted_data, 'position_stats')
+        average = position_stats.get('details', {}).get('avg_stack_bb')
+        if not average:
+            return []
+        position = position_stats.get('position')
+        players = position[1] if position else self.stack_avg_ratio
+        limit = average * players
+
+        issues = []
+        for region_key, region_result in extracted_data.items():
+            if not region_result['type'].endswith('_stack'):
+                continue
+            stack = _parsed(extracted_data, region_key)
+            if stack.get('unit') != 'BB' or stack.get('amount', 0) <= limit:
+                continue
+            issues.append(_issue('stack_range', [region_key, 'position_stats'],
+                                 f"{region_key} {stack['amount']:g} BB > {limit:g} BB in play"))
+        return issues
+
+    def _check_confidence(self, extracted_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [
+            _issue('low_confidence', [region_key], f"{region_key} read at {region_result['confidence']:.0f}")
+            for region_key, region_result in extracted_data.items()
+            if region_result['success'] and region_result['confidence'] < self.min_confidence
+            and 'lexicon_corrected_from' not in region_result
+        ]
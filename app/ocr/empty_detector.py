@@ -0,0 +1,202 @@
+"""
+Pre-OCR detection of blank regions
+
+A region crop is summarised by three cheap features:
+
+    std         pixel standard deviation of the grayscale crop
+    edges       share of Canny edge pixels
+    foreground  minority share of pixels after Otsu binarisation
+
+Blank regions (no bet in front of a seat, an empty seat, no pot yet) score
+low on all three and are reported as ``empty`` without running OCR.
+
+Thresholds are learned per (template, region kind) from past OCR outcomes.
+Crops where OCR found text give the "text" distribution; crops where it
+found nothing give the "blank" distribution. A feature is used only once
+the two distributions separate; its threshold sits midway between the
+blank high end and the text low end. Until enough outcomes are recorded, a
+conservative default treats only near-flat crops as empty. A small share of
+empty decisions is still read by OCR, so a threshold that starts hiding text
+corrects itself. Saving merges the samples recorded since the last save into
+the file (see ocr.stats_file), so detectors in several processes share them.
+
+Usage (from the app directory), to inspect the learned thresholds:
+    python -m ocr.empty_detector [path]
+"""
+
+import logging
+import random
+import re
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from .config import OCRConfig
+from .stats_file import read_json, update_json
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ('std', 'edges', 'foreground')
+
+# Near-flat crops only; used until both outcome distributions are warmed up
+DEFAULT_THRESHOLDS = {'std': 4.0, 'edges': 0.002}
+
+_SEAT_NUMBER = re.compile(r'\d+')
+
+
+def region_kind(region_type: str) -> str:
+    """Region type with seat numbers folded, so ``seat_1_bet`` and ``seat_5_bet`` learn together."""
+    return _SEAT_NUMBER.sub('N', region_type)
+
+
+def region_features(gray: np.ndarray) -> Dict[str, float]:
+    if gray.size == 0:
+        return {feature: 0.0 for feature in FEATURES}
+    edges = cv2.Canny(gray, 50, 150)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    foreground = float(np.count_nonzero(binary)) / binary.size
+    return {
+        'std': round(float(gray.std()), 3),
+        'edges': round(float(np.count_nonzero(edges)) / edges.size, 5),
+        'foreground': round(min(foreground, 1.0 - foreground), 5)
+    }
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))]
+
+
+class EmptyRegionDetector:
+    def __init__(self, stats_path: Optional[str] = None, warmup: Optional[int] = None,
+                 verify_rate: Optional[float] = None, history: int = 256, save_every: int = 50,
+                 seed: Optional[int] = None):
+        self.stats_path = stats_path if stats_path is not None else OCRConfig.EMPTY_STATS_PATH
+        self.warmup = warmup if warmup is not None else OCRConfig.EMPTY_WARMUP
+        self.verify_rate = verify_rate if verify_rate is not None else OCRConfig.EMPTY_VERIFY_RATE
+        self.history = history
+        self.save_every = save_every
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._thresholds = {}
+        # Samples recorded since the last save, in the shape of ``stats``
+        self._pending = {}
+        self.stats = self._load()
+
+    @staticmethod
+    def stats_key(region_type: str, template_key: Optional[str]) -> str:
+        return f"{template_key or 'any'}:{region_kind(region_type)}"
+
+    def thresholds(self, region_type: str, template_key: Optional[str]) -> Dict[str, float]:
+        """Feature thresholds below which a crop counts as empty; empty dict means never empty."""
+        key = self.stats_key(region_type, template_key)
+        with self._lock:
+            if key not in self._thresholds:
+                self._thresholds[key] = self._learn(self.stats.get(key))
+            return self._thresholds[key]
+
+    def _learn(self, entry: Optional[Dict[str, Any]]) -> Dict[str, float]:
+        if not entry or min(len(entry['text']['std']), len(entry['blank']['std'])) < self.warmup:
+            return dict(DEFAULT_THRESHOLDS)
+
+        thresholds = {}
+        for feature in FEATURES:
+            blank_high = _percentile(entry['blank'][feature], 0.98)
+            text_low = _percentile(entry['text'][feature], 0.02)
+            if blank_high < text_low:
+                thresholds[feature] = (blank_high + text_low) / 2
+        return thresholds
+
+    def is_empty(self, features: Dict[str, float], region_type: str, template_key: Optional[str] = None) -> bool:
+        thresholds = self.thresholds(region_type, template_key)
+        if not thresholds or any(features[feature] >= limit for feature, limit in thresholds.items()):
+            return False
+        # Occasionally let OCR check an empty verdict so the thresholds keep learning
+        return self._rng.random() >= self.verify_rate
+
+    def record(self, features: Dict[str, float], has_text: bool, region_type: str,
+               template_key: Optional[str] = None):
+        key = self.stats_key(region_type, template_key)
+        label = 'text' if has_text else 'blank'
+        with self._lock:
+            for stats in (self.stats, self._pending):
+                entry = stats.setdefault(key, self._new_entry())
+                for feature in FEATURES:
+                    values = entry[label][feature]
+                    values.append(features[feature])
+                    if len(values) > self.history:
+                        del values[0]
+            self._thresholds.pop(key, None)
+
+            self._unsaved += 1
+            should_save = self.save_every and self._unsaved >= self.save_every
+
+        if should_save:
+            self.save()
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {}
+        for key in sorted(self.stats):
+            entry = self.stats[key]
+            template_key, kind = key.split(':', 1)
+            summary[key] = {
+                'text_samples': len(entry['text']['std']),
+                'blank_samples': len(entry['blank']['std']),
+                'thresholds': self.thresholds(kind, template_key)
+            }
+        return summary
+
+    @staticmethod
+    def _new_entry() -> Dict[str, Any]:
+        return {label: {feature: [] for feature in FEATURES} for label in ('text', 'blank')}
+
+    def save(self):
+        if not self.stats_path:
+            return
+        with self._lock:
+            try:
+                payload = update_json(self.stats_path, self._merge)
+            except OSError as e:
+                # Keep the samples for the next save rather than failing the region that triggered it
+                logger.warning("Could not save empty-region statistics to %s: %s", self.stats_path, e)
+                return
+            self.stats = payload['stats']
+            self._thresholds = {}
+            self._pending = {}
+            self._unsaved = 0
+
+    def _merge(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        stats = payload.get('stats', {})
+        for key, pending in self._pending.items():
+            entry = stats.setdefault(key, self._new_entry())
+            for label, samples in pending.items():
+                for feature, values in samples.items():
+                    entry[label][feature] = (entry[label][feature] + values)[-self.history:]
+        return {'updated': datetime.now().isoformat(), 'stats': stats}
+
+    def _load(self) -> Dict[str, Any]:
+        if not self.stats_path:
+            return {}
+        return read_json(self.stats_path).get('stats', {})
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    detector = EmptyRegionDetector(stats_path=argv[0] if argv else None)
+    summary = detector.summary()
+    if not summary:
+        print(f"No outcomes recorded in {detector.stats_path}")
+        return
+
+    for key, entry in summary.items():
+        thresholds = ', '.join(f"{feature} < {limit:.4g}" for feature, limit in entry['thresholds'].items())
+        print(f"{key} ({entry['text_samples']} text, {entry['blank_samples']} blank): {thresholds or 'never empty'}")
+
+
+if __name__ == "__main__":
+    main()
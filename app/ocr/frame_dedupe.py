@@ -0,0 +1,129 @@
+"""
+Perceptual dedupe of whole screenshots
+
+Capture tools often save the same table state many times, e.g. while
+waiting for an opponent. Each frame is reduced to a difference hash over
+the template's regions only, so an animated background, chat box or clock
+outside the regions does not make identical table states look different.
+
+Each region is shrunk to a grid of ``cell``-pixel cells. Two bits are kept
+per pair of horizontally adjacent cells: "clearly brighter" and "clearly
+darker". Cells within ``margin`` grey levels of each other set neither bit,
+which keeps flat backgrounds and slight compression noise stable.
+
+A one-digit change to an amount ("8 BB" -> "9 BB", $1,250 -> $1,230) moves
+only a few pixels. With 4-pixel cells it can flip as few as zero bits, so by
+default the hash keeps every pixel (``cell`` 1, where such changes differ by
+tens of bits) and frames match only when their hashes are identical.
+
+A ``max_distance`` above zero also accepts near repeats, found by a scan of
+the bounded, least-recently-used index; only use it with templates whose
+regions hold no amounts. Exact repeats are a dict lookup either way.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .config import OCRConfig
+from .image_processor import ImageProcessor
+
+
+def region_hash(gray: np.ndarray, cell: int, margin: int) -> np.ndarray:
+    if gray.size == 0:
+        return np.zeros(0, dtype=bool)
+    rows = max(2, gray.shape[0] // cell)
+    cols = max(2, gray.shape[1] // cell)
+    small = cv2.resize(gray, (cols + 1, rows), interpolation=cv2.INTER_AREA).astype(np.int16)
+    diff = small[:, 1:] - small[:, :-1]
+    return np.concatenate([(diff > margin).ravel(), (diff < -margin).ravel()])
+
+
+class FrameDeduper:
+    def __init__(self, template: Dict[str, Any], max_entries: Optional[int] = None,
+                 max_distance: Optional[int] = None, cell: Optional[int] = None, margin: int = 4):
+        self.regions = [region['coordinates'] for region in template.get('regions', {}).values()]
+        self.max_entries = max_entries or OCRConfig.DEDUPE_MAX_ENTRIES
+        self.max_distance = max_distance if max_distance is not None else OCRConfig.DEDUPE_MAX_DISTANCE
+        self.cell = cell or OCRConfig.DEDUPE_CELL
+        self.margin = margin
+
+        self._index = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {'exact': 0, 'near': 0, 'miss': 0, 'evicted': 0}
+
+    def signature(self, image: Union[Image.Image, np.ndarray]) -> Tuple[bytes, np.ndarray, np.ndarray]:
+        """``(key, bits, region_offsets)``; ``key`` is the packed bits for exact lookups."""
+        gray = ImageProcessor.to_gray(np.asarray(image))
+        hashes = []
+        for coords in self.regions:
+            x, y = max(0, coords['x']), max(0, coords['y'])
+            hashes.append(region_hash(gray[y:coords['y'] + coords['height'], x:coords['x'] + coords['width']],
+                                      self.cell, self.margin))
+        hashes = [region_bits for region_bits in hashes if len(region_bits)]
+        bits = np.concatenate(hashes) if hashes else np.zeros(0, dtype=bool)
+        offsets = np.cumsum([0] + [len(region_bits) for region_bits in hashes[:-1]])
+        return np.packbits(bits).tobytes() + len(bits).to_bytes(4, 'little'), bits, offsets
+
+    @staticmethod
+    def distance(signature: Tuple[bytes, np.ndarray, np.ndarray],
+                 other: Tuple[bytes, np.ndarray, np.ndarray]) -> Optional[int]:
+        """Largest per-region bit distance, or None if the signatures are not comparable."""
+        key, bits, offsets = signature
+        if key == other[0]:
+            return 0
+        if len(bits) != len(other[1]) or not len(bits):
+            return None
+        return int(np.add.reduceat((bits != other[1]).astype(np.int32), offsets).max())
+
+    def lookup(self, signature: Tuple[bytes, np.ndarray, np.ndarray]) -> Optional[Tuple[Any, int]]:
+        """The stored value of a matching frame and its largest per-region distance, or None."""
+        key = signature[0]
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+                self.counts['exact'] += 1
+                return self._index[key][1], 0
+
+            best = None
+            candidates = reversed(self._index.items()) if self.max_distance else ()
+            for other_key, (other, value) in candidates:
+                distance = self.distance(signature, other)
+                if distance is not None and distance <= self.max_distance and (best is None or distance < best[2]):
+                    best = (other_key, value, distance)
+                    if distance == 0:
+                        break
+
+            if best is None:
+                self.counts['miss'] += 1
+                return None
+            self._index.move_to_end(best[0])
+            self.counts['near'] += 1
+            return best[1], best[2]
+
+    def add(self, signature: Tuple[bytes, np.ndarray, np.ndarray], value: Any):
+        key = signature[0]
+        with self._lock:
+            self._index[key] = (signature, value)
+            self._index.move_to_end(key)
+            while len(self._index) > self.max_entries:
+                self._index.popitem(last=False)
+                self.counts['evicted'] += 1
+
+    @property
+    def skipped(self) -> int:
+        return self.counts['exact'] + self.counts['near']
+
+
+def duplicate_results(original: Dict[str, Any], image_name: str, distance: int) -> Dict[str, Any]:
+    """A copy of ``original`` for a repeated frame, pointing back at the analysed one."""
+    analysis_results = dict(original)
+    analysis_results['image_file'] = image_name
+    analysis_results['duplicate_of'] = original.get('image_file')
+    analysis_results['dedupe_distance'] = distance
+    analysis_results['performance_metrics'] = {'processing_time': 0, 'regions_per_second': 0}
+    return analysis_results
@@ -0,0 +1,173 @@
+"""
+Whole-frame quality gate run before analysis
+
+Screenshots taken mid-animation, under a modal popup or while the table
+window is being resized cost a full OCR pass and only yield garbage. The
+gate checks a frame in a few milliseconds, cheapest check first:
+
+    size_mismatch   frame size differs from the template's image_size  (reject)
+    unreadable      the image cannot be decoded                        (reject)
+    anchor_missing  the template's anchor patch is not where it should
+                    be, e.g. covered by a popup                        (defer)
+    blurred         Laplacian variance over the region union is below
+                    the sharpness floor, e.g. during a transition      (defer)
+
+Rejected frames can never match the template. Deferred frames are
+transiently unusable, so a streaming caller should simply wait for a later
+frame. The size check reads only the image header, so a mis-sized
+screenshot file is rejected without being decoded.
+
+Usage (from the app directory):
+    python -m ocr.frame_gate templates/yaya_6p_template.json captures/*.png
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .config import OCRConfig
+from .image_processor import ImageProcessor
+from .multi_table import load_anchor_patch
+
+REJECT_REASONS = ('size_mismatch', 'unreadable')
+DEFER_REASONS = ('anchor_missing', 'blurred')
+
+
+def open_frame(source: Union[str, Image.Image, np.ndarray]) -> Union[Image.Image, np.ndarray]:
+    """Open a path lazily (header only); images and arrays are returned unchanged."""
+    if isinstance(source, (Image.Image, np.ndarray)):
+        return source
+    return Image.open(source)
+
+
+def region_union(template: Dict[str, Any]) -> Optional[Dict[str, int]]:
+    regions = [region['coordinates'] for region in template.get('regions', {}).values()]
+    if not regions:
+        return None
+    left = min(coords['x'] for coords in regions)
+    top = min(coords['y'] for coords in regions)
+    right = max(coords['x'] + coords['width'] for coords in regions)
+    bottom = max(coords['y'] + coords['height'] for coords in regions)
+    return {'x': max(0, left), 'y': max(0, top), 'width': right - max(0, left), 'height': bottom - max(0, top)}
+
+
+def sharpness(gray: np.ndarray) -> float:
+    """Variance of the Laplacian; low for blurred or faded frames."""
+    if gray.size == 0:
+        return 0.0
+    _, std = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))
+    return float(std[0][0]) ** 2
+
+
+class FrameGate:
+    def __init__(self, template: Dict[str, Any], templates_dir: str = "templates",
+                 min_sharpness: Optional[float] = None, anchor_threshold: Optional[float] = None,
+                 anchor_search: Optional[int] = None, size_tolerance: Optional[int] = None):
+        self.template = template
+        self.min_sharpness = min_sharpness if min_sharpness is not None else OCRConfig.FRAME_GATE_MIN_SHARPNESS
+        self.anchor_threshold = (anchor_threshold if anchor_threshold is not None
+                                 else OCRConfig.FRAME_GATE_ANCHOR_THRESHOLD)
+        self.anchor_search = anchor_search if anchor_search is not None else OCRConfig.FRAME_GATE_ANCHOR_SEARCH
+        self.size_tolerance = size_tolerance if size_tolerance is not None else OCRConfig.FRAME_GATE_SIZE_TOLERANCE
+
+        self.expected_size = template.get('image_size')
+        self.union = region_union(template)
+        self.anchor = template.get('anchor')
+        self.anchor_patch = load_anchor_patch(template, templates_dir)
+        self.counts = {reason: 0 for reason in ('accepted',) + REJECT_REASONS + DEFER_REASONS}
+
+    def check(self, image: Union[Image.Image, np.ndarray]) -> Dict[str, Any]:
+        """
+        Returns ``{'accepted', 'action', 'reason', 'metrics', 'elapsed'}`` where
+        ``action`` is 'accept', 'reject' or 'defer'. A lazily opened PIL image
+        is decoded here, so the caller can hand it on to the engine as is.
+        """
+        started = time.perf_counter()
+        metrics = {}
+        reason = self._check(image, metrics)
+        self.counts[reason or 'accepted'] += 1
+
+        if reason is None:
+            action = 'accept'
+        else:
+            action = 'reject' if reason in REJECT_REASONS else 'defer'
+        return {
+            'accepted': reason is None,
+            'action': action,
+            'reason': reason,
+            'metrics': metrics,
+            'elapsed': time.perf_counter() - started
+        }
+
+    def _check(self, image: Union[Image.Image, np.ndarray], metrics: Dict[str, Any]) -> Optional[str]:
+        if isinstance(image, np.ndarray):
+            height, width = image.shape[:2]
+        else:
+            width, height = image.size
+        metrics['width'], metrics['height'] = width, height
+
+        if self.expected_size and (abs(width - self.expected_size['width']) > self.size_tolerance or
+                                   abs(height - self.expected_size['height']) > self.size_tolerance):
+            return 'size_mismatch'
+
+        try:
+            gray = ImageProcessor.to_gray(np.asarray(image))
+        except (OSError, ValueError):
+            return 'unreadable'
+
+        if self.anchor_patch is not None:
+            metrics['anchor_score'] = self._anchor_score(gray)
+            if metrics['anchor_score'] < self.anchor_threshold:
+                return 'anchor_missing'
+
+        if self.union:
+            x, y = self.union['x'], self.union['y']
+            gray = gray[y:y + self.union['height'], x:x + self.union['width']]
+        metrics['sharpness'] = round(sharpness(gray), 1)
+        if metrics['sharpness'] < self.min_sharpness:
+            return 'blurred'
+        return None
+
+    def _anchor_score(self, gray: np.ndarray) -> float:
+        height, width = self.anchor_patch.shape[:2]
+        margin = self.anchor_search
+        x0, y0 = max(0, self.anchor['x'] - margin), max(0, self.anchor['y'] - margin)
+        window = gray[y0:self.anchor['y'] + height + margin, x0:self.anchor['x'] + width + margin]
+        if window.shape[0] < height or window.shape[1] < width:
+            return 0.0
+        scores = cv2.matchTemplate(window, self.anchor_patch, cv2.TM_CCOEFF_NORMED)
+        return round(float(scores.max()), 4)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check screenshots against the frame quality gate")
+    parser.add_argument('template', help="Path to a template JSON")
+    parser.add_argument('images', nargs='+')
+    parser.add_argument('--min-sharpness', type=float)
+    args = parser.parse_args(argv)
+
+    with open(args.template, 'r') as f:
+        template = json.load(f)
+    gate = FrameGate(template, os.path.dirname(args.template), min_sharpness=args.min_sharpness)
+
+    for image_path in args.images:
+        try:
+            verdict = gate.check(open_frame(image_path))
+        except OSError as e:
+            print(f"{os.path.basename(image_path)}: unreadable ({e})")
+            continue
+        metrics = ' '.join(f"{key}={value}" for key, value in verdict['metrics'].items())
+        print(f"{os.path.basename(image_path)}: {verdict['action']}"
+              f"{' (' + verdict['reason'] + ')' if verdict['reason'] else ''} "
+              f"{verdict['elapsed'] * 1000:.1f}ms {metrics}")
+    print(', '.join(f"{reason}: {count}" for reason, count in gate.counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,132 +1,111 @@
 import cv2
 import numpy as np
 from PIL import Image, ImageEnhance
-from typing import List
+from typing import Collection, Dict, List, Optional
 
 class ImageProcessor:
     
+    # Variants per category after the plain grayscale crop (variant 0); each
+    # step takes the grayscale crop and a per-crop cache of shared
+    # intermediates, so a caller can build only the variants it will read
+    CATEGORY_VARIANTS = {
+        'currency': ('_enhanced_2_5', '_binary', '_inverted_binary', '_enhanced_3_0_plus_10', '_closed_binary'),
+        'cards': ('_enhanced_3_0', '_sharpened_3_0', '_binary'),
+        'names': ('_enhanced_2_0', '_denoised_2_0', '_binary'),
+        'numbers': ('_binary', '_closed_binary', '_enhanced_2_0'),
+        'tournament': ('_enhanced_1_8_plus_15', '_denoised', '_binary'),
+        'default': ('_binary', '_inverted_binary', '_enhanced_2_0')
+    }
+    
     @staticmethod
-    def preprocess_region(image: np.ndarray, region_type: str) -> List[np.ndarray]:
-        processed_images = []
-        
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
-        processed_images.append(gray)
-        
+    def region_category(region_type: str) -> str:
         if region_type in ['total_pot', 'current_pot', 'hero_stack'] or '_stack' in region_type:
-            processed_images.extend(ImageProcessor._process_currency_regions(gray))
-            
+            return 'currency'
         elif region_type in ['hero_cards']:
-            processed_images.extend(ImageProcessor._process_card_regions(gray))
-            
+            return 'cards'
         elif region_type in ['hero_name'] or '_name' in region_type:
-            processed_images.extend(ImageProcessor._process_name_regions(gray))
-            
+            return 'names'
         elif region_type in ['hand_history']:
-            processed_images.extend(ImageProcessor._process_number_regions(gray))
-            
+            return 'numbers'
         elif region_type in ['tournament_header', 'blinds_info']:
-            processed_images.extend(ImageProcessor._process_tournament_regions(gray))
-            
-        else:
-            processed_images.extend(ImageProcessor._process_default_regions(gray))
+            return 'tournament'
+        return 'default'
+    
+    @staticmethod
+    def to_gray(image: np.ndarray) -> np.ndarray:
+        if len(image.shape) == 2:
+            return image
+        if image.shape[2] == 4:
+            return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    
+    @staticmethod
+    def variant_count(region_type: str) -> int:
+        return 1 + len(ImageProcessor.CATEGORY_VARIANTS[ImageProcessor.region_category(region_type)])
+    
+    @staticmethod
+    def preprocess_region(image: np.ndarray, region_type: str,
+                          variants: Optional[Collection[int]] = None) -> List[Optional[np.ndarray]]:
+        """Grayscale crop followed by the category's variants; indices not in ``variants`` are left as None."""
+        gray = ImageProcessor.to_gray(image)
+        processed_images = [gray if variants is None or 0 in variants else None]
+        
+        category = ImageProcessor.region_category(region_type)
+        cache = {}
+        for index, step in enumerate(ImageProcessor.CATEGORY_VARIANTS[category], start=1):
+            wanted = variants is None or index in variants
+            processed_images.append(getattr(ImageProcessor, step)(gray, cache) if wanted else None)
         
         return processed_images
     
     @staticmethod
-    def _process_currency_regions(gray: np.ndarray) -> List[np.ndarray]:
-        processed = []
-        
-        enhanced = cv2.convertScaleAbs(gray, alpha=2.5, beta=0)
-        processed.append(enhanced)
-        
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        processed.append(binary)
-        
-        inv_binary = cv2.bitwise_not(binary)
-        processed.append(inv_binary)
-        
-        ultra_enhanced = cv2.convertScaleAbs(gray, alpha=3.0, beta=10)
-        processed.append(ultra_enhanced)
-        
+    def _binary(gray: np.ndarray, cache: Dict[str, np.ndarray]) -> np.ndarray:
+        if 'binary' not in cache:
+            _, cache['binary'] = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return cache['binary']
+    
+    @staticmethod
+    def _inverted_binary(gray: np.ndarray, cache: Dict[str, np.ndarray]) -> np.ndarray:
+        return cv2.bitwise_not(ImageProcessor._binary(gray, cache))
+    
+    @staticmethod
+    def _closed_binary(gray: np.ndarray, cache: Dict[str, np.ndarray]) -> np.ndarray:
         kernel = np.ones((2,2), np.uint8)
-        morphed = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        processed.append(morphed)
-        
-        return processed
+        return cv2.morphologyEx(ImageProcessor._binary(gray, cache), cv2.MORPH_CLOSE, kernel)
     
     @staticmethod
-    def _process_card_regions(gray: np.ndarray) -> List[np.ndarray]:
-        processed = []
-        
-        enhanced = cv2.convertScaleAbs(gray, alpha=3.0, beta=0)
-        processed.append(enhanced)
-        
-        kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-        sharpened = cv2.filter2D(enhanced, -1, kernel)
-        processed.append(sharpened)
-        
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        processed.append(binary)
-        
-        return processed
+    def _enhanced_2_0(gray: np.ndarray, cache: Dict[str, np.ndarray]) -> np.ndarray:
+        if 'enhanced_2_0' not in cache:
+            cache['enhanced_2_0'] = cv2.convertScaleAbs(gray, alpha=2.0, beta=0)
+        return cache['enhanced_2_0']
     
     @staticmethod
-    def _process_name_regions(gray: np.ndarray) -> List[np.ndarray]:
-        processed = []
-        
-        enhanced = cv2.convertScaleAbs(gray, alpha=2.0, beta=0)
-        processed.append(enhanced)
-        
-        denoised = cv2.medianBlur(enhanced, 3)
-        processed.append(denoised)
-        
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        processed.append(binary)
-        
-        return processed
+    def _enhanced_2_5(gray: np.ndarray, cache: Dict[str, np.ndarray]) -> np.ndarray:
+        return cv2.convertScaleAbs(gray, alpha=2.5, beta=0)
     
     @staticmethod
-    def _process_number_regions(gray: np.ndarray) -> List[np.ndarray]:
-        processed = []
-        
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        processed.append(binary)
-        
-        kernel = np.ones((2,2), np.uint8)
-        morphed = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        processed.append(morphed)
-        
-        enhanced = cv2.convertScaleAbs(gray, alpha=2.0, beta=0)
-        processed.append(enhanced)
-        
-        return processed
+    def _enhanced_3_0(gray: np.ndarray, cache: Dict[str, np.ndarray]) -> np.ndarray:
+        if 'enhanced_3_0' not in cache:
+            cache['enhanced_3_0'] = cv2.convertScaleAbs(gray, alpha=3.0, beta=0)
+        return cache['enhanced_3_0']
     
     @staticmethod
-    def _process_tournament_regions(gray: np.ndarray) -> List[np.ndarray]:
-        processed = []
-        
-        enhanced = cv2.convertScaleAbs(gray, alpha=1.8, beta=15)
-        processed.append(enhanced)
-        
-        denoised = cv2.medianBlur(gray, 3)
-        processed.append(denoised)
-        
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        processed.append(binary)
-        
-        return processed
+    def _enhanced_3_0_plus_10(gray: np.ndarray, cache: Dict[str, np.ndarray]) -> np.ndarray:
+        return cv2.convertScaleAbs(gray, alpha=3.0, beta=10)
     
     @staticmethod
-    def _process_default_regions(gray: np.ndarray) -> List[np.ndarray]:
-        processed = []
-        
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        processed.append(binary)
-        
-        inv_binary = cv2.bitwise_not(binary)
-        processed.append(inv_binary)
-        
-        contrast_enhanced = cv2.convertScaleAbs(gray, alpha=2.0, beta=0)
-        processed.append(contrast_enhanced)
-        
-        return processed
\ No newline at end of file
+    def _enhanced_1_8_plus_15(gray: np.ndarray, cache: Dict[str, np.ndarray]) -> np.ndarray:
+        return cv2.convertScaleAbs(gray, alpha=1.8, beta=15)
+    
+    @staticmethod
+    def _sharpened_3_0(gray: np.ndarray, cache: Dict[str, np.ndarray]) -> np.ndarray:
+        kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
+        return cv2.filter2D(ImageProcessor._enhanced_3_0(gray, cache), -1, kernel)
+    
+    @staticmethod
+    def _denoised(gray: np.ndarray, cache: Dict[str, np.ndarray]) -> np.ndarray:
+        return cv2.medianBlur(gray, 3)
+    
+    @staticmethod
+    def _denoised_2_0(gray: np.ndarray, cache: Dict[str, np.ndarray]) -> np.ndarray:
+        return cv2.medianBlur(ImageProcessor._enhanced_2_0(gray, cache), 3)
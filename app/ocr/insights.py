@@ -0,0 +1,88 @@
+"""
+Game-level insights derived from per-region extraction results
+"""
+
+from typing import Any, Dict, Optional
+
+from .parsing import ParsedText, parse_text
+
+
+def parsed_region(extracted_data: Dict[str, Any], region_key: str) -> Optional[ParsedText]:
+    region_result = extracted_data.get(region_key)
+    if not region_result or not region_result['success']:
+        return None
+    return parse_text(region_result['text'], region_result['type'])
+
+
+def build_poker_insights(extracted_data: Dict[str, Any]) -> Dict[str, Any]:
+    insights = {
+        'game_state': {},
+        'player_info': {},
+        'pot_analysis': {},
+        'tournament_info': {}
+    }
+
+    try:
+        total_pot = parsed_region(extracted_data, 'total_pot')
+        if total_pot and total_pot.amount:
+            insights['pot_analysis']['total_pot_bb'] = total_pot.amount
+
+        current_pot = parsed_region(extracted_data, 'current_pot')
+        if current_pot and current_pot.amount:
+            insights['pot_analysis']['current_pot_bb'] = current_pot.amount
+
+        hero_stack = parsed_region(extracted_data, 'hero_stack')
+        if hero_stack and hero_stack.amount:
+            insights['player_info']['hero_stack_bb'] = hero_stack.amount
+
+        if 'hero_name' in extracted_data and extracted_data['hero_name']['success']:
+            insights['player_info']['hero_name'] = extracted_data['hero_name']['text']
+
+        if 'hero_cards' in extracted_data and extracted_data['hero_cards']['success']:
+            insights['player_info']['hero_cards'] = extracted_data['hero_cards']['text']
+
+        active_players = []
+        for key, data in extracted_data.items():
+            if key.startswith('seat_') and not key.endswith('_stack') and not key.endswith('_bet'):
+                if data['success']:
+                    player_name = data['text']
+                    stack = parsed_region(extracted_data, f"{key}_stack")
+
+                    active_players.append({
+                        'seat': key,
+                        'name': player_name,
+                        'stack_bb': stack.amount if stack else None
+                    })
+
+        insights['player_info']['active_players'] = active_players
+        insights['player_info']['player_count'] = len(active_players)
+
+        hand_history = parsed_region(extracted_data, 'hand_history')
+        if hand_history and hand_history.hand_ids:
+            insights['game_state']['current_hand_id'] = hand_history.hand_ids[0]
+            if len(hand_history.hand_ids) > 1:
+                insights['game_state']['previous_hand_id'] = hand_history.hand_ids[1]
+
+        blinds_info = parsed_region(extracted_data, 'blinds_info')
+        if blinds_info and blinds_info.blinds:
+            insights['game_state']['small_blind'], insights['game_state']['big_blind'] = blinds_info.blinds
+        if blinds_info and blinds_info.ante is not None:
+            insights['game_state']['ante'] = blinds_info.ante
+
+        if 'position_stats' in extracted_data and extracted_data['position_stats']['success']:
+            position_text = extracted_data['position_stats']['text']
+            insights['tournament_info']['position_text'] = position_text
+
+            position_stats = parsed_region(extracted_data, 'position_stats')
+            if position_stats.position:
+                insights['tournament_info']['position'], insights['tournament_info']['players_left'] = position_stats.position
+            insights['tournament_info'].update(position_stats.details)
+
+        tournament_header = parsed_region(extracted_data, 'tournament_header')
+        if tournament_header:
+            insights['tournament_info'].update(tournament_header.details)
+
+    except Exception as e:
+        insights['extraction_error'] = str(e)
+
+    return insights
@@ -0,0 +1,110 @@
+"""
+Mosaic batching of region crops into one Tesseract call
+
+Regions that share a Tesseract config (e.g. every ``*_stack``/``*_bet``
+region using ``currency_precise``) are normalised to dark-on-light text at a
+common line height, stacked into one tall image with blank separator bands,
+and read with a single ``image_to_data`` call in block mode. Words are
+assigned back to regions by the vertical band their box centre falls in, and
+each region's confidence is the mean of its words' confidences.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import pytesseract
+
+from .config import OCRConfig
+
+_PSM = re.compile(r'--psm\s+\d+')
+
+
+def normalize_crop(gray: np.ndarray, line_height: int) -> np.ndarray:
+    """Dark text on a light background, scaled to ``line_height`` pixels tall."""
+    if gray.size == 0:
+        return np.full((line_height, line_height), 255, dtype=np.uint8)
+    if gray.mean() < 128:
+        gray = 255 - gray
+    scale = line_height / gray.shape[0]
+    width = max(1, int(round(gray.shape[1] * scale)))
+    interpolation = cv2.INTER_CUBIC if scale > 1 else cv2.INTER_AREA
+    return cv2.resize(gray, (width, line_height), interpolation=interpolation)
+
+
+def build_mosaic(crops: List[np.ndarray], line_height: int, separator: int,
+                 margin: int) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+    """Stack normalised crops vertically; returns the mosaic and each crop's (top, bottom) band."""
+    lines = [normalize_crop(crop, line_height) for crop in crops]
+    width = max(line.shape[1] for line in lines) + 2 * margin
+    height = len(lines) * line_height + (len(lines) - 1) * separator + 2 * margin
+
+    mosaic = np.full((height, width), 255, dtype=np.uint8)
+    bands = []
+    top = margin
+    for line in lines:
+        mosaic[top:top + line_height, margin:margin + line.shape[1]] = line
+        bands.append((top, top + line_height))
+        top += line_height + separator
+    return mosaic, bands
+
+
+def block_config(config: str) -> str:
+    """The region's config with page segmentation switched to a uniform block of text."""
+    if _PSM.search(config):
+        return _PSM.sub('--psm 6', config)
+    return f"--psm 6 {config}"
+
+
+def split_words(data: Dict[str, List[Any]], bands: List[Tuple[int, int]],
+                separator: int) -> List[Tuple[str, float]]:
+    """Assign ``image_to_data`` words to bands; returns (text, mean confidence) per band."""
+    words = [[] for _ in bands]
+    slack = separator / 2
+    for text, conf, top, height, block, line, left in zip(
+            data['text'], data['conf'], data['top'], data['height'],
+            data['block_num'], data['line_num'], data['left']):
+        text = str(text).strip()
+        if not text:
+            continue
+        centre = top + height / 2
+        for index, (band_top, band_bottom) in enumerate(bands):
+            if band_top - slack <= centre < band_bottom + slack:
+                words[index].append((block, line, left, text, float(conf)))
+                break
+
+    results = []
+    for band_words in words:
+        band_words.sort()
+        confidences = [conf for *_, conf in band_words if conf > 0]
+        results.append((
+            ' '.join(text for _, _, _, text, _ in band_words),
+            sum(confidences) / len(confidences) if confidences else 0.0
+        ))
+    return results
+
+
+class MosaicReader:
+    def __init__(self, config_keys: Optional[List[str]] = None, line_height: Optional[int] = None,
+                 separator: Optional[int] = None, margin: int = 10):
+        self.config_keys = config_keys if config_keys is not None else OCRConfig.MOSAIC_CONFIG_KEYS
+        self.line_height = line_height or OCRConfig.MOSAIC_LINE_HEIGHT
+        self.separator = separator or OCRConfig.MOSAIC_SEPARATOR
+        self.margin = margin
+
+    def groups(self, regions: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+        """Region keys per mosaic-eligible Tesseract config; groups of one are not worth batching."""
+        groups = {}
+        for region_key, region_data in regions.items():
+            config_key = OCRConfig.get_config_key_for_region(region_data['type'])
+            if config_key in self.config_keys:
+                groups.setdefault(config_key, []).append(region_key)
+        return {config_key: keys for config_key, keys in groups.items() if len(keys) > 1}
+
+    def read(self, crops: List[np.ndarray], config_key: str) -> List[Tuple[str, float]]:
+        """Raw (uncleaned) text and confidence per crop from one Tesseract call."""
+        mosaic, bands = build_mosaic(crops, self.line_height, self.separator, self.margin)
+        config = block_config(OCRConfig.TESSERACT_CONFIGS[config_key])
+        data = pytesseract.image_to_data(mosaic, config=config, output_type=pytesseract.Output.DICT)
+        return split_words(data, bands, self.separator)
@@ -0,0 +1,208 @@
+"""
+Multi-table analysis of tiled captures
+
+Finds every table window in a large capture by matching a fixed UI anchor
+(a small patch cut from a single-table reference screenshot), shifts the
+template to each table's offset and reads all tables' regions in a single
+scheduler pass over one shared grayscale frame. Each table gets its own
+analysis results.
+
+The anchor is stored next to the template and referenced from it:
+    "anchor": {"x": 12, "y": 8, "width": 120, "height": 28, "image": "yaya_6p_anchor.png"}
+
+Usage (from the app directory):
+    python -m ocr.multi_table anchor templates/yaya_6p_template.json reference.png --box 12,8,120,28
+    python -m ocr.multi_table analyze capture.png templates/yaya_6p_template.json
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .analysis_engine import PokerAnalysisEngine
+from .image_processor import ImageProcessor
+
+
+def offset_template(template: Dict[str, Any], dx: int, dy: int) -> Dict[str, Any]:
+    regions = {}
+    for region_key, region_data in template.get('regions', {}).items():
+        coordinates = dict(region_data['coordinates'])
+        coordinates['x'] += dx
+        coordinates['y'] += dy
+        regions[region_key] = dict(region_data, coordinates=coordinates)
+    return dict(template, regions=regions)
+
+
+def load_anchor_patch(template: Dict[str, Any], templates_dir: str = "templates") -> Optional[np.ndarray]:
+    """The template's grayscale anchor patch, or None if it has none."""
+    anchor = template.get('anchor')
+    if not anchor or not anchor.get('image'):
+        return None
+    anchor_path = anchor['image']
+    if not os.path.isabs(anchor_path):
+        anchor_path = os.path.join(templates_dir, anchor_path)
+    return np.array(Image.open(anchor_path).convert('L'))
+
+
+class TableLocator:
+    """Locates table origins by normalised cross-correlation against the anchor patch."""
+
+    def __init__(self, anchor: np.ndarray, anchor_x: int, anchor_y: int,
+                 table_size: Optional[Dict[str, int]] = None, threshold: float = 0.8, max_tables: int = 12):
+        self.anchor = ImageProcessor.to_gray(anchor)
+        self.anchor_x = anchor_x
+        self.anchor_y = anchor_y
+        self.table_size = table_size
+        self.threshold = threshold
+        self.max_tables = max_tables
+
+    @classmethod
+    def from_template(cls, template: Dict[str, Any], templates_dir: str = "templates", **kwargs) -> 'TableLocator':
+        anchor = template.get('anchor')
+        if not anchor or not anchor.get('image'):
+            raise ValueError(f"Template for {template.get('site', 'unknown')} has no anchor; "
+                             f"create one with 'python -m ocr.multi_table anchor'")
+        return cls(load_anchor_patch(template, templates_dir), anchor['x'], anchor['y'],
+                   template.get('image_size'), **kwargs)
+
+    def locate(self, gray: np.ndarray) -> List[Dict[str, Any]]:
+        height, width = self.anchor.shape[:2]
+        if gray.shape[0] < height or gray.shape[1] < width:
+            return []
+
+        scores = cv2.matchTemplate(gray, self.anchor, cv2.TM_CCOEFF_NORMED)
+        tables = []
+        for _ in range(self.max_tables):
+            _, score, _, (match_x, match_y) = cv2.minMaxLoc(scores)
+            if score < self.threshold:
+                break
+            tables.append({'x': match_x - self.anchor_x, 'y': match_y - self.anchor_y, 'score': round(float(score), 4)})
+            # Non-maximum suppression: one anchor per neighbourhood
+            scores[max(0, match_y - height):match_y + height, max(0, match_x - width):match_x + width] = -1.0
+
+        row_height = (self.table_size or {}).get('height', height * 4) / 2
+        tables.sort(key=lambda table: (round(table['y'] / row_height), table['x']))
+        for index, table in enumerate(tables, 1):
+            table['index'] = index
+        return tables
+
+
+class MultiTableAnalyzer:
+    def __init__(self, engine: Optional[PokerAnalysisEngine] = None):
+        self.engine = engine or PokerAnalysisEngine()
+
+    def analyze(self, capture: Union[str, Image.Image, np.ndarray], template: Dict[str, Any],
+                locator: Optional[TableLocator] = None, image_name: Optional[str] = None,
+                deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Analyse every table found in ``capture``; returns one results dict per table."""
+        image_name = image_name or self.engine._image_name(capture)
+        locator = locator or TableLocator.from_template(template)
+
+        # Decode and convert once; every table and region slices views of this frame
+        gray = ImageProcessor.to_gray(np.asarray(self.engine._load_image(capture)))
+        tables = locator.locate(gray)
+        if not tables:
+            return []
+
+        combined_regions = {}
+        for table in tables:
+            for region_key, region_data in offset_template(template, table['x'], table['y'])['regions'].items():
+                combined_regions[f"table{table['index']}/{region_key}"] = dict(region_data, source_key=region_key)
+        combined = dict(template, regions=combined_regions)
+
+        start_time = time.perf_counter()
+        combined_results = self.engine.analyze_poker_image(gray, combined, image_name, deadline)
+        processing_time = time.perf_counter() - start_time
+        if 'error' in combined_results:
+            return [combined_results]
+
+        table_size = template.get('image_size') or {}
+        results = []
+        for table in tables:
+            prefix = f"table{table['index']}/"
+            analysis_results = self.engine._new_results(gray, template, f"{image_name}#table{table['index']}")
+            analysis_results['image_size'] = dict(table_size) or analysis_results['image_size']
+            analysis_results['table_frame'] = dict(table, **{key: table_size[key] for key in ('width', 'height')
+                                                               if key in table_size})
+            analysis_results['extracted_data'] = {
+                key[len(prefix):]: dict(region_result)
+                for key, region_result in combined_results['extracted_data'].items() if key.startswith(prefix)
+            }
+            if self.engine.consistency_checker:
+                # Cross-field checks need the per-table region keys, so they run per table here
+                extracted_data = analysis_results['extracted_data']
+                for region_key in self.engine.consistency_checker.regions_to_reread(extracted_data):
+                    extracted_data[region_key] = self.engine._reread_region(
+                        gray, prefix + region_key, combined_regions[prefix + region_key],
+                        self.engine._template_key(template), template.get('site')
+                    )
+            # The combined analysis already logged the candidates of every table
+            results.append(self.engine._finalize_results(analysis_results, processing_time, log_candidates=False))
+        return results
+
+
+def create_anchor(template_path: str, reference_path: str, box: List[int]) -> str:
+    """Cut the anchor patch from a single-table reference screenshot and record it in the template."""
+    x, y, width, height = box
+    with open(template_path, 'r') as f:
+        template = json.load(f)
+
+    stem = os.path.basename(template_path)
+    stem = stem[:-len('_template.json')] if stem.endswith('_template.json') else os.path.splitext(stem)[0]
+    anchor_name = f"{stem}_anchor.png"
+    Image.open(reference_path).convert('L').crop((x, y, x + width, y + height)).save(
+        os.path.join(os.path.dirname(template_path), anchor_name)
+    )
+
+    template['anchor'] = {'x': x, 'y': y, 'width': width, 'height': height, 'image': anchor_name}
+    with open(template_path, 'w') as f:
+        json.dump(template, f, indent=2)
+    return anchor_name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse captures containing several tables")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    anchor = subparsers.add_parser('anchor', help="Create the anchor patch for a template")
+    anchor.add_argument('template')
+    anchor.add_argument('reference', help="Screenshot of a single table matching the template")
+    anchor.add_argument('--box', required=True, help="x,y,width,height of a fixed UI element")
+
+    analyze = subparsers.add_parser('analyze', help="Analyse every table in a capture")
+    analyze.add_argument('capture')
+    analyze.add_argument('template')
+    analyze.add_argument('--threshold', type=float, default=0.8)
+    analyze.add_argument('--output', help="Write the per-table results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.command == 'anchor':
+        box = [int(value) for value in args.box.split(',')]
+        print(f"Saved anchor {create_anchor(args.template, args.reference, box)}")
+        return
+
+    with open(args.template, 'r') as f:
+        template = json.load(f)
+    locator = TableLocator.from_template(template, os.path.dirname(args.template), threshold=args.threshold)
+    results = MultiTableAnalyzer().analyze(args.capture, template, locator)
+
+    for analysis_results in results:
+        frame = analysis_results.get('table_frame', {})
+        summary = analysis_results.get('analysis_summary', {})
+        print(f"table {frame.get('index')} at ({frame.get('x')}, {frame.get('y')}) score {frame.get('score')}: "
+              f"{summary.get('successful_extractions', 0)}/{len(analysis_results.get('extracted_data', {}))} regions")
+    if not results:
+        print("No tables found")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Persistent player name lexicon with fuzzy lookup
+
+Names that were read with high confidence are remembered per site. Low
+confidence name reads can then be snapped to a known name: first through
+an OCR-confusion skeleton (I/l/1, O/0, S/5, ...) that maps near-misses
+such as ``BelezllAAa`` to ``BelezIIAAa`` with a dict lookup, then through a
+SymSpell-style deletion index verified by edit distance.
+
+Saving merges the names observed since the last save into the file (see
+ocr.stats_file), so engines in other threads or processes sharing the
+lexicon keep each other's names.
+
+Usage (from the app directory), to inspect the lexicon:
+    python -m ocr.name_lexicon [site] [name]
+"""
+
+import logging
+import sys
+import threading
+from array import array
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .config import OCRConfig
+from .stats_file import read_json, update_json
+
+logger = logging.getLogger(__name__)
+
+_CONFUSABLES = str.maketrans({
+    'I': 'l', '1': 'l', '|': 'l', 'i': 'l', 'L': 'l',
+    'O': 'o', '0': 'o', 'Q': 'o', 'D': 'o',
+    'S': 's', '5': 's', '$': 's',
+    'Z': 'z', '2': 'z',
+    'B': 'b', '8': 'b',
+    'G': 'g', '6': 'g'
+})
+
+
+def name_skeleton(name: str) -> str:
+    return name.translate(_CONFUSABLES).lower()
+
+
+def levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """Edit distance; stops early and returns ``max_distance + 1`` once it is exceeded."""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    if not b:
+        return len(a)
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            current.append(cost)
+            if cost < row_min:
+                row_min = cost
+        if max_distance is not None and row_min > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def deletes(word: str, distance: int = 1) -> set:
+    """``word`` and every string reachable from it by up to ``distance`` deletions."""
+    results = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results |= frontier
+    return results
+
+
+class DeletionIndex:
+    """
+    SymSpell-style candidate index. Each name is stored under the hashes of
+    itself and its single-character deletions, in a sorted int64 array with a
+    parallel array of name ids, so 300k names cost ~40 MB and a lookup is a
+    handful of binary searches. Names added since the last rebuild sit in a
+    small dict until ``rebuild_ratio`` of the index is pending.
+
+    Querying with up to two deletions of the query finds names within one
+    edit, plus names two insertions or an insertion and a substitution away;
+    candidates are then verified with ``levenshtein``.
+    """
+
+    def __init__(self, rebuild_ratio: float = 0.1, min_rebuild: int = 1024):
+        self.names = []
+        self.rebuild_ratio = rebuild_ratio
+        self.min_rebuild = min_rebuild
+        self._hashes = np.empty(0, dtype=np.int64)
+        self._ids = np.empty(0, dtype=np.int32)
+        self._indexed = 0
+        self._pending = {}
+
+    def add(self, name: str) -> int:
+        name_id = len(self.names)
+        self.names.append(name)
+        for key in deletes(name):
+            self._pending.setdefault(hash(key), []).append(name_id)
+        if len(self.names) - self._indexed >= max(self.min_rebuild, self._indexed * self.rebuild_ratio):
+            self.rebuild()
+        return name_id
+
+    def extend(self, names):
+        """Bulk add, indexing straight into the arrays without going through the pending dict."""
+        self.rebuild()
+        hashes, ids = array('q'), array('i')
+        for name in names:
+            name_id = len(self.names)
+            self.names.append(name)
+            for key in deletes(name):
+                hashes.append(hash(key))
+                ids.append(name_id)
+        self._merge(np.frombuffer(hashes, dtype=np.int64), np.frombuffer(ids, dtype=np.int32))
+
+    def rebuild(self):
+        hashes, ids = array('q'), array('i')
+        for key_hash, name_ids in self._pending.items():
+            for name_id in name_ids:
+                hashes.append(key_hash)
+                ids.append(name_id)
+        self._pending = {}
+        self._merge(np.frombuffer(hashes, dtype=np.int64), np.frombuffer(ids, dtype=np.int32))
+
+    def _merge(self, hashes: np.ndarray, ids: np.ndarray):
+        hashes = np.concatenate([self._hashes, hashes])
+        ids = np.concatenate([self._ids, ids])
+        order = np.argsort(hashes, kind='stable')
+        self._hashes, self._ids = hashes[order], ids[order]
+        self._indexed = len(self.names)
+
+    def candidates(self, word: str, distance: int) -> set:
+        keys = np.fromiter((hash(key) for key in deletes(word, min(distance, 2))), dtype=np.int64)
+        left = np.searchsorted(self._hashes, keys, side='left')
+        right = np.searchsorted(self._hashes, keys, side='right')
+        name_ids = set()
+        for key_hash, start, stop in zip(keys.tolist(), left.tolist(), right.tolist()):
+            if stop > start:
+                name_ids.update(self._ids[start:stop].tolist())
+            name_ids.update(self._pending.get(key_hash, ()))
+        return name_ids
+
+
+class NameLexicon:
+    def __init__(self, path: Optional[str] = None, max_distance: Optional[int] = None, save_every: int = 50,
+                 learn: bool = True):
+        self.path = path if path is not None else OCRConfig.NAME_LEXICON_PATH
+        self.max_distance = max_distance if max_distance is not None else OCRConfig.NAME_LEXICON_MAX_DISTANCE
+        self.save_every = save_every
+        # False freezes the lexicon as loaded: observations are ignored and nothing is saved
+        self.learn = learn
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._sites = {}
+        # Observations since the last save per site
+        self._pending = {}
+        self._load()
+
+    def _site(self, site: str) -> Dict:
+        if site not in self._sites:
+            self._sites[site] = {'counts': {}, 'skeletons': {}, 'index': DeletionIndex()}
+        return self._sites[site]
+
+    def _add(self, site: str, name: str, count: int = 1):
+        entry = self._site(site)
+        if name not in entry['counts']:
+            entry['index'].add(name)
+            entry['skeletons'].setdefault(name_skeleton(name), []).append(name)
+        entry['counts'][name] = entry['counts'].get(name, 0) + count
+
+    def observe(self, site: str, name: str):
+        if not self.learn or not name or len(name) < 2:
+            return
+        with self._lock:
+            self._add(site, name)
+            pending = self._pending.setdefault(site, {})
+            pending[name] = pending.get(name, 0) + 1
+            self._unsaved += 1
+            should_save = self.save_every and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def lookup(self, site: str, name: str, max_distance: Optional[int] = None) -> Optional[Tuple[str, int]]:
+        """Return ``(known_name, distance)`` for the closest known name within ``max_distance``."""
+        if not name:
+            return None
+        max_distance = self.max_distance if max_distance is None else max_distance
+
+        with self._lock:
+            entry = self._sites.get(site)
+            if not entry:
+                return None
+            counts = entry['counts']
+            if name in counts:
+                return name, 0
+
+            candidates = entry['skeletons'].get(name_skeleton(name))
+            if candidates:
+                best = max(candidates, key=lambda candidate: counts[candidate])
+                distance = levenshtein(name, best, max_distance)
+                if distance <= max_distance:
+                    return best, distance
+
+            index = entry['index']
+            best, best_key = None, None
+            for name_id in index.candidates(name, max_distance):
+                candidate = index.names[name_id]
+                distance = levenshtein(name, candidate, max_distance)
+                if distance > max_distance:
+                    continue
+                key = (distance, -counts[candidate])
+                if best_key is None or key < best_key:
+                    best, best_key = candidate, key
+            return (best, best_key[0]) if best is not None else None
+
+    def names(self, site: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._sites.get(site, {}).get('counts', {}))
+
+    def save(self):
+        if not self.path or not self.learn:
+            return
+        with self._lock:
+            try:
+                payload = update_json(self.path, self._merge)
+            except OSError as e:
+                # Keep the observations for the next save rather than failing the read that triggered it
+                logger.warning("Could not save name lexicon to %s: %s", self.path, e)
+                return
+            # Pick up the names other processes saved meanwhile
+            for site, counts in payload['sites'].items():
+                entry = self._site(site)
+                for name, count in counts.items():
+                    if name in entry['counts']:
+                        entry['counts'][name] = count
+                    else:
+                        self._add(site, name, count)
+            self._pending = {}
+            self._unsaved = 0
+
+    def _merge(self, payload: Dict) -> Dict:
+        sites = payload.get('sites', {})
+        for site, pending in self._pending.items():
+            counts = sites.setdefault(site, {})
+            for name, count in pending.items():
+                counts[name] = counts.get(name, 0) + count
+        return {'updated': datetime.now().isoformat(), 'sites': sites}
+
+    def _load(self):
+        if not self.path:
+            return
+        for site, counts in read_json(self.path).get('sites', {}).items():
+            entry = self._site(site)
+            entry['counts'].update(counts)
+            entry['index'].extend(counts)
+            for name in counts:
+                entry['skeletons'].setdefault(name_skeleton(name), []).append(name)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    lexicon = NameLexicon()
+    if not argv:
+        for site, entry in lexicon._sites.items():
+            print(f"{site}: {len(entry['counts'])} names")
+        return
+
+    site = argv[0]
+    if len(argv) > 1:
+        match = lexicon.lookup(site, argv[1])
+        print(f"{argv[1]} -> {match[0]} (distance {match[1]})" if match else f"{argv[1]}: no match")
+        return
+
+    for name, count in sorted(lexicon.names(site).items(), key=lambda item: item[1], reverse=True):
+        print(f"{count:6d}  {name}")
+
+
+if __name__ == "__main__":
+    main()
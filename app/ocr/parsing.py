@@ -0,0 +1,128 @@
+"""
+Structured parsing of cleaned region text into typed values
+"""
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+# Leading-dot amounts (".5 BB") count; digits after a decimal part start a new number
+_NUMBER = re.compile(r'(?<!\d)(\$)?\s?(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+)')
+_DIGIT_RUN = re.compile(r'\d+')
+_BLINDS = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*/\s*(\d[\d,]*(?:\.\d+)?)')
+_ANTE = re.compile(r'Ante\s*:?\s*(\d[\d,]*(?:\.\d+)?)', re.IGNORECASE)
+_POSITION = re.compile(r'(\d+)\s+of\s+(\d+)', re.IGNORECASE)
+_AVG_STACK = re.compile(r'Avg\s*Stack\s*:?\s*(\d[\d,]*(?:\.\d+)?)', re.IGNORECASE)
+_PRIZE_POOL = re.compile(r'Prize\s*Pool\s*:?\s*\$?\s?(\d[\d,]*(?:\.\d+)?)', re.IGNORECASE)
+_FIRST_PLACE = re.compile(r'1st\s*Place\s*:?\s*\$?\s?(\d[\d,]*(?:\.\d+)?)', re.IGNORECASE)
+_GUARANTEE = re.compile(r'\$\s?(\d[\d,]*(?:\.\d+)?)\s*GTD', re.IGNORECASE)
+_TABLE = re.compile(r'Table\s*(\d+)', re.IGNORECASE)
+_HAND_ID = re.compile(r'\d{6,}')
+
+AMOUNT_REGION_TYPES = ('total_pot', 'current_pot', 'hero_stack')
+
+
+def _to_float(token: str) -> float:
+    return float(token.replace(',', ''))
+
+
+@dataclass(frozen=True)
+class ParsedText:
+    region_type: str
+    numbers: Tuple[float, ...] = ()
+    digit_runs: Tuple[str, ...] = ()
+    amount: Optional[float] = None
+    unit: Optional[str] = None
+    blinds: Optional[Tuple[float, float]] = None
+    ante: Optional[float] = None
+    position: Optional[Tuple[int, int]] = None
+    hand_ids: Tuple[int, ...] = ()
+    details: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def has_number(self) -> bool:
+        return bool(self.numbers)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Non-empty fields only, with tuples as lists so results stay YAML/JSON friendly."""
+        record = {}
+        for key in ('amount', 'unit', 'blinds', 'ante', 'position', 'hand_ids', 'details'):
+            value = getattr(self, key)
+            if value is None or value == () or value == {}:
+                continue
+            if isinstance(value, tuple):
+                value = list(value)
+            elif isinstance(value, dict):
+                value = dict(value)
+            record[key] = value
+        return record
+
+
+def is_amount_region(region_type: str) -> bool:
+    return region_type in AMOUNT_REGION_TYPES or region_type.endswith(('_stack', '_bet'))
+
+
+def is_name_region(region_type: str) -> bool:
+    if region_type == 'hero_name' or region_type.endswith('_name'):
+        return True
+    return region_type.startswith('seat_') and not region_type.endswith(('_stack', '_bet'))
+
+
+@lru_cache(maxsize=8192)
+def parse_text(text: str, region_type: str) -> ParsedText:
+    """Parse cleaned region text once; results are cached and shared by validation, scoring and insights."""
+    matches = _NUMBER.findall(text or '')
+    numbers = tuple(_to_float(number) for _, number in matches)
+    digit_runs = tuple(_DIGIT_RUN.findall(text or ''))
+
+    values = {'numbers': numbers, 'digit_runs': digit_runs}
+
+    if is_amount_region(region_type) and numbers:
+        values['amount'] = numbers[0]
+        if 'BB' in text:
+            values['unit'] = 'BB'
+        elif matches[0][0] == '$':
+            values['unit'] = '$'
+        else:
+            values['unit'] = 'chips'
+
+    elif region_type == 'hand_history':
+        values['hand_ids'] = tuple(int(run) for run in _HAND_ID.findall(text))
+
+    elif region_type == 'blinds_info':
+        blinds = _BLINDS.search(text)
+        if blinds:
+            values['blinds'] = (_to_float(blinds.group(1)), _to_float(blinds.group(2)))
+        ante = _ANTE.search(text)
+        if ante:
+            values['ante'] = _to_float(ante.group(1))
+
+    elif region_type == 'position_stats':
+        position = _POSITION.search(text)
+        if position:
+            values['position'] = (int(position.group(1)), int(position.group(2)))
+        details = {}
+        for key, pattern in (('avg_stack_bb', _AVG_STACK), ('prize_pool', _PRIZE_POOL),
+                             ('first_place', _FIRST_PLACE)):
+            match = pattern.search(text)
+            if match:
+                details[key] = _to_float(match.group(1))
+        values['details'] = details
+
+    elif region_type == 'tournament_header':
+        details = {}
+        if matches and matches[0][0] == '$':
+            details['buy_in'] = numbers[0]
+        guarantee = _GUARANTEE.search(text)
+        if guarantee:
+            details['guarantee'] = _to_float(guarantee.group(1))
+        table = _TABLE.search(text)
+        if table:
+            details['table'] = int(table.group(1))
+        values['details'] = details
+
+    elif numbers:
+        values['amount'] = numbers[0]
+
+    return ParsedText(region_type=region_type, **values)
@@ -0,0 +1,122 @@
+"""
+EasyOCR reader construction with alternative CPU recognition backends
+
+OCRConfig.EASYOCR_BACKEND selects how the recognizer network runs:
+
+    torch      stock EasyOCR fp32 PyTorch model
+    quantized  torch dynamic int8 quantization of the LSTM and Linear layers
+    onnx       recognizer exported once to ONNX and run with ONNX Runtime
+
+The exported ONNX model is cached under OCRConfig.EASYOCR_MODEL_CACHE, keyed
+by recognition model, EasyOCR version and language list. The quantized and
+onnx backends run on the CPU; torch uses a GPU when EasyOCR finds one.
+Detection is unchanged. If a backend cannot be set up, the stock recognizer
+is kept and a warning is logged.
+"""
+
+import gc
+import logging
+import os
+from typing import List, Optional
+
+import easyocr
+import numpy as np
+import torch
+
+from .config import OCRConfig
+
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    onnxruntime = None
+    ONNXRUNTIME_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('torch', 'quantized', 'onnx')
+
+
+def _cache_path(reader: easyocr.Reader, backend: str, languages: List[str], extension: str) -> str:
+    # A new EasyOCR release or recognition model must not reuse an export of the old weights
+    network = getattr(reader, 'recog_network', 'standard')
+    version = getattr(easyocr, '__version__', 'unknown')
+    os.makedirs(OCRConfig.EASYOCR_MODEL_CACHE, exist_ok=True)
+    return os.path.join(OCRConfig.EASYOCR_MODEL_CACHE,
+                        f"recognizer_{network}_easyocr{version}_{'_'.join(languages)}_{backend}.{extension}")
+
+
+def _unwrap(model: torch.nn.Module) -> torch.nn.Module:
+    return model.module if isinstance(model, torch.nn.DataParallel) else model
+
+
+class OnnxRecognizer(torch.nn.Module):
+    """Drop-in for the EasyOCR recognizer module; ``text`` is unused by CTC models, as in EasyOCR."""
+
+    def __init__(self, model_path: str, threads: Optional[int] = None):
+        super().__init__()
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def forward(self, image, text=None):
+        output = self.session.run(None, {self.input_name: image.detach().cpu().numpy().astype(np.float32)})[0]
+        return torch.from_numpy(output)
+
+
+def quantize_recognizer(reader: easyocr.Reader):
+    # Quantising from the fp32 weights takes well under a second, so nothing is cached
+    model = _unwrap(reader.recognizer).eval()
+    reader.recognizer = torch.quantization.quantize_dynamic(model, {torch.nn.LSTM, torch.nn.Linear},
+                                                            dtype=torch.qint8)
+    gc.collect()
+
+
+def onnx_recognizer(reader: easyocr.Reader, languages: List[str]):
+    if not ONNXRUNTIME_AVAILABLE:
+        raise RuntimeError("onnxruntime is not installed")
+
+    cache_path = _cache_path(reader, 'onnx', languages, 'onnx')
+    if not os.path.exists(cache_path):
+        model = _unwrap(reader.recognizer).eval()
+        # Recognizer input: (batch, 1, imgH, width); batch and width vary per call
+        dummy_image = torch.zeros(1, 1, reader.imgH, reader.imgH * 4)
+        dummy_text = torch.zeros(1, 1, dtype=torch.long)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(model, (dummy_image, dummy_text), temp_path, input_names=['image', 'text'],
+                              output_names=['preds'], dynamic_axes={'image': {0: 'batch', 3: 'width'},
+                                                                    'preds': {0: 'batch', 1: 'steps'}},
+                              opset_version=14)
+        os.replace(temp_path, cache_path)
+
+    reader.recognizer = OnnxRecognizer(cache_path, OCRConfig.EASYOCR_THREADS)
+    # Release the fp32 weights now that the session holds its own copy
+    gc.collect()
+
+
+def create_easyocr_reader(backend: Optional[str] = None, languages: Optional[List[str]] = None) -> easyocr.Reader:
+    backend = backend or OCRConfig.EASYOCR_BACKEND
+    languages = languages or ['en']
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown EasyOCR backend '{backend}'; expected one of {', '.join(BACKENDS)}")
+
+    if OCRConfig.EASYOCR_THREADS:
+        torch.set_num_threads(OCRConfig.EASYOCR_THREADS)
+
+    if backend == 'torch':
+        return easyocr.Reader(languages)
+
+    reader = easyocr.Reader(languages, gpu=False)
+
+    try:
+        if backend == 'quantized':
+            quantize_recognizer(reader)
+        else:
+            onnx_recognizer(reader, languages)
+    except Exception as e:
+        logger.warning("EasyOCR %s backend unavailable (%s); using the stock recognizer", backend, e)
+    return reader
@@ -0,0 +1,94 @@
+"""
+Region scheduling by latency class
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config.regions_definitions import get_regions_for_site
+
+from .config import OCRConfig
+
+
+class RegionScheduler:
+    """
+    Orders template regions so decision-critical fields are read first and
+    optionally reads them in parallel. With a deadline, regions that have
+    not finished in time are reported as pending instead of waited for.
+    """
+
+    def __init__(self, latency_classes: Optional[Dict[str, List[str]]] = None,
+                 max_workers: Optional[int] = None):
+        self.latency_classes = latency_classes or OCRConfig.REGION_LATENCY_CLASSES
+        self.class_order = list(self.latency_classes)
+        self.max_workers = max_workers or OCRConfig.SCHEDULER_MAX_WORKERS
+        self._executor = None
+
+    def latency_class(self, region_type: str) -> str:
+        return OCRConfig.get_latency_class(region_type, self.latency_classes)
+
+    def order(self, template: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        regions = template.get('regions', {})
+        priorities = self._template_priorities(template)
+
+        def sort_key(item):
+            region_key, region_data = item
+            latency_class = self.latency_class(region_data.get('type', region_key))
+            class_rank = self.class_order.index(latency_class) if latency_class in self.class_order else len(self.class_order)
+            return class_rank, priorities.get(region_data.get('source_key', region_key), 999)
+
+        return sorted(regions.items(), key=sort_key)
+
+    def run(self, template: Dict[str, Any], analyze_region: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+            deadline: Optional[float] = None) -> Iterator[Tuple[str, Dict[str, Any], bool]]:
+        """
+        Yield ``(region_key, result, completed)`` in completion order.
+        ``deadline`` is an absolute ``time.monotonic()`` value; regions not
+        done by then are yielded with ``completed=False`` and no result.
+        """
+        ordered = self.order(template)
+
+        if self.max_workers <= 1:
+            for index, (region_key, region_data) in enumerate(ordered):
+                if deadline is not None and time.monotonic() >= deadline:
+                    for pending_key, _ in ordered[index:]:
+                        yield pending_key, None, False
+                    return
+                yield region_key, analyze_region(region_key, region_data), True
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='region')
+
+        futures = {self._executor.submit(analyze_region, key, data): key for key, data in ordered}
+        remaining = set(futures)
+        try:
+            while remaining:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, remaining = wait(remaining, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    yield futures[future], future.result(), True
+        finally:
+            for future in remaining:
+                future.cancel()
+
+        pending_keys = {futures[future] for future in remaining}
+        for region_key, _ in ordered:
+            if region_key in pending_keys:
+                yield region_key, None, False
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @staticmethod
+    def _template_priorities(template: Dict[str, Any]) -> Dict[str, int]:
+        try:
+            definitions = get_regions_for_site(template.get('site'), template.get('player_count'))
+        except ValueError:
+            definitions = {}
+        return {key: data.get('priority', 999) for key, data in definitions.items()}
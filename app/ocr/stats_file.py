@@ -0,0 +1,73 @@
+"""
+Shared JSON statistics files
+
+The variant statistics, empty-region thresholds and name lexicon are kept
+in memory by every engine (threads, worker processes, the desktop app)
+and saved every few updates. A save holds an exclusive lock on
+``<path>.lock``, merges the updates made since the last save into what is
+on disk and writes the result through a uniquely named temporary file, so
+concurrent savers neither collide on the temporary file nor drop each
+other's updates.
+"""
+
+import contextlib
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: saves stay atomic, but concurrent processes may drop each other's updates
+    fcntl = None
+
+
+@contextlib.contextmanager
+def locked(path: str):
+    """Exclusive lock across processes for a read-merge-write of ``path``."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_json(path: str) -> Dict[str, Any]:
+    """Contents of ``path``, or an empty dict when it is missing or unreadable."""
+    try:
+        with open(path, 'r') as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def write_json(path: str, payload: Dict[str, Any], **dump_kwargs):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory or '.', prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(payload, f, **dump_kwargs)
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temp_path)
+        raise
+
+
+def update_json(path: str, merge: Callable[[Dict[str, Any]], Dict[str, Any]], **dump_kwargs) -> Dict[str, Any]:
+    """Replace ``path`` with ``merge(current contents)`` under the lock; returns what was written."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with locked(path):
+        payload = merge(read_json(path))
+        write_json(path, payload, **dump_kwargs)
+    return payload
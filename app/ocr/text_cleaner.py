@@ -1,138 +1,146 @@
 import re
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Callable, Dict, Any
+
+from .parsing import parse_text
+
+_WHITESPACE = re.compile(r'\s+')
+_TOTAL_POT_CHARS = re.compile(r'[^\d\.\sBB:Total]')
+_CURRENT_POT_CHARS = re.compile(r'[^\d\.\sBB:Pot]')
+_STACK_CHARS = re.compile(r'[^\d\.\sBB]')
+_HAND_NUMBER_CHARS = re.compile(r'[^\d:]')
+_CARD_CHARS = re.compile(r'[^\dAKQJT♠♥♦♣\s]')
+_NAME_CHARS = re.compile(r'[^\w\s]')
+_PLAYER_NAME = re.compile(r'^[a-zA-Z0-9_]+$')
+
+
+class MultiReplacer:
+    """Applies a dict of literal fixes in one regex pass, longest match first."""
+    
+    def __init__(self, replacements: Dict[str, str]):
+        self.replacements = replacements
+        keys = sorted(replacements, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(re.escape(key) for key in keys))
+        
+    def __call__(self, text: str) -> str:
+        return self.pattern.sub(lambda match: self.replacements[match.group(0)], text)
+
 
 class TextCleaner:
     
+    TOURNAMENT_HEADER_FIXES = MultiReplacer({
+        'S215': '$215',
+        'S100': '$100',
+        'S125': '$125',
+        'Surday': 'Sunday',
+        'S1OO': '$100',
+        'S1O0': '$100',
+        '5215': '$215'
+    })
+    
+    BLINDS_INFO_FIXES = MultiReplacer({
+        'Arte': 'Ante',
+        '9,OOC': '9,000',
+        '9,O00': '9,000',
+        'O': '0'
+    })
+    
+    POSITION_STATS_FIXES = MultiReplacer({
+        'Paol': 'Pool',
+        'DDpvgstack': 'Avg Stack',
+        'S125': '$125',
+        'S25': '$25'
+    })
+    
     @staticmethod
     def clean_text(text: str, region_type: str) -> str:
-        text = text.strip()
-        text = re.sub(r'\s+', ' ', text)
-        
-        if region_type in ['total_pot']:
-            return TextCleaner._clean_total_pot(text)
-        elif region_type in ['current_pot']:
-            return TextCleaner._clean_current_pot(text)
-        elif region_type in ['hero_stack'] or '_stack' in region_type:
-            return TextCleaner._clean_stack_amount(text)
-        elif region_type == 'hand_history':
-            return TextCleaner._clean_hand_numbers(text)
-        elif region_type == 'hero_cards':
-            return TextCleaner._clean_card_text(text)
-        elif region_type == 'hero_name' or '_name' in region_type:
-            return TextCleaner._clean_player_name(text)
-        elif region_type in ['tournament_header']:
-            return TextCleaner._clean_tournament_header(text)
-        elif region_type in ['blinds_info']:
-            return TextCleaner._clean_blinds_info(text)
-        elif region_type in ['position_stats']:
-            return TextCleaner._clean_position_stats(text)
-        else:
-            return text.strip()
+        text = _WHITESPACE.sub(' ', text.strip())
+        return _resolve_cleaner(region_type)(text)
     
     @staticmethod
     def _clean_total_pot(text: str) -> str:
-        text = re.sub(r'[^\d\.\sBB:Total]', '', text)
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE.sub(' ', _TOTAL_POT_CHARS.sub('', text))
         if 'Total' in text and not text.startswith('Total'):
             text = 'Total:' + text.replace('Total', '').strip()
         return text.strip()
     
     @staticmethod
     def _clean_current_pot(text: str) -> str:
-        text = re.sub(r'[^\d\.\sBB:Pot]', '', text)
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE.sub(' ', _CURRENT_POT_CHARS.sub('', text))
         if 'Pot' in text and not text.startswith('Pot'):
             text = 'Pot ' + text.replace('Pot', '').strip()
         return text.strip()
     
     @staticmethod
     def _clean_stack_amount(text: str) -> str:
-        text = re.sub(r'[^\d\.\sBB]', '', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        return _WHITESPACE.sub(' ', _STACK_CHARS.sub('', text)).strip()
     
     @staticmethod
     def _clean_hand_numbers(text: str) -> str:
-        text = re.sub(r'[^\d:]', '', text)
-        return text.strip()
+        return _HAND_NUMBER_CHARS.sub('', text).strip()
     
     @staticmethod
     def _clean_card_text(text: str) -> str:
-        text = re.sub(r'[^\dAKQJT♠♥♦♣\s]', '', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        return _WHITESPACE.sub(' ', _CARD_CHARS.sub('', text)).strip()
     
     @staticmethod
     def _clean_player_name(text: str) -> str:
-        text = re.sub(r'[^\w\s]', '', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        return _WHITESPACE.sub(' ', _NAME_CHARS.sub('', text)).strip()
     
     @staticmethod
     def _clean_tournament_header(text: str) -> str:
-        text = re.sub(r'\s+', ' ', text)
-        common_fixes = {
-            'S215': '$215',
-            'S100': '$100',
-            'S125': '$125',
-            'Surday': 'Sunday',
-            'S1OO': '$100',
-            'S1O0': '$100',
-            '5215': '$215'
-        }
-        for wrong, correct in common_fixes.items():
-            text = text.replace(wrong, correct)
-        return text.strip()
+        return TextCleaner.TOURNAMENT_HEADER_FIXES(text).strip()
     
     @staticmethod
     def _clean_blinds_info(text: str) -> str:
-        text = re.sub(r'\s+', ' ', text)
-        common_fixes = {
-            'Arte': 'Ante',
-            '9,OOC': '9,000',
-            '9,O00': '9,000',
-            'O': '0'
-        }
-        for wrong, correct in common_fixes.items():
-            text = text.replace(wrong, correct)
-        return text.strip()
+        return TextCleaner.BLINDS_INFO_FIXES(text).strip()
     
     @staticmethod
     def _clean_position_stats(text: str) -> str:
-        text = re.sub(r'\s+', ' ', text)
-        common_fixes = {
-            'Paol': 'Pool',
-            'DDpvgstack': 'Avg Stack',
-            'S125': '$125',
-            'S25': '$25'
-        }
-        for wrong, correct in common_fixes.items():
-            text = text.replace(wrong, correct)
+        return TextCleaner.POSITION_STATS_FIXES(text).strip()
+    
+    @staticmethod
+    def _clean_default(text: str) -> str:
         return text.strip()
 
+
+@lru_cache(maxsize=None)
+def _resolve_cleaner(region_type: str) -> Callable[[str], str]:
+    if region_type in ['total_pot']:
+        return TextCleaner._clean_total_pot
+    elif region_type in ['current_pot']:
+        return TextCleaner._clean_current_pot
+    elif region_type in ['hero_stack'] or '_stack' in region_type:
+        return TextCleaner._clean_stack_amount
+    elif region_type == 'hand_history':
+        return TextCleaner._clean_hand_numbers
+    elif region_type == 'hero_cards':
+        return TextCleaner._clean_card_text
+    elif region_type == 'hero_name' or '_name' in region_type:
+        return TextCleaner._clean_player_name
+    elif region_type in ['tournament_header']:
+        return TextCleaner._clean_tournament_header
+    elif region_type in ['blinds_info']:
+        return TextCleaner._clean_blinds_info
+    elif region_type in ['position_stats']:
+        return TextCleaner._clean_position_stats
+    return TextCleaner._clean_default
+
+
 class TextValidator:
     
     @staticmethod
     def validate_extraction(text: str, region_type: str, confidence: float) -> Dict[str, Any]:
-        validation_result = {
+        validator = _resolve_validator(region_type)
+        if validator:
+            return validator(text, confidence)
+        
+        return {
             'is_valid': True,
             'confidence_adjusted': confidence,
             'issues': [],
             'suggestions': []
         }
-        
-        if region_type in ['total_pot']:
-            validation_result = TextValidator._validate_total_pot(text, confidence)
-        elif region_type in ['current_pot']:
-            validation_result = TextValidator._validate_current_pot(text, confidence)
-        elif region_type in ['hero_stack'] or '_stack' in region_type:
-            validation_result = TextValidator._validate_stack_amount(text, confidence)
-        elif region_type == 'hand_history':
-            validation_result = TextValidator._validate_hand_numbers(text, confidence)
-        elif region_type == 'hero_name' or '_name' in region_type:
-            validation_result = TextValidator._validate_player_name(text, confidence)
-        
-        return validation_result
     
     @staticmethod
     def _validate_total_pot(text: str, confidence: float) -> Dict[str, Any]:
@@ -146,7 +154,7 @@ class TextValidator:
             result['issues'].append("Missing 'BB' suffix")
             result['confidence_adjusted'] -= 15
         
-        numeric_part = re.findall(r'\d+\.?\d*', text)
+        numeric_part = parse_text(text, 'total_pot').numbers
         if not numeric_part:
             result['issues'].append("No numeric value found")
             result['confidence_adjusted'] -= 30
@@ -166,7 +174,7 @@ class TextValidator:
             result['issues'].append("Missing 'BB' suffix")
             result['confidence_adjusted'] -= 15
         
-        numeric_part = re.findall(r'\d+\.?\d*', text)
+        numeric_part = parse_text(text, 'current_pot').numbers
         if not numeric_part:
             result['issues'].append("No numeric value found")
             result['confidence_adjusted'] -= 30
@@ -182,13 +190,13 @@ class TextValidator:
             result['issues'].append("Missing 'BB' suffix")
             result['confidence_adjusted'] -= 15
         
-        numeric_part = re.findall(r'\d+\.?\d*', text)
+        numeric_part = parse_text(text, 'hero_stack').numbers
         if not numeric_part:
             result['issues'].append("No numeric value found")
             result['confidence_adjusted'] -= 30
             result['is_valid'] = False
         elif len(numeric_part) == 1:
-            value = float(numeric_part[0])
+            value = numeric_part[0]
             if value < 0.1:
                 result['issues'].append("Stack value too low")
                 result['confidence_adjusted'] -= 10
@@ -206,7 +214,7 @@ class TextValidator:
             result['issues'].append("Missing colon separator")
             result['confidence_adjusted'] -= 20
         
-        numbers = re.findall(r'\d+', text)
+        numbers = parse_text(text, 'hand_history').digit_runs
         if len(numbers) < 2:
             result['issues'].append("Should contain at least 2 hand numbers")
             result['confidence_adjusted'] -= 25
@@ -231,8 +239,23 @@ class TextValidator:
             result['issues'].append("Player name unusually long")
             result['confidence_adjusted'] -= 10
         
-        if not re.match(r'^[a-zA-Z0-9_]+$', text):
+        if not _PLAYER_NAME.match(text):
             result['issues'].append("Player name contains invalid characters")
             result['confidence_adjusted'] -= 15
         
-        return result
\ No newline at end of file
+        return result
+
+
+@lru_cache(maxsize=None)
+def _resolve_validator(region_type: str):
+    if region_type in ['total_pot']:
+        return TextValidator._validate_total_pot
+    elif region_type in ['current_pot']:
+        return TextValidator._validate_current_pot
+    elif region_type in ['hero_stack'] or '_stack' in region_type:
+        return TextValidator._validate_stack_amount
+    elif region_type == 'hand_history':
+        return TextValidator._validate_hand_numbers
+    elif region_type == 'hero_name' or '_name' in region_type:
+        return TextValidator._validate_player_name
+    return None
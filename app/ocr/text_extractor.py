@@ -1,67 +1,210 @@
 import pytesseract
-import easyocr
 import numpy as np
 from PIL import Image
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Union
 
 from .config import OCRConfig
 from .image_processor import ImageProcessor
 from .text_cleaner import TextCleaner, TextValidator
+from .parsing import parse_text
+from .variant_stats import VariantSelector, attempt_method
+from .mosaic import MosaicReader
+from .recognizers import create_easyocr_reader
 
 class OCREngine:
     def __init__(self):
-        self.easyocr_reader = easyocr.Reader(['en'])
+        self.easyocr_reader = create_easyocr_reader()
         self.config = OCRConfig()
 
 class TextExtractor:
-    def __init__(self):
-        self.ocr_engine = OCREngine()
+    ENGINES = ('tesseract', 'easyocr')
+    EFFORTS = ('cheap', 'default', 'full')
+    
+    def __init__(self, variant_profile: Optional[Dict[str, Any]] = None,
+                 variant_selector: Optional[VariantSelector] = None, load_readers: bool = True):
+        # Without readers only cleaning and selection work, e.g. to reprocess stored candidates
+        self.ocr_engine = OCREngine() if load_readers else None
         self.image_processor = ImageProcessor()
         self.text_cleaner = TextCleaner()
         self.text_validator = TextValidator()
+        self.variant_profile = variant_profile if variant_profile is not None else OCRConfig.load_variant_profile()
+        if variant_selector is None and OCRConfig.ADAPTIVE_SELECTION:
+            variant_selector = VariantSelector()
+        self.variant_selector = variant_selector
+        self.mosaic_reader = MosaicReader()
         
-    def extract_text_from_region(self, image: Image.Image, coordinates: Dict[str, int], region_type: str) -> Dict[str, Any]:
-        x, y, width, height = coordinates['x'], coordinates['y'], coordinates['width'], coordinates['height']
-        
-        region = image.crop((x, y, x + width, y + height))
-        region_np = np.array(region)
-        
-        processed_images = self.image_processor.preprocess_region(region_np, region_type)
+    def extract_text_from_region(self, image: Union[Image.Image, np.ndarray], coordinates: Dict[str, int],
+                                 region_type: str, template_key: Optional[str] = None,
+                                 effort: str = 'default') -> Dict[str, Any]:
+        return self.select(self.recognize(self.prepare(image, coordinates, region_type, template_key, effort)))
+    
+    # Extraction is split into prepare (crop, preprocess, plan attempts), recognize
+    # (run the OCR engines, raw text only) and select (clean, pick the winner) so
+    # a pipeline can run each step in its own stage; extract_text_from_region
+    # chains them. When the variant selector narrowed the attempts and they read
+    # nothing, recognize runs the remaining planned attempts as a fallback;
+    # deciding that needs the cleaned texts, so a pipeline passes fallback=False
+    # and calls needs_fallback and recognize_fallback from its later stages.
+    #
+    # effort picks the attempts: 'default' is the profiled plan narrowed by the
+    # variant selector, 'cheap' narrows it to CHEAP_TOP_K attempts and 'full'
+    # adds every variant with every engine and skips the narrowing.
+    
+    def prepare(self, image: Union[Image.Image, np.ndarray], coordinates: Dict[str, int],
+                region_type: str, template_key: Optional[str] = None, effort: str = 'default') -> Dict[str, Any]:
+        variant_count = self.image_processor.variant_count(region_type)
+        planned = self._plan_attempts(region_type, variant_count)
+        attempts = planned
+        if effort == 'full':
+            planned = attempts = self._full_attempts(planned, variant_count)
+        elif self.variant_selector:
+            top_k = OCRConfig.CHEAP_TOP_K if effort == 'cheap' else None
+            attempts = self.variant_selector.select(region_type, template_key, planned, top_k)
+        elif effort == 'cheap':
+            attempts = planned[:OCRConfig.CHEAP_TOP_K]
         
-        results = []
-        
-        for i, processed_img in enumerate(processed_images):
-            pil_img = Image.fromarray(processed_img)
-            
-            tesseract_result = self._extract_with_tesseract(pil_img, region_type)
-            if tesseract_result['confidence'] > 30:
-                results.append({
-                    'method': f'tesseract_v{i}',
-                    'text': tesseract_result['text'],
-                    'confidence': tesseract_result['confidence']
-                })
-            
-            easyocr_result = self._extract_with_easyocr(processed_img, region_type)
-            if easyocr_result['confidence'] > 0.3:
-                results.append({
-                    'method': f'easyocr_v{i}',
-                    'text': easyocr_result['text'],
-                    'confidence': easyocr_result['confidence'] * 100
-                })
+        # Build only the variants the planned attempts read; the fallback needs no others
+        region_np = self._crop(image, coordinates)
+        processed_images = self.image_processor.preprocess_region(
+            region_np, region_type, {attempt['variant'] for attempt in planned})
         
+        return {
+            'region_type': region_type,
+            'coordinates': coordinates,
+            'template_key': template_key,
+            'processed_images': processed_images,
+            'planned': planned,
+            'attempts': attempts
+        }
+    
+    def recognize(self, prepared: Dict[str, Any], fallback: bool = True) -> Dict[str, Any]:
+        prepared['results'] = self._run_attempts(prepared['processed_images'], prepared['region_type'],
+                                                 prepared['attempts'])
+        if fallback and self.needs_fallback(prepared):
+            self.recognize_fallback(prepared)
+        return prepared
+    
+    def needs_fallback(self, recognized: Dict[str, Any]) -> bool:
+        """True when a narrowed attempt set read nothing usable."""
+        if len(recognized['attempts']) >= len(recognized['planned']):
+            return False
+        # Deciding needs the cleaned texts; select reuses them
+        region_type = recognized['region_type']
+        return self._select_best_result(self.clean_results(recognized['results'], region_type), region_type) is None
+    
+    def recognize_fallback(self, recognized: Dict[str, Any]) -> Dict[str, Any]:
+        remaining = [attempt for attempt in recognized['planned'] if attempt not in recognized['attempts']]
+        recognized['results'].extend(self._run_attempts(recognized['processed_images'], recognized['region_type'],
+                                                        remaining))
+        recognized['attempts'] = recognized['planned']
+        return recognized
+    
+    def clean_results(self, results: List[Dict[str, Any]], region_type: str) -> List[Dict[str, Any]]:
+        """Add the cleaned ``text`` to raw OCR results that do not have it yet."""
+        for result in results:
+            if 'text' not in result:
+                result['text'] = self.text_cleaner.clean_text(result['raw_text'], region_type)
+        return results
+    
+    def select(self, recognized: Dict[str, Any]) -> Dict[str, Any]:
+        region_type = recognized['region_type']
+        results = self.clean_results(recognized['results'], region_type)
         best_result = self._select_best_result(results, region_type)
         
+        if self.variant_selector and best_result:
+            self.variant_selector.record(region_type, recognized['template_key'], best_result['method'],
+                                         [attempt_method(attempt) for attempt in recognized['attempts']])
+        
         return {
             'text': best_result['text'] if best_result else '',
             'confidence': best_result['confidence'] if best_result else 0,
             'method': best_result['method'] if best_result else 'none',
             'all_results': results,
             'region_type': region_type,
-            'coordinates': coordinates
+            'coordinates': recognized['coordinates']
         }
     
-    def _extract_with_tesseract(self, image: Image.Image, region_type: str) -> Dict[str, Any]:
-        config = self.ocr_engine.config.get_config_for_region(region_type)
+    def extract_mosaic(self, image: Union[Image.Image, np.ndarray],
+                       regions: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Read regions sharing a mosaic-eligible Tesseract config with one call per
+        config. Only reads that are confident and valid are returned; the caller
+        extracts the remaining regions one by one.
+        """
+        extractions = {}
+        for config_key, region_keys in self.mosaic_reader.groups(regions).items():
+            crops = [self.image_processor.to_gray(self._crop(image, regions[key]['coordinates'])) for key in region_keys]
+            try:
+                reads = self.mosaic_reader.read(crops, config_key)
+            except Exception:
+                continue
+            
+            for region_key, (raw_text, confidence) in zip(region_keys, reads):
+                region_type = regions[region_key]['type']
+                text = self.text_cleaner.clean_text(raw_text, region_type)
+                validation = self.text_validator.validate_extraction(text, region_type, confidence)
+                if not text or confidence < OCRConfig.MOSAIC_MIN_CONFIDENCE or not validation['is_valid']:
+                    continue
+                
+                result = {'method': 'tesseract_mosaic', 'text': text, 'raw_text': raw_text, 'confidence': confidence}
+                extractions[region_key] = dict(result, all_results=[result], region_type=region_type,
+                                               coordinates=regions[region_key]['coordinates'])
+        return extractions
+    
+    @staticmethod
+    def _crop(image: Union[Image.Image, np.ndarray], coordinates: Dict[str, int]) -> np.ndarray:
+        x, y, width, height = coordinates['x'], coordinates['y'], coordinates['width'], coordinates['height']
+        if isinstance(image, np.ndarray):
+            return image[max(y, 0):y + height, max(x, 0):x + width]
+        return np.array(image.crop((x, y, x + width, y + height)))
+    
+    def _plan_attempts(self, region_type: str, variant_count: int) -> List[Dict[str, Any]]:
+        category = self.image_processor.region_category(region_type)
+        profiled = self.variant_profile.get(category, {}).get('attempts')
+        if profiled:
+            return [attempt for attempt in profiled if attempt['variant'] < variant_count]
+        
+        return [
+            {'variant': i, 'engine': engine}
+            for i in range(variant_count)
+            for engine in self.ENGINES
+        ]
+    
+    def _full_attempts(self, planned: List[Dict[str, Any]], variant_count: int) -> List[Dict[str, Any]]:
+        attempts = [{'variant': i, 'engine': engine} for i in range(variant_count) for engine in self.ENGINES]
+        return attempts + [attempt for attempt in planned if attempt not in attempts]
+    
+    def _run_attempts(self, processed_images: List[np.ndarray], region_type: str,
+                      attempts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        results = []
+        for attempt in attempts:
+            result = self._run_attempt(processed_images[attempt['variant']], region_type, attempt)
+            if result:
+                results.append(result)
+        return results
+    
+    def _run_attempt(self, processed_img: np.ndarray, region_type: str, attempt: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if attempt['engine'] == 'tesseract':
+            config = OCRConfig.TESSERACT_CONFIGS.get(attempt.get('config'))
+            tesseract_result = self._extract_with_tesseract(Image.fromarray(processed_img), region_type, config)
+            if tesseract_result['confidence'] > 30:
+                return {
+                    'method': attempt_method(attempt),
+                    'raw_text': tesseract_result['raw_text'],
+                    'confidence': tesseract_result['confidence']
+                }
+        else:
+            easyocr_result = self._extract_with_easyocr(processed_img, region_type)
+            if easyocr_result['confidence'] > 0.3:
+                return {
+                    'method': attempt_method(attempt),
+                    'raw_text': easyocr_result['raw_text'],
+                    'confidence': easyocr_result['confidence'] * 100
+                }
+        return None
+    
+    def _extract_with_tesseract(self, image: Image.Image, region_type: str, config: Optional[str] = None) -> Dict[str, Any]:
+        config = config or self.ocr_engine.config.get_config_for_region(region_type)
         
         try:
             text = pytesseract.image_to_string(image, config=config).strip()
@@ -70,33 +213,29 @@ class TextExtractor:
             confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
             avg_confidence = sum(confidences) / len(confidences) if confidences else 0
             
-            cleaned_text = self.text_cleaner.clean_text(text, region_type)
-            
             return {
-                'text': cleaned_text,
+                'raw_text': text,
                 'confidence': avg_confidence
             }
         except Exception as e:
-            return {'text': '', 'confidence': 0}
+            return {'raw_text': '', 'confidence': 0}
     
     def _extract_with_easyocr(self, image: np.ndarray, region_type: str) -> Dict[str, Any]:
         try:
             results = self.ocr_engine.easyocr_reader.readtext(image)
             
             if not results:
-                return {'text': '', 'confidence': 0}
+                return {'raw_text': '', 'confidence': 0}
             
             combined_text = ' '.join([result[1] for result in results])
             avg_confidence = sum([result[2] for result in results]) / len(results)
             
-            cleaned_text = self.text_cleaner.clean_text(combined_text, region_type)
-            
             return {
-                'text': cleaned_text,
+                'raw_text': combined_text,
                 'confidence': avg_confidence
             }
         except Exception as e:
-            return {'text': '', 'confidence': 0}
+            return {'raw_text': '', 'confidence': 0}
     
     def _select_best_result(self, results: List[Dict], region_type: str) -> Dict[str, Any]:
         if not results:
@@ -120,18 +259,19 @@ class TextExtractor:
         
         validation = self.text_validator.validate_extraction(text, region_type, base_score)
         adjusted_confidence = validation['confidence_adjusted']
+        parsed = parse_text(text, region_type)
         
         if region_type in ['total_pot']:
-            if 'Total' in text and 'BB' in text and any(char.isdigit() for char in text):
+            if 'Total' in text and 'BB' in text and parsed.has_number:
                 adjusted_confidence += 40
         elif region_type in ['current_pot']:
-            if 'Pot' in text and 'BB' in text and any(char.isdigit() for char in text):
+            if 'Pot' in text and 'BB' in text and parsed.has_number:
                 adjusted_confidence += 40
         elif region_type in ['hero_stack'] or '_stack' in region_type:
-            if 'BB' in text and any(char.isdigit() for char in text) and '.' in text:
+            if 'BB' in text and parsed.has_number and '.' in text:
                 adjusted_confidence += 30
         elif region_type == 'hand_history':
-            if ':' in text and len([c for c in text if c.isdigit()]) >= 8:
+            if ':' in text and sum(len(run) for run in parsed.digit_runs) >= 8:
                 adjusted_confidence += 35
         elif region_type == 'hero_cards':
             if any(suit in text for suit in ['♠', '♥', '♦', '♣']):
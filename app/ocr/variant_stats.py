@@ -0,0 +1,162 @@
+"""
+Online statistics of which OCR attempt wins per region type
+
+Usage (from the app directory), to inspect the persisted statistics:
+    python -m ocr.variant_stats [path]
+"""
+
+import logging
+import random
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .config import OCRConfig
+from .stats_file import read_json, update_json
+
+logger = logging.getLogger(__name__)
+
+
+def attempt_method(attempt: Dict[str, Any]) -> str:
+    """Method name of an attempt's results, e.g. ``tesseract_v2`` or ``tesseract_v2_digits``."""
+    method = f"{attempt['engine']}_v{attempt['variant']}"
+    return f"{method}_{attempt['config']}" if attempt.get('config') else method
+
+
+class VariantSelector:
+    """
+    Tracks how often each attempt (see ``attempt_method``) wins
+    ``_select_best_result`` per (template, region type). After a warm-up it
+    narrows the attempts to the top-k winners, adding one other attempt
+    with probability ``explore_rate`` so a poor early choice can recover.
+    Scores decay so the ranking follows recent behaviour.
+
+    Saving merges the updates recorded since the last save into the file
+    (see ocr.stats_file), so selectors in other threads or processes that
+    share the file keep each other's counts.
+    """
+
+    def __init__(self, stats_path: Optional[str] = None, top_k: Optional[int] = None,
+                 warmup: Optional[int] = None, explore_rate: Optional[float] = None,
+                 decay: float = 0.995, save_every: int = 25, seed: Optional[int] = None):
+        self.stats_path = stats_path if stats_path is not None else OCRConfig.VARIANT_STATS_PATH
+        self.top_k = top_k or OCRConfig.ADAPTIVE_TOP_K
+        self.warmup = warmup if warmup is not None else OCRConfig.ADAPTIVE_WARMUP
+        self.explore_rate = explore_rate if explore_rate is not None else OCRConfig.ADAPTIVE_EXPLORE_RATE
+        self.decay = decay
+        self.save_every = save_every
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        # Updates since the last save: runs, decayed win scores and attempt counts per key
+        self._pending = {}
+        self.stats = self._load()
+
+    @staticmethod
+    def stats_key(region_type: str, template_key: Optional[str]) -> str:
+        return f"{template_key or 'any'}:{region_type}"
+
+    def select(self, region_type: str, template_key: Optional[str], attempts: List[Dict[str, Any]],
+               top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        top_k = top_k or self.top_k
+        with self._lock:
+            entry = self.stats.get(self.stats_key(region_type, template_key))
+            if not entry or entry['runs'] < self.warmup or len(attempts) <= top_k:
+                return attempts
+
+            scores = entry['wins']
+            ranked = sorted(attempts, key=lambda attempt: scores.get(attempt_method(attempt), 0.0), reverse=True)
+            selected = ranked[:top_k]
+            others = ranked[top_k:]
+            if others and self._rng.random() < self.explore_rate:
+                selected.append(self._rng.choice(others))
+            return selected
+
+    def record(self, region_type: str, template_key: Optional[str], winner: str, attempted: List[str]):
+        with self._lock:
+            entry = self.stats.setdefault(self.stats_key(region_type, template_key), {
+                'runs': 0, 'wins': {}, 'attempts': {}
+            })
+            pending = self._pending.setdefault(self.stats_key(region_type, template_key), {
+                'runs': 0, 'wins': {}, 'attempts': {}
+            })
+            for counts in (entry, pending):
+                counts['runs'] += 1
+                for method in counts['wins']:
+                    counts['wins'][method] *= self.decay
+                counts['wins'][winner] = counts['wins'].get(winner, 0.0) + 1.0
+                for method in attempted:
+                    counts['attempts'][method] = counts['attempts'].get(method, 0) + 1
+
+            self._unsaved += 1
+            should_save = self.save_every and self._unsaved >= self.save_every
+
+        if should_save:
+            self.save()
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            summary = {}
+            for key, entry in sorted(self.stats.items()):
+                ranked = sorted(entry['wins'].items(), key=lambda item: item[1], reverse=True)
+                summary[key] = {
+                    'runs': entry['runs'],
+                    'active': entry['runs'] >= self.warmup,
+                    'top': [method for method, _ in ranked[:self.top_k]],
+                    'wins': dict(ranked)
+                }
+            return summary
+
+    def save(self):
+        if not self.stats_path:
+            return
+        with self._lock:
+            try:
+                payload = update_json(self.stats_path, self._merge, indent=2)
+            except OSError as e:
+                # The statistics only steer attempt selection; keep the updates for the next save
+                logger.warning("Could not save variant statistics to %s: %s", self.stats_path, e)
+                return
+            self.stats = payload['stats']
+            self._pending = {}
+            self._unsaved = 0
+
+    def _merge(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        stats = payload.get('stats', {})
+        for key, pending in self._pending.items():
+            entry = stats.setdefault(key, {'runs': 0, 'wins': {}, 'attempts': {}})
+            entry['runs'] += pending['runs']
+            decay = self.decay ** pending['runs']
+            wins = {method: score * decay for method, score in entry['wins'].items()}
+            for method, score in pending['wins'].items():
+                wins[method] = wins.get(method, 0.0) + score
+            entry['wins'] = wins
+            for method, count in pending['attempts'].items():
+                entry['attempts'][method] = entry['attempts'].get(method, 0) + count
+        return {'updated': datetime.now().isoformat(), 'stats': stats}
+
+    def _load(self) -> Dict[str, Any]:
+        if not self.stats_path:
+            return {}
+        return read_json(self.stats_path).get('stats', {})
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    selector = VariantSelector(stats_path=argv[0] if argv else None)
+    summary = selector.summary()
+    if not summary:
+        print(f"No statistics recorded in {selector.stats_path}")
+        return
+
+    for key, entry in summary.items():
+        state = "narrowed" if entry['active'] else "warming up"
+        print(f"{key} ({entry['runs']} runs, {state})")
+        for method, score in entry['wins'].items():
+            marker = '*' if method in entry['top'] else ' '
+            print(f"  {marker} {method:<24} {score:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Batch analysis of saved screenshots
+
+Analyses a list of screenshots (files or directories) in capture order
+and writes one result per screenshot to the results store. With
+``--dedupe``, a screenshot showing the same table state as a recently
+analysed one gets a copy of that result with ``duplicate_of`` pointing at
+it; the engine does not run for it. ``--frame-gate`` skips unusable frames
+before OCR.
+
+Usage (from the app directory):
+    python -m service.batch captures/ --template yaya_6p --dedupe --frame-gate
+"""
+
+import argparse
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from .ingestion import IMAGE_EXTENSIONS
+from .metrics import MetricsRegistry
+from .results_store import ResultsStore
+from .templates import resolve_template
+
+try:
+    from ocr.analysis_engine import PokerAnalysisEngine
+    from ocr.frame_dedupe import FrameDeduper, duplicate_results
+    from ocr.frame_gate import FrameGate, open_frame
+    OCR_AVAILABLE = True
+except ImportError:
+    PokerAnalysisEngine = None
+    FrameDeduper = None
+    duplicate_results = None
+    FrameGate = None
+    open_frame = None
+    OCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def collect_images(paths: List[str]) -> List[str]:
+    """Image files under ``paths`` in modification-time order."""
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            images.extend(entry.path for entry in os.scandir(path)
+                          if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            images.append(path)
+    return sorted(images, key=os.path.getmtime)
+
+
+class BatchAnalyzer:
+    def __init__(self, template: Dict[str, Any], engine=None, frame_gate: Optional['FrameGate'] = None,
+                 deduper: Optional['FrameDeduper'] = None):
+        self.template = template
+        self.engine = engine or PokerAnalysisEngine()
+        self.frame_gate = frame_gate
+        self.deduper = deduper
+
+        self.metrics = MetricsRegistry(prefix='batch_')
+        self.frames_analyzed = self.metrics.counter('frames_analyzed_total', 'Frames run through the engine')
+        self.frames_duplicate = self.metrics.counter('frames_duplicate_total', 'Frames answered from the dedupe index')
+        self.frames_gated = self.metrics.counter('frames_gated_total', 'Frames skipped by the frame gate')
+        self.frames_failed = self.metrics.counter('frames_failed_total', 'Frames whose analysis failed')
+        self.analysis_time = self.metrics.histogram('analysis_seconds', 'Engine time per frame')
+
+    def analyze(self, path: str) -> Optional[Dict[str, Any]]:
+        """Results for one screenshot, or None if the frame gate skipped it."""
+        image_name = os.path.basename(path)
+        source = path
+        if self.frame_gate or self.deduper:
+            try:
+                source = open_frame(path)
+            except OSError as e:
+                self.frames_failed.inc()
+                return {'error': f"Analysis failed: {e}", 'image_file': image_name}
+
+        if self.frame_gate:
+            verdict = self.frame_gate.check(source)
+            if not verdict['accepted']:
+                self.frames_gated.inc()
+                logger.info("%s: %s by frame gate (%s)", image_name, verdict['action'], verdict['reason'])
+                return None
+
+        signature = None
+        if self.deduper:
+            signature = self.deduper.signature(source)
+            match = self.deduper.lookup(signature)
+            if match:
+                self.frames_duplicate.inc()
+                return duplicate_results(match[0], image_name, match[1])
+
+        started = time.perf_counter()
+        analysis_results = self.engine.analyze_poker_image(source, self.template, image_name=image_name)
+        self.analysis_time.observe(time.perf_counter() - started)
+        if 'error' in analysis_results:
+            self.frames_failed.inc()
+            return analysis_results
+
+        self.frames_analyzed.inc()
+        if signature is not None:
+            self.deduper.add(signature, analysis_results)
+        return analysis_results
+
+    def run(self, paths: List[str]) -> Iterator[Dict[str, Any]]:
+        for path in paths:
+            analysis_results = self.analyze(path)
+            if analysis_results is None:
+                continue
+            analysis_results['timestamp'] = datetime.now().isoformat()
+            analysis_results['source_path'] = os.path.abspath(path)
+            yield analysis_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse saved screenshots in bulk")
+    parser.add_argument('paths', nargs='+', help="Screenshot files or directories")
+    parser.add_argument('--template', required=True, help="Template name (e.g. yaya_6p) or path to a template JSON")
+    parser.add_argument('--templates-dir', default='templates')
+    parser.add_argument('--results-dir', default='results')
+    parser.add_argument('--dedupe', action='store_true',
+                        help="Reuse the result of an identical recent screenshot instead of running OCR")
+    parser.add_argument('--frame-gate', action='store_true',
+                        help="Skip blurred, obstructed or mis-sized screenshots before OCR")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not OCR_AVAILABLE:
+        raise SystemExit("OCR engine not available - install dependencies: pytesseract, easyocr, opencv-python")
+
+    template = resolve_template(args.template, args.templates_dir)
+    templates_dir = os.path.dirname(args.template) if os.path.isfile(args.template) else args.templates_dir
+    analyzer = BatchAnalyzer(
+        template,
+        frame_gate=FrameGate(template, templates_dir) if args.frame_gate else None,
+        deduper=FrameDeduper(template) if args.dedupe else None
+    )
+    results_store = ResultsStore(args.results_dir)
+
+    images = collect_images(args.paths)
+    started = time.perf_counter()
+    for analysis_results in analyzer.run(images):
+        if 'error' in analysis_results:
+            logger.error("%s: %s", analysis_results.get('image_file'), analysis_results['error'])
+            continue
+        results_store.save(analysis_results, template.get('site'), image_name=analysis_results['source_path'])
+
+    elapsed = time.perf_counter() - started
+    snapshot = analyzer.metrics.snapshot()
+    print(f"{len(images)} screenshots in {elapsed:.1f}s: "
+          f"{snapshot['batch_frames_analyzed_total']} analysed, "
+          f"{snapshot['batch_frames_duplicate_total']} duplicates, "
+          f"{snapshot['batch_frames_gated_total']} gated, "
+          f"{snapshot['batch_frames_failed_total']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""
+Memory-mapped frame ring buffer
+
+Lets a capture process hand raw frames to the analyser without encoding,
+writing, reading and decoding a PNG per frame. The ring is a file (put it
+on /dev/shm for pure shared memory) with a fixed header followed by
+``slot_count`` fixed-size slots. Each slot holds a small header and raw
+uint8 pixels:
+
+    file header  magic "PKRING01", version, slot_count, slot_stride,
+                 max_width, max_height, channels, latest published sequence
+    slot header  sequence, timestamp, width, height, channels
+    slot data    height * width * channels bytes, row-major
+
+Pixels are in OpenCV channel order, as the engine and the video ingestion
+treat arrays: 3 channels are BGR, 4 are BGRA, 1 is grayscale. Writers
+capturing RGB must swap the channels before writing.
+
+The writer zeroes a slot's sequence while it fills the slot and publishes
+the new sequence last. Readers get zero-copy numpy views of the slot and
+check ``Frame.valid()`` after use to detect that the writer lapped them.
+
+Usage (from the app directory):
+    python -m service.frame_ring write /dev/shm/poker_frames captures/*.png --fps 10
+    python -m service.frame_ring analyze /dev/shm/poker_frames --template yaya_6p
+"""
+
+import argparse
+import logging
+import mmap
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .metrics import MetricsRegistry
+from .results_store import ResultsStore
+from .templates import resolve_template
+
+try:
+    from ocr.analysis_engine import PokerAnalysisEngine
+    from ocr.frame_gate import FrameGate
+    OCR_AVAILABLE = True
+except ImportError:
+    PokerAnalysisEngine = None
+    FrameGate = None
+    OCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PKRING01'
+FILE_HEADER = struct.Struct('<8sIIIIIIQ')
+SLOT_HEADER = struct.Struct('<QdIII')
+FILE_HEADER_SIZE = 64
+SLOT_HEADER_SIZE = 32
+LATEST_OFFSET = FILE_HEADER.size - 8
+
+
+def _align(size: int, alignment: int = 64) -> int:
+    return (size + alignment - 1) // alignment * alignment
+
+
+class Frame:
+    """A zero-copy view of one ring slot. ``array`` is only trustworthy while ``valid()`` holds."""
+
+    def __init__(self, ring: 'FrameRingReader', slot: int, seq: int, timestamp: float, array: np.ndarray):
+        self.ring = ring
+        self.slot = slot
+        self.seq = seq
+        self.timestamp = timestamp
+        self.array = array
+
+    def valid(self) -> bool:
+        return self.ring._slot_seq(self.slot) == self.seq
+
+    def copy(self) -> Optional[np.ndarray]:
+        array = self.array.copy()
+        return array if self.valid() else None
+
+
+class _FrameRing:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._mmap = None
+
+    def _map(self, size: int, writable: bool):
+        self._file = open(self.path, 'r+b' if writable else 'rb')
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        self._mmap = mmap.mmap(self._file.fileno(), size, access=access)
+
+    def _read_header(self):
+        magic, _, self.slot_count, self.slot_stride, self.max_width, self.max_height, self.channels, _ = \
+            FILE_HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a frame ring")
+
+    def _slot_offset(self, slot: int) -> int:
+        return FILE_HEADER_SIZE + slot * self.slot_stride
+
+    def _slot_seq(self, slot: int) -> int:
+        return struct.unpack_from('<Q', self._mmap, self._slot_offset(slot))[0]
+
+    @property
+    def latest_seq(self) -> int:
+        return struct.unpack_from('<Q', self._mmap, LATEST_OFFSET)[0]
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FrameRingWriter(_FrameRing):
+    """
+    Reference writer; a capture tool in any language can implement the same
+    layout. Frames are written as given and must already be BGR(A).
+    """
+
+    def __init__(self, path: str, slot_count: int = 16, max_width: int = 1920, max_height: int = 1080,
+                 channels: int = 3):
+        super().__init__(path)
+        self.slot_count = slot_count
+        self.max_width = max_width
+        self.max_height = max_height
+        self.channels = channels
+        self.slot_stride = _align(SLOT_HEADER_SIZE + max_width * max_height * channels)
+
+        size = FILE_HEADER_SIZE + slot_count * self.slot_stride
+        with open(path, 'wb') as f:
+            f.truncate(size)
+        self._map(size, writable=True)
+        FILE_HEADER.pack_into(self._mmap, 0, MAGIC, 1, slot_count, self.slot_stride,
+                              max_width, max_height, channels, 0)
+        self._seq = 0
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        if frame.dtype != np.uint8:
+            raise ValueError("Frames must be uint8")
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        if width > self.max_width or height > self.max_height or channels > self.channels:
+            raise ValueError(f"Frame {width}x{height}x{channels} exceeds ring slots "
+                             f"{self.max_width}x{self.max_height}x{self.channels}")
+
+        seq = self._seq + 1
+        slot = seq % self.slot_count
+        offset = self._slot_offset(slot)
+
+        struct.pack_into('<Q', self._mmap, offset, 0)
+        data = np.ndarray((height, width, channels), dtype=np.uint8, buffer=self._mmap,
+                          offset=offset + SLOT_HEADER_SIZE)
+        data[...] = frame.reshape(height, width, channels)
+        struct.pack_into('<dIII', self._mmap, offset + 8, timestamp if timestamp is not None else time.time(),
+                         width, height, channels)
+        struct.pack_into('<Q', self._mmap, offset, seq)
+        struct.pack_into('<Q', self._mmap, LATEST_OFFSET, seq)
+        self._seq = seq
+        return seq
+
+
+class FrameRingReader(_FrameRing):
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._map(0, writable=False)
+        self._read_header()
+        self.next_seq = None
+        self.frames_dropped = 0
+
+    def read(self, seq: int) -> Optional[Frame]:
+        """The frame with sequence ``seq`` if it is still in the ring."""
+        slot = seq % self.slot_count
+        offset = self._slot_offset(slot)
+        slot_seq, timestamp, width, height, channels = SLOT_HEADER.unpack_from(self._mmap, offset)
+        if slot_seq != seq:
+            return None
+
+        array = np.ndarray((height, width, channels), dtype=np.uint8, buffer=self._mmap,
+                           offset=offset + SLOT_HEADER_SIZE)
+        if channels == 1:
+            array = array[:, :, 0]
+        frame = Frame(self, slot, seq, timestamp, array)
+        return frame if frame.valid() else None
+
+    def latest(self) -> Optional[Frame]:
+        seq = self.latest_seq
+        return self.read(seq) if seq else None
+
+    def next(self, skip_to_latest: bool = False) -> Optional[Frame]:
+        """
+        The next unread frame, or None if the reader is caught up. Frames the
+        writer has already overwritten are counted in ``frames_dropped``;
+        ``skip_to_latest`` always jumps to the newest frame.
+        """
+        latest = self.latest_seq
+        if not latest:
+            return None
+        if self.next_seq is None:
+            self.next_seq = latest
+        if skip_to_latest and latest > self.next_seq:
+            self.frames_dropped += latest - self.next_seq
+            self.next_seq = latest
+
+        oldest = max(1, latest - self.slot_count + 2)
+        if self.next_seq < oldest:
+            self.frames_dropped += oldest - self.next_seq
+            self.next_seq = oldest
+
+        while self.next_seq <= latest:
+            frame = self.read(self.next_seq)
+            self.next_seq += 1
+            if frame is not None:
+                return frame
+            self.frames_dropped += 1
+        return None
+
+    def frames(self, stop_event: Optional[threading.Event] = None, poll_interval: float = 0.005,
+               skip_to_latest: bool = False) -> Iterator[Frame]:
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            frame = self.next(skip_to_latest)
+            if frame is None:
+                stop_event.wait(poll_interval)
+                continue
+            yield frame
+
+
+class RingAnalysisLoop:
+    """
+    Analyses frames straight from the ring. The engine reads the slot view
+    without copying; results of a frame the writer overwrote mid-analysis
+    are discarded and counted as torn. Frames failing the optional frame
+    gate are skipped; the next frame is usually usable again. Results are
+    dated by capture: ``timestamp`` in ISO format and ``frame_captured_at``
+    in epoch seconds.
+    """
+
+    def __init__(self, reader: FrameRingReader, template: Dict[str, Any],
+                 on_result: Callable[[Dict[str, Any]], None], engine=None, skip_to_latest: bool = True,
+                 frame_gate: Optional['FrameGate'] = None):
+        self.reader = reader
+        self.frame_gate = frame_gate
+        self.template = template
+        self.on_result = on_result
+        self.engine = engine or PokerAnalysisEngine()
+        self.skip_to_latest = skip_to_latest
+        self._stop_event = threading.Event()
+
+        self.metrics = MetricsRegistry(prefix='ring_')
+        self.frames_analyzed = self.metrics.counter('frames_analyzed_total', 'Frames analysed from the ring')
+        self.frames_torn = self.metrics.counter('frames_torn_total', 'Frames overwritten during analysis')
+        self.frames_gated = self.metrics.counter('frames_gated_total', 'Frames skipped by the frame gate')
+        self.metrics.gauge('frames_dropped_total', 'Frames overwritten before they were read',
+                           fn=lambda: self.reader.frames_dropped)
+        self.lag = self.metrics.histogram('lag_seconds', 'Frame timestamp to result')
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        for frame in self.reader.frames(self._stop_event, skip_to_latest=self.skip_to_latest):
+            if self.frame_gate and not self.frame_gate.check(frame.array)['accepted']:
+                self.frames_gated.inc()
+                continue
+            analysis_results = self.engine.analyze_poker_image(frame.array, self.template,
+                                                               image_name=f"ring#{frame.seq}")
+            if not frame.valid():
+                self.frames_torn.inc()
+                continue
+
+            # Capture time, not analysis time, dates the hand and the player observations
+            analysis_results['timestamp'] = datetime.fromtimestamp(frame.timestamp).isoformat()
+            analysis_results['frame_seq'] = frame.seq
+            analysis_results['frame_captured_at'] = frame.timestamp
+            self.frames_analyzed.inc()
+            self.lag.observe(time.time() - frame.timestamp)
+            self.on_result(analysis_results)
+
+
+def write_images(path: str, image_paths: List[str], fps: float, loop: bool, slot_count: int):
+    from PIL import Image
+
+    # The ring carries BGR like the rest of the engine's array inputs
+    frames = [np.ascontiguousarray(np.asarray(Image.open(image_path).convert('RGB'))[:, :, ::-1])
+              for image_path in image_paths]
+    max_height = max(frame.shape[0] for frame in frames)
+    max_width = max(frame.shape[1] for frame in frames)
+
+    with FrameRingWriter(path, slot_count, max_width, max_height) as writer:
+        interval = 1.0 / fps if fps > 0 else 0.0
+        while True:
+            for frame in frames:
+                started = time.perf_counter()
+                seq = writer.write(frame)
+                if seq % 100 == 0:
+                    logger.info("wrote frame %d", seq)
+                time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+            if not loop:
+                break
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Frame ring buffer writer and analyser")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    write = subparsers.add_parser('write', help="Write images into a ring (reference writer)")
+    write.add_argument('ring')
+    write.add_argument('images', nargs='+')
+    write.add_argument('--fps', type=float, default=10.0)
+    write.add_argument('--slots', type=int, default=16)
+    write.add_argument('--loop', action='store_true')
+
+    analyze = subparsers.add_parser('analyze', help="Analyse frames as they are written")
+    analyze.add_argument('ring')
+    analyze.add_argument('--template', required=True)
+    analyze.add_argument('--templates-dir', default='templates')
+    analyze.add_argument('--results-dir', default='results')
+    analyze.add_argument('--every-frame', action='store_true',
+                         help="Analyse frames in order instead of jumping to the newest")
+    analyze.add_argument('--frame-gate', action='store_true',
+                         help="Skip blurred, obstructed or mis-sized frames before OCR")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.command == 'write':
+        write_images(args.ring, args.images, args.fps, args.loop, args.slots)
+        return
+
+    if not OCR_AVAILABLE:
+        raise SystemExit("OCR engine not available - install dependencies: pytesseract, easyocr, opencv-python")
+
+    template = resolve_template(args.template, args.templates_dir)
+    results_store = ResultsStore(args.results_dir)
+    reader = FrameRingReader(args.ring)
+    loop = RingAnalysisLoop(
+        reader, template,
+        lambda analysis_results: results_store.save(analysis_results, template.get('site'),
+                                                    image_name=analysis_results['image_file']),
+        skip_to_latest=not args.every_frame,
+        frame_gate=FrameGate(template, args.templates_dir) if args.frame_gate else None
+    )
+    try:
+        loop.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info("metrics %s", loop.metrics.snapshot())
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
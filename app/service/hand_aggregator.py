@@ -0,0 +1,305 @@
+"""
+Hand-level aggregation of per-frame analyses
+
+Groups analyses by the hand number read from ``hand_history`` and merges
+repeated reads of each region into one consolidated hand record. Each
+region is decided by a confidence-weighted vote over the frames that read
+it successfully. Closed hands are appended to a JSON Lines file.
+
+A hand is closed once the table moves on to the next hand, or once it has
+been idle for ``idle_timeout`` seconds. A frame shows the next hand when its
+previous hand number is the open hand's, or when ``confirm_frames`` frames
+agree on the new number. A higher hand number alone is not enough: a
+misread digit raises the number as often as it lowers it. Other frames are held back until one of these holds, so a single
+misread hand number neither closes the open hand nor opens a bogus one.
+Frames whose table number could not be read are assigned to the table last
+read from the same source, or else on the same site.
+
+Usage (from the app directory), to aggregate saved results:
+    python -m service.hand_aggregator results --output hands.jsonl
+"""
+
+import argparse
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+from .metrics import MetricsRegistry
+
+try:
+    from ocr.insights import build_poker_insights
+    OCR_AVAILABLE = True
+except ImportError:
+    build_poker_insights = None
+    OCR_AVAILABLE = False
+
+
+def analysis_time(analysis_results: Dict[str, Any]) -> datetime:
+    timestamp = analysis_results.get('timestamp')
+    if timestamp:
+        try:
+            return datetime.fromisoformat(str(timestamp))
+        except ValueError:
+            pass
+    return datetime.now()
+
+
+def vote_region(reads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Confidence-weighted vote over the reads of one region; ties go to the single most confident read."""
+    successful = [read for read in reads if read.get('success') and read.get('text')]
+    base = {key: reads[-1].get(key) for key in ('display_name', 'type', 'coordinates')}
+
+    if not successful:
+        return dict(base, text='', confidence=0, method='hand_vote', success=False,
+                    votes=0, frames=len(reads), agreement=0.0)
+
+    tallies = {}
+    for read in successful:
+        weight, best_confidence, votes = tallies.get(read['text'], (0.0, 0.0, 0))
+        tallies[read['text']] = (weight + read['confidence'], max(best_confidence, read['confidence']), votes + 1)
+
+    text, (weight, confidence, votes) = max(tallies.items(), key=lambda item: (item[1][0], item[1][1]))
+    region = dict(base, text=text, confidence=confidence, method='hand_vote', success=True,
+                  votes=votes, frames=len(reads), agreement=round(votes / len(successful), 3))
+
+    alternatives = {other: tally[2] for other, tally in tallies.items() if other != text}
+    if alternatives:
+        region['alternatives'] = alternatives
+    parsed = next((read['parsed'] for read in successful if read['text'] == text and read.get('parsed')), None)
+    if parsed:
+        region['parsed'] = parsed
+    return region
+
+
+class OpenHand:
+    def __init__(self, table_key: Tuple, hand_id: int, seen_at: datetime):
+        self.table_key = table_key
+        self.hand_id = hand_id
+        self.previous_hand_ids = {}
+        self.first_seen = seen_at
+        self.last_seen = seen_at
+        self.sources = []
+        self.reads = {}
+
+    def add(self, analysis_results: Dict[str, Any], seen_at: datetime):
+        self.first_seen = min(self.first_seen, seen_at)
+        self.last_seen = max(self.last_seen, seen_at)
+        self.sources.append(analysis_results.get('source_path') or analysis_results.get('image_file'))
+
+        previous_hand_id = analysis_results.get('poker_insights', {}).get('game_state', {}).get('previous_hand_id')
+        if previous_hand_id is not None:
+            self.previous_hand_ids[previous_hand_id] = self.previous_hand_ids.get(previous_hand_id, 0) + 1
+
+        for region_key, region_result in analysis_results.get('extracted_data', {}).items():
+            if region_result.get('pending'):
+                continue
+            self.reads.setdefault(region_key, []).append(region_result)
+
+    def to_record(self) -> Dict[str, Any]:
+        extracted_data = {key: vote_region(reads) for key, reads in self.reads.items()}
+        site, table = self.table_key
+        record = {
+            'hand_id': self.hand_id,
+            'previous_hand_id': max(self.previous_hand_ids, key=self.previous_hand_ids.get)
+                                if self.previous_hand_ids else None,
+            'site': site,
+            'table': table,
+            'first_seen': self.first_seen.isoformat(),
+            'last_seen': self.last_seen.isoformat(),
+            'frame_count': len(self.sources),
+            'sources': self.sources,
+            'extracted_data': extracted_data
+        }
+        if build_poker_insights is not None:
+            record['poker_insights'] = build_poker_insights(extracted_data)
+        return record
+
+
+class HandAggregator:
+    """
+    Collects analyses into open hands keyed by (site, table, hand id) and
+    passes each closed hand record to ``on_hand``.
+    """
+
+    def __init__(self, on_hand: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 idle_timeout: float = 300.0, max_open_hands: int = 64, confirm_frames: int = 2):
+        self.on_hand = on_hand
+        self.idle_timeout = idle_timeout
+        self.max_open_hands = max_open_hands
+        self.confirm_frames = max(1, confirm_frames)
+        self._open = {}
+        self._recently_closed = OrderedDict()
+        # Frames held back per (table, hand id) until that hand number is confirmed
+        self._unconfirmed = OrderedDict()
+        self._table_by_source = OrderedDict()
+        self._table_by_site = {}
+        self._lock = threading.Lock()
+
+        self.metrics = MetricsRegistry(prefix='hands_')
+        self.frames_added = self.metrics.counter('frames_total', 'Analyses added to a hand')
+        self.frames_unassigned = self.metrics.counter('frames_unassigned_total', 'Analyses without a readable hand number')
+        self.frames_late = self.metrics.counter('frames_late_total', 'Analyses for a hand that was already closed')
+        self.frames_discarded = self.metrics.counter('frames_discarded_total',
+                                                     'Held-back analyses whose hand number was never confirmed')
+        self.metrics.gauge('frames_unconfirmed', 'Analyses held back until their hand number is confirmed',
+                           fn=lambda: sum(len(frames) for frames in self._unconfirmed.values()))
+        self.hands_closed = self.metrics.counter('closed_total', 'Consolidated hand records emitted')
+        self.metrics.gauge('open', 'Hands still collecting frames', fn=lambda: len(self._open))
+        self.frames_per_hand = self.metrics.histogram('frames_per_hand', 'Frames merged into each hand',
+                                                      buckets=[1, 2, 3, 5, 10, 20, 50, 100])
+
+    def table_key(self, analysis_results: Dict[str, Any]) -> Tuple:
+        site = analysis_results.get('site', 'unknown')
+        source = analysis_results.get('source_path')
+        table = analysis_results.get('poker_insights', {}).get('tournament_info', {}).get('table')
+        if table is None:
+            # A misread header must not split the hand off into a table of its own
+            table = self._table_by_source.get((site, source), self._table_by_site.get(site))
+        else:
+            self._table_by_site[site] = table
+            if source:
+                self._table_by_source[(site, source)] = table
+                self._table_by_source.move_to_end((site, source))
+                while len(self._table_by_source) > self.max_open_hands * 4:
+                    self._table_by_source.popitem(last=False)
+        return site, table
+
+    @staticmethod
+    def _follows(hand: OpenHand, hand_id: int, analysis_results: Dict[str, Any]) -> bool:
+        previous_hand_id = analysis_results.get('poker_insights', {}).get('game_state', {}).get('previous_hand_id')
+        return previous_hand_id == hand.hand_id
+
+    def add(self, analysis_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Add one analysis; returns the hand records it closed."""
+        hand_id = analysis_results.get('poker_insights', {}).get('game_state', {}).get('current_hand_id')
+        if hand_id is None or 'error' in analysis_results:
+            self.frames_unassigned.inc()
+            return []
+
+        seen_at = analysis_time(analysis_results)
+
+        with self._lock:
+            table_key = self.table_key(analysis_results)
+            key = (table_key, hand_id)
+            if key in self._recently_closed:
+                # A slow worker delivered a frame after its hand moved on
+                self.frames_late.inc()
+                return []
+
+            closed = [open_key for open_key, hand in self._open.items()
+                      if (seen_at - hand.last_seen).total_seconds() > self.idle_timeout]
+            current = next((hand for open_key, hand in self._open.items()
+                            if hand.table_key == table_key and open_key not in closed), None)
+
+            frames = self._unconfirmed.pop(key, [])
+            frames.append((analysis_results, seen_at))
+            if (current is None or current.hand_id == hand_id or self._follows(current, hand_id, analysis_results)
+                    or len(frames) >= self.confirm_frames):
+                if current is not None and current.hand_id != hand_id:
+                    closed.append((table_key, current.hand_id))
+                hand = self._open.get(key)
+                if hand is None:
+                    hand = self._open[key] = OpenHand(table_key, hand_id, frames[0][1])
+                for frame, frame_seen_at in frames:
+                    hand.add(frame, frame_seen_at)
+                    self.frames_added.inc()
+            else:
+                # Possibly a misread; wait for more frames showing this hand number
+                self._hold(key, frames)
+
+            closed_hands = [self._close(open_key) for open_key in closed]
+            while len(self._open) > self.max_open_hands:
+                stalest = min((open_key for open_key in self._open if open_key != key),
+                              key=lambda open_key: self._open[open_key].last_seen)
+                closed_hands.append(self._close(stalest))
+
+        return self._emit(closed_hands)
+
+    def _hold(self, key: Tuple, frames: List[Tuple[Dict[str, Any], datetime]]):
+        self._unconfirmed[key] = frames
+        while len(self._unconfirmed) > self.max_open_hands * 4:
+            _, dropped = self._unconfirmed.popitem(last=False)
+            self.frames_discarded.inc(len(dropped))
+
+    def _close(self, key: Tuple) -> OpenHand:
+        self._recently_closed[key] = True
+        while len(self._recently_closed) > self.max_open_hands * 4:
+            self._recently_closed.popitem(last=False)
+        return self._open.pop(key)
+
+    def flush(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            closed_hands = [self._close(key) for key in list(self._open)]
+            self.frames_discarded.inc(sum(len(frames) for frames in self._unconfirmed.values()))
+            self._unconfirmed.clear()
+        return self._emit(closed_hands)
+
+    def _emit(self, hands: List[OpenHand]) -> List[Dict[str, Any]]:
+        records = []
+        for hand in sorted(hands, key=lambda h: h.first_seen):
+            record = hand.to_record()
+            self.hands_closed.inc()
+            self.frames_per_hand.observe(record['frame_count'])
+            if self.on_hand:
+                self.on_hand(record)
+            records.append(record)
+        return records
+
+
+class HandRecordWriter:
+    """Appends hand records to a JSON Lines file, one compact line per hand."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+def load_results(results_dir: str) -> List[Dict[str, Any]]:
+    analyses = []
+    for filename in os.listdir(results_dir):
+        if not filename.endswith(('.yml', '.yaml')):
+            continue
+        with open(os.path.join(results_dir, filename), 'r') as f:
+            analysis_results = yaml.safe_load(f)
+        if isinstance(analysis_results, dict):
+            analysis_results['result_path'] = os.path.join(results_dir, filename)
+            analysis_results.setdefault('source_path', analysis_results['result_path'])
+            analyses.append(analysis_results)
+    return sorted(analyses, key=analysis_time)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge per-frame results into one record per hand")
+    parser.add_argument('results_dir', nargs='?', default='results')
+    parser.add_argument('--output', default='hands.jsonl')
+    parser.add_argument('--idle-timeout', type=float, default=300.0)
+    parser.add_argument('--confirm-frames', type=int, default=2,
+                        help="Frames that must agree on a new hand number before the open hand closes")
+    args = parser.parse_args(argv)
+
+    aggregator = HandAggregator(on_hand=HandRecordWriter(args.output), idle_timeout=args.idle_timeout,
+                                confirm_frames=args.confirm_frames)
+    analyses = load_results(args.results_dir)
+    for analysis_results in analyses:
+        aggregator.add(analysis_results)
+    aggregator.flush()
+
+    print(f"{len(analyses)} analyses -> {int(aggregator.hands_closed.value)} hands "
+          f"({int(aggregator.frames_unassigned.value)} without a hand number), written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
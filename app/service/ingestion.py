@@ -0,0 +1,498 @@
+"""
+Directory-watch ingestion service
+
+Watches a capture folder for new table screenshots, waits until each file
+has stopped changing, and feeds it through a bounded queue to a pool of
+analysis workers. Results are written to the results store and can also be
+merged into one record per hand (see service.hand_aggregator).
+
+Usage (from the app directory):
+    python -m service.ingestion /path/to/captures --template yaya_6p
+"""
+
+import argparse
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .hand_aggregator import HandAggregator, HandRecordWriter
+from .metrics import MetricsRegistry
+from .player_index import PlayerIndex
+from .results_store import ResultsStore
+from .templates import resolve_template
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INotify = None
+    inotify_flags = None
+    INOTIFY_AVAILABLE = False
+
+try:
+    from ocr.analysis_engine import PokerAnalysisEngine
+    from ocr.frame_dedupe import FrameDeduper, duplicate_results
+    from ocr.frame_gate import FrameGate, open_frame
+    OCR_AVAILABLE = True
+except ImportError:
+    PokerAnalysisEngine = None
+    FrameDeduper = None
+    duplicate_results = None
+    FrameGate = None
+    open_frame = None
+    OCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class DirectoryWatcher:
+    """
+    Reports files in a directory once they have stopped changing.
+
+    Uses inotify when available and falls back to periodic directory scans.
+    A file is considered ready when its size and mtime have been stable for
+    ``settle_time`` seconds. At most ``max_pending`` unsettled files are
+    tracked; anything beyond that is picked up by a later rescan.
+
+    A file whose analysis failed is reported again by a later rescan after
+    ``retry_backoff`` seconds, doubling per attempt. After ``max_attempts``
+    failures it is quarantined: moved to ``quarantine_dir`` if one is set,
+    otherwise left in place and no longer reported. Rewriting the file
+    starts its attempts over.
+    """
+
+    def __init__(self, watch_dir: str, settle_time: float = 0.5, poll_interval: float = 1.0,
+                 extensions=IMAGE_EXTENSIONS, use_inotify: bool = True, max_pending: int = 256,
+                 rescan_interval: float = 60.0, max_attempts: int = 5, retry_backoff: float = 2.0,
+                 max_retry_delay: float = 300.0, quarantine_dir: Optional[str] = None):
+        self.watch_dir = watch_dir
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_retry_delay = max_retry_delay
+        self.quarantine_dir = quarantine_dir
+
+        self._pending = {}
+        self._seen = {}
+        self._failures = {}
+        self._failures_lock = threading.Lock()
+        self._needs_rescan = True
+        self._last_scan = 0.0
+
+        self._inotify = None
+        if use_inotify and INOTIFY_AVAILABLE:
+            try:
+                self._inotify = INotify()
+                mask = (inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO |
+                        inotify_flags.CREATE | inotify_flags.MODIFY)
+                self._inotify.add_watch(watch_dir, mask)
+            except OSError as e:
+                logger.warning("inotify unavailable (%s), falling back to polling", e)
+                self._inotify = None
+
+    @property
+    def mode(self) -> str:
+        return 'inotify' if self._inotify else 'polling'
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def oldest_pending_age(self) -> float:
+        if not self._pending:
+            return 0.0
+        return time.time() - min(entry[2] for entry in self._pending.values())
+
+    def close(self):
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    def record_failure(self, path: str) -> bool:
+        """Schedule a retry of ``path`` with backoff; returns True once it is quarantined."""
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return False
+        with self._failures_lock:
+            failure = self._failures.get(path)
+            if not failure or failure['mtime'] != mtime:
+                failure = self._failures[path] = {'attempts': 0, 'mtime': mtime, 'quarantined': False}
+            failure['attempts'] += 1
+            delay = min(self.retry_backoff * 2 ** (failure['attempts'] - 1), self.max_retry_delay)
+            failure['retry_at'] = time.time() + delay
+            failure['quarantined'] = failure['attempts'] >= self.max_attempts
+            quarantined = failure['quarantined']
+
+        if quarantined and self.quarantine_dir:
+            try:
+                os.makedirs(self.quarantine_dir, exist_ok=True)
+                os.replace(path, os.path.join(self.quarantine_dir, os.path.basename(path)))
+            except OSError as e:
+                logger.error("Cannot quarantine %s: %s", path, e)
+        return quarantined
+
+    def record_success(self, path: str):
+        with self._failures_lock:
+            self._failures.pop(path, None)
+
+    def _retry_due(self, path: str) -> bool:
+        with self._failures_lock:
+            failure = self._failures.get(path)
+            return bool(failure) and not failure['quarantined'] and time.time() >= failure['retry_at']
+
+    def poll(self, limit: int) -> List[str]:
+        """Return up to ``limit`` settled file paths, waiting at most one poll interval."""
+        if self._inotify:
+            self._read_events()
+            if time.time() - self._last_scan >= self.rescan_interval:
+                self._needs_rescan = True
+        elif time.time() - self._last_scan >= self.poll_interval:
+            self._needs_rescan = True
+        else:
+            time.sleep(min(self.settle_time, self.poll_interval) / 2)
+
+        if self._needs_rescan:
+            self._rescan()
+
+        return self._collect_ready(limit)
+
+    def _is_candidate(self, filename: str) -> bool:
+        return filename.lower().endswith(self.extensions) and not filename.startswith('.')
+
+    def _track(self, path: str):
+        if path in self._pending:
+            return
+        if len(self._pending) >= self.max_pending:
+            self._needs_rescan = True
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        # A rewritten file (new mtime) is tracked again; record_failure then restarts its attempts
+        if self._seen.get(path) == stat.st_mtime and not self._retry_due(path):
+            return
+        self._pending[path] = (stat.st_size, stat.st_mtime, time.time())
+
+    def _read_events(self):
+        timeout_ms = int(min(self.settle_time, self.poll_interval) * 1000)
+        for event in self._inotify.read(timeout=timeout_ms):
+            if event.mask & inotify_flags.Q_OVERFLOW:
+                self._needs_rescan = True
+                continue
+            if event.name and self._is_candidate(event.name):
+                path = os.path.join(self.watch_dir, event.name)
+                self._pending.pop(path, None)
+                self._track(path)
+
+    def _rescan(self):
+        self._needs_rescan = False
+        self._last_scan = time.time()
+        try:
+            entries = list(os.scandir(self.watch_dir))
+        except OSError as e:
+            logger.error("Cannot scan %s: %s", self.watch_dir, e)
+            return
+
+        candidates = []
+        for entry in entries:
+            try:
+                if entry.is_file() and self._is_candidate(entry.name):
+                    candidates.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                # Deleted between the scan and the stat
+                continue
+
+        present = set()
+        for _, path in sorted(candidates):
+            present.add(path)
+            self._track(path)
+
+        for path in [p for p in self._seen if p not in present]:
+            del self._seen[path]
+        with self._failures_lock:
+            for path in [p for p in self._failures if p not in present]:
+                del self._failures[path]
+
+    def _collect_ready(self, limit: int) -> List[str]:
+        ready = []
+        now = time.time()
+        for path, (size, mtime, first_seen) in list(self._pending.items()):
+            if len(ready) >= limit:
+                break
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+
+            if stat.st_size != size or stat.st_mtime != mtime:
+                self._pending[path] = (stat.st_size, stat.st_mtime, first_seen)
+                continue
+
+            if stat.st_size > 0 and now - stat.st_mtime >= self.settle_time:
+                del self._pending[path]
+                self._seen[path] = stat.st_mtime
+                ready.append(path)
+        return ready
+
+
+class IngestionService:
+    def __init__(self, watch_dir: str, template: Dict[str, Any], results_store: Optional[ResultsStore] = None,
+                 workers: int = 2, queue_size: int = 16, settle_time: float = 0.5,
+                 poll_interval: float = 1.0, use_inotify: bool = True,
+                 engine_factory: Optional[Callable[[], Any]] = None,
+                 hand_aggregator: Optional[HandAggregator] = None, save_frames: bool = True,
+                 frame_gate: Optional['FrameGate'] = None, deduper: Optional['FrameDeduper'] = None,
+                 max_attempts: int = 5, quarantine_dir: Optional[str] = None):
+        self.template = template
+        self.frame_gate = frame_gate
+        self.deduper = deduper
+        self.results_store = results_store or ResultsStore()
+        self.hand_aggregator = hand_aggregator
+        self.save_frames = save_frames
+        self.worker_count = max(1, workers)
+        self.engine_factory = engine_factory or PokerAnalysisEngine
+        if self.engine_factory is None:
+            raise RuntimeError("OCR engine not available - install dependencies: pytesseract, easyocr, opencv-python")
+
+        self.watcher = DirectoryWatcher(watch_dir, settle_time=settle_time, poll_interval=poll_interval,
+                                        use_inotify=use_inotify, max_pending=queue_size * 4,
+                                        max_attempts=max_attempts, quarantine_dir=quarantine_dir)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._busy_workers = 0
+        self._busy_lock = threading.Lock()
+
+        self.metrics = MetricsRegistry(prefix='ingest_')
+        self.files_detected = self.metrics.counter('files_detected_total', 'Settled files queued for analysis')
+        self.files_processed = self.metrics.counter('files_processed_total', 'Files analysed and stored')
+        self.files_failed = self.metrics.counter('files_failed_total', 'Failed analysis attempts')
+        self.files_quarantined = self.metrics.counter('files_quarantined_total',
+                                                      'Files given up on after repeated failures')
+        self.backpressure_waits = self.metrics.counter('backpressure_waits_total',
+                                                       'Watcher iterations skipped because the queue was full')
+        self.metrics.gauge('queue_depth', 'Files waiting for a worker', fn=self._queue.qsize)
+        self.metrics.gauge('pending_files', 'Files detected but not yet settled', fn=lambda: self.watcher.pending_count)
+        self.metrics.gauge('busy_workers', 'Workers currently analysing', fn=lambda: self._busy_workers)
+        self.metrics.gauge('oldest_pending_seconds', 'Age of the oldest unsettled file',
+                           fn=self.watcher.oldest_pending_age)
+        if frame_gate:
+            for reason in frame_gate.counts:
+                if reason != 'accepted':
+                    self.metrics.gauge(f'gated_{reason}_total', f"Files skipped by the frame gate: {reason}",
+                                       fn=lambda reason=reason: frame_gate.counts[reason])
+        if deduper:
+            self.metrics.gauge('duplicates_skipped_total', 'Files matching an analysed frame, engine not run',
+                               fn=lambda: deduper.skipped)
+            self.metrics.gauge('dedupe_evictions_total', 'Frames evicted from the recent-hash index',
+                               fn=lambda: deduper.counts['evicted'])
+        self.lag = self.metrics.histogram('lag_seconds', 'File write to result stored')
+        self.queue_wait = self.metrics.histogram('queue_wait_seconds', 'Time spent waiting in the queue')
+        self.analysis_time = self.metrics.histogram('analysis_seconds', 'Engine time per file')
+
+    def start(self):
+        for index in range(self.worker_count):
+            thread = threading.Thread(target=self._worker_loop, name=f"ingest-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        watcher_thread = threading.Thread(target=self._watch_loop, name="ingest-watcher", daemon=True)
+        watcher_thread.start()
+        self._threads.append(watcher_thread)
+        logger.info("Watching %s (%s, %d workers)", self.watcher.watch_dir, self.watcher.mode, self.worker_count)
+
+    def stop(self, timeout: float = 10.0):
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.watcher.close()
+        if self.hand_aggregator:
+            self.hand_aggregator.flush()
+
+    def run_forever(self, metrics_interval: float = 30.0):
+        self.start()
+        try:
+            while not self._stop_event.wait(metrics_interval):
+                logger.info("metrics %s", self.metrics.snapshot())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _watch_loop(self):
+        while not self._stop_event.is_set():
+            free_slots = self._queue.maxsize - self._queue.qsize()
+            if free_slots <= 0:
+                # Leave new files on disk until a worker frees a slot
+                self.backpressure_waits.inc()
+                self._stop_event.wait(self.watcher.poll_interval / 4)
+                continue
+
+            for path in self.watcher.poll(free_slots):
+                self.files_detected.inc()
+                self._queue.put((path, time.time()))
+
+    def _worker_loop(self):
+        engine = self.engine_factory()
+        while not self._stop_event.is_set():
+            try:
+                path, queued_at = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            with self._busy_lock:
+                self._busy_workers += 1
+            try:
+                self._process(engine, path, queued_at)
+            except Exception as e:
+                # One bad file or a failed write must not take the worker down with it
+                self._fail(path, e, exc_info=True)
+            finally:
+                with self._busy_lock:
+                    self._busy_workers -= 1
+                self._queue.task_done()
+
+    def _process(self, engine, path: str, queued_at: float):
+        started = time.time()
+        self.queue_wait.observe(started - queued_at)
+
+        if not (self.frame_gate or self.deduper):
+            self._analyze(engine, path, path, started)
+            return
+
+        try:
+            source = open_frame(path)
+        except OSError as e:
+            self._fail(path, e)
+            return
+        try:
+            self._analyze(engine, path, source, started)
+        finally:
+            source.close()
+
+    def _analyze(self, engine, path: str, source, started: float):
+        if self.frame_gate:
+            verdict = self.frame_gate.check(source)
+            if not verdict['accepted']:
+                # Deferred files are picked up again if the capture tool rewrites them
+                log = logger.warning if verdict['action'] == 'reject' else logger.info
+                log("%s: %s by frame gate (%s)", os.path.basename(path), verdict['action'], verdict['reason'])
+                return
+        
+        signature = None
+        match = None
+        if self.deduper:
+            signature = self.deduper.signature(source)
+            match = self.deduper.lookup(signature)
+        
+        if match:
+            analysis_results = duplicate_results(match[0], os.path.basename(path), match[1])
+        else:
+            analysis_results = engine.analyze_poker_image(source, self.template, image_name=os.path.basename(path))
+            self.analysis_time.observe(time.time() - started)
+
+        if 'error' in analysis_results:
+            self._fail(path, analysis_results['error'])
+            return
+        if signature is not None and not match:
+            self.deduper.add(signature, analysis_results)
+
+        analysis_results['timestamp'] = datetime.now().isoformat()
+        analysis_results['source_path'] = os.path.abspath(path)
+        if self.save_frames:
+            self.results_store.save(analysis_results, self.template.get('site'), image_name=path)
+        # A repeated frame adds no evidence to the hand's votes
+        if self.hand_aggregator and not match:
+            self.hand_aggregator.add(analysis_results)
+        self.files_processed.inc()
+        self.watcher.record_success(path)
+
+        try:
+            self.lag.observe(time.time() - os.path.getmtime(path))
+        except OSError:
+            pass
+
+    def _fail(self, path: str, error, exc_info: bool = False):
+        self.files_failed.inc()
+        logger.error("%s: %s", os.path.basename(path), error, exc_info=exc_info)
+        if self.watcher.record_failure(path):
+            self.files_quarantined.inc()
+            logger.warning("%s: quarantined after %d failed attempts", os.path.basename(path),
+                           self.watcher.max_attempts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse screenshots as they land in a capture folder")
+    parser.add_argument('watch_dir', help="Directory the capture tool writes screenshots to")
+    parser.add_argument('--template', required=True, help="Template name (e.g. yaya_6p) or path to a template JSON")
+    parser.add_argument('--templates-dir', default='templates')
+    parser.add_argument('--results-dir', default='results')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--queue-size', type=int, default=16)
+    parser.add_argument('--settle-time', type=float, default=0.5,
+                        help="Seconds a file must stay unchanged before it is analysed")
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--no-inotify', action='store_true', help="Always use directory polling")
+    parser.add_argument('--metrics-interval', type=float, default=30.0)
+    parser.add_argument('--hands-output', help="Append one consolidated record per hand to this JSON Lines file")
+    parser.add_argument('--no-frame-results', action='store_true',
+                        help="Only keep hand records, not one YAML file per screenshot")
+    parser.add_argument('--player-db', help="Index players seen in each saved result into this SQLite file")
+    parser.add_argument('--frame-gate', action='store_true',
+                        help="Skip blurred, obstructed or mis-sized screenshots before OCR")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="Reuse the result of an identical recent screenshot instead of running OCR")
+    parser.add_argument('--max-attempts', type=int, default=5,
+                        help="Failed analyses of a file before it is quarantined")
+    parser.add_argument('--quarantine-dir', help="Move quarantined files here (default: leave them in place)")
+    args = parser.parse_args(argv)
+
+    if args.no_frame_results and not args.hands_output:
+        parser.error("--no-frame-results requires --hands-output")
+    if (args.frame_gate or args.dedupe) and not OCR_AVAILABLE:
+        parser.error("--frame-gate and --dedupe need the OCR dependencies: opencv-python")
+    hand_aggregator = HandAggregator(on_hand=HandRecordWriter(args.hands_output)) if args.hands_output else None
+    results_store = ResultsStore(args.results_dir)
+    if args.player_db:
+        results_store.add_listener(PlayerIndex(args.player_db).on_saved)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    template = resolve_template(args.template, args.templates_dir)
+    # Anchor images live next to the template file
+    templates_dir = os.path.dirname(args.template) if os.path.isfile(args.template) else args.templates_dir
+    service = IngestionService(
+        args.watch_dir,
+        template,
+        results_store,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        settle_time=args.settle_time,
+        poll_interval=args.poll_interval,
+        use_inotify=not args.no_inotify,
+        hand_aggregator=hand_aggregator,
+        save_frames=not args.no_frame_results,
+        frame_gate=FrameGate(template, templates_dir) if args.frame_gate else None,
+        deduper=FrameDeduper(template) if args.dedupe else None,
+        max_attempts=args.max_attempts,
+        quarantine_dir=args.quarantine_dir
+    )
+    service.run_forever(args.metrics_interval)
+
+
+if __name__ == "__main__":
+    main()
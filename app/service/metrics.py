@@ -0,0 +1,147 @@
+"""
+Lightweight in-process metrics for long-running services
+"""
+
+import bisect
+import sys
+import threading
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the current process in MB, if the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str = ''):
+        self.name = name
+        self.help_text = help_text
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str = '', fn: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.help_text = help_text
+        self._value = 0
+        self._fn = fn
+
+    def set(self, value: float):
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._fn() if self._fn else self._value
+
+
+class Histogram:
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, name: str, help_text: str = '', buckets: Optional[List[float]] = None):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets or self.DEFAULT_BUCKETS))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def quantile(self, q: float) -> float:
+        with self._lock:
+            if not self._count:
+                return 0.0
+            target = q * self._count
+            cumulative = 0
+            for index, count in enumerate(self._counts):
+                cumulative += count
+                if cumulative >= target:
+                    return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            count, total = self._count, self._sum
+        return {
+            'count': count,
+            'sum': total,
+            'mean': total / count if count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = ''):
+        self.prefix = prefix
+        self._metrics = {}
+
+    def _register(self, metric):
+        metric.name = f"{self.prefix}{metric.name}"
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str = '') -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str = '', fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._register(Gauge(name, help_text, fn))
+
+    def histogram(self, name: str, help_text: str = '', buckets: Optional[List[float]] = None) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def snapshot(self) -> Dict[str, object]:
+        snapshot = {}
+        for name, metric in self._metrics.items():
+            snapshot[name] = metric.snapshot() if isinstance(metric, Histogram) else metric.value
+        return snapshot
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for name, metric in self._metrics.items():
+            if metric.help_text:
+                lines.append(f"# HELP {name} {metric.help_text}")
+
+            if isinstance(metric, Histogram):
+                lines.append(f"# TYPE {name} histogram")
+                with metric._lock:
+                    counts = list(metric._counts)
+                    total, count = metric._sum, metric._count
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{le="+Inf"}} {count}')
+                lines.append(f"{name}_sum {total}")
+                lines.append(f"{name}_count {count}")
+            else:
+                metric_type = 'counter' if isinstance(metric, Counter) else 'gauge'
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.append(f"{name} {metric.value}")
+        return "\n".join(lines) + "\n"
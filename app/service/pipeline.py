@@ -0,0 +1,385 @@
+"""
+Staged batch analysis pipeline
+
+Splits the analysis of each screenshot into stages connected by bounded
+queues, each with its own worker threads:
+
+    decode       read and decode the image file into an array
+    preprocess   crop regions, empty-region check, preprocessing variants
+    ocr          Tesseract/EasyOCR attempts (and mosaic reads if enabled)
+    postprocess  clean, decide on fallbacks, select winners, parse,
+                 consistency checks
+    reread       the remaining planned attempts for regions whose narrowed
+                 attempts read nothing, and OCR with every variant and engine
+                 for the regions that failed a consistency check; most images
+                 pass straight through
+    finalize     clean and parse the fallback reads and re-reads, insights,
+                 persist
+
+All OCR runs in the ocr and reread stages and all cleaning after them, so
+each stage's utilisation is the cost of one kind of work. A region waiting
+for its fallback has no text yet and is left out of the consistency checks.
+
+A full queue blocks the stage feeding it, so a slow stage throttles the
+ones before it instead of letting decoded images pile up in memory. Each
+stage reports its utilisation (busy time over workers x wall time), the
+time it spent blocked on a full downstream queue, and its queue depth.
+The busiest stage is the bottleneck; give it more workers.
+
+Usage (from the app directory):
+    python -m service.pipeline captures/ --template yaya_6p --ocr-workers 4
+"""
+
+import argparse
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .batch import collect_images
+from .metrics import MetricsRegistry
+from .results_store import ResultsStore
+from .templates import resolve_template
+
+try:
+    from ocr.analysis_engine import PokerAnalysisEngine
+    from ocr.config import OCRConfig
+    OCR_AVAILABLE = True
+except ImportError:
+    PokerAnalysisEngine = None
+    OCRConfig = None
+    OCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[Dict[str, Any]], None], workers: int, queue_size: int,
+                 metrics: MetricsRegistry, handles_errors: bool = False):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.handles_errors = handles_errors
+        self.input = queue.Queue(maxsize=queue_size)
+        self.next_stage = None
+        self.max_depth = 0
+
+        self._threads = []
+        self._alive = 0
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._stopped_at = None
+
+        self.processed = metrics.counter(f'{name}_items_total', f"Images through the {name} stage")
+        self.busy = metrics.counter(f'{name}_busy_seconds_total', f"Time {name} workers spent working")
+        self.blocked = metrics.counter(f'{name}_blocked_seconds_total',
+                                       f"Time {name} workers waited on a full downstream queue")
+        metrics.gauge(f'{name}_queue_depth', f"Images waiting for the {name} stage", fn=self.input.qsize)
+        metrics.gauge(f'{name}_utilization', f"Share of {name} worker time spent working", fn=self.utilization)
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self._alive = self.workers
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"pipeline-{self.name}-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def put(self, job):
+        self.input.put(job)
+        self.max_depth = max(self.max_depth, self.input.qsize())
+
+    def elapsed(self) -> float:
+        if self._started_at is None:
+            return 0.0
+        return (self._stopped_at or time.perf_counter()) - self._started_at
+
+    def utilization(self) -> float:
+        elapsed = self.elapsed()
+        return self.busy.value / (self.workers * elapsed) if elapsed > 0 else 0.0
+
+    def _run(self):
+        while True:
+            job = self.input.get()
+            if job is _STOP:
+                self._worker_done()
+                return
+
+            started = time.perf_counter()
+            if job['error'] is None or self.handles_errors:
+                try:
+                    self.fn(job)
+                except Exception as e:
+                    job['error'] = e
+            self.busy.inc(time.perf_counter() - started)
+            self.processed.inc()
+
+            if self.next_stage:
+                waited = time.perf_counter()
+                self.next_stage.put(job)
+                self.blocked.inc(time.perf_counter() - waited)
+
+    def _worker_done(self):
+        with self._lock:
+            self._alive -= 1
+            last = self._alive == 0
+        if last:
+            self._stopped_at = time.perf_counter()
+            if self.next_stage:
+                for _ in range(self.next_stage.workers):
+                    self.next_stage.put(_STOP)
+
+
+class AnalysisPipeline:
+    def __init__(self, template: Dict[str, Any], on_result: Callable[[Dict[str, Any]], None], engine=None,
+                 decode_workers: int = 1, preprocess_workers: int = 1, ocr_workers: int = 2,
+                 postprocess_workers: int = 1, reread_workers: int = 1, finalize_workers: int = 1,
+                 queue_size: int = 8):
+        self.template = template
+        self.on_result = on_result
+        self.engine = engine or PokerAnalysisEngine()
+        self.template_key = self.engine._template_key(template)
+        self.site = template.get('site')
+        self.regions = template.get('regions', {})
+
+        self.metrics = MetricsRegistry(prefix='pipeline_')
+        self.stages = [
+            Stage('decode', self._decode, decode_workers, queue_size, self.metrics),
+            Stage('preprocess', self._preprocess, preprocess_workers, queue_size, self.metrics),
+            Stage('ocr', self._ocr, ocr_workers, queue_size, self.metrics),
+            Stage('postprocess', self._postprocess, postprocess_workers, queue_size, self.metrics),
+            Stage('reread', self._reread, reread_workers, queue_size, self.metrics),
+            Stage('finalize', self._finalize, finalize_workers, queue_size, self.metrics, handles_errors=True)
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next_stage = next_stage
+        self.images_failed = self.metrics.counter('images_failed_total', 'Images whose analysis failed')
+        self.latency = self.metrics.histogram('image_seconds', 'Submit to result per image')
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def submit(self, source, image_name: Optional[str] = None):
+        """Queue one image; blocks while the decode queue is full."""
+        self.stages[0].put({
+            'source': source,
+            'image_name': image_name or self.engine._image_name(source),
+            'submitted': time.perf_counter(),
+            'error': None
+        })
+
+    def close(self):
+        """Finish every submitted image, then stop the workers."""
+        for _ in range(self.stages[0].workers):
+            self.stages[0].put(_STOP)
+        for stage in self.stages:
+            stage.join()
+
+    def run(self, sources: List[Any]):
+        self.start()
+        try:
+            for source in sources:
+                self.submit(source)
+        finally:
+            self.close()
+
+    def report(self) -> List[Dict[str, Any]]:
+        return [{
+            'stage': stage.name,
+            'workers': stage.workers,
+            'items': int(stage.processed.value),
+            'utilization': stage.utilization(),
+            'mean_seconds': stage.busy.value / stage.processed.value if stage.processed.value else 0.0,
+            'blocked_seconds': stage.blocked.value,
+            'max_queue_depth': stage.max_depth
+        } for stage in self.stages]
+
+    def _decode(self, job: Dict[str, Any]):
+        image = self.engine._load_image(job['source'])
+        # Materialise the pixels here so later stages only slice views
+        job['image'] = np.asarray(image)
+        job['results'] = self.engine._new_results(job['image'], self.template, job['image_name'])
+
+    def _preprocess(self, job: Dict[str, Any]):
+        prepared = {}
+        for region_key, region_data in self.regions.items():
+            try:
+                prepared[region_key] = self.engine._prepare_region(job['image'], region_key, region_data,
+                                                                   self.template_key)
+            except Exception as e:
+                prepared[region_key] = self.engine._failed_result(region_key, region_data, e)
+        job['prepared'] = prepared
+
+    def _ocr(self, job: Dict[str, Any]):
+        pending = {key: entry for key, entry in job['prepared'].items() if 'prepared' in entry}
+        job['mosaic'] = {}
+        if OCRConfig.MOSAIC_ENABLED:
+            job['mosaic'] = self.engine.text_extractor.extract_mosaic(
+                job['image'], {key: self.regions[key] for key in pending}
+            )
+
+        for region_key, entry in pending.items():
+            if region_key in job['mosaic']:
+                continue
+            try:
+                entry['recognized'] = self.engine.text_extractor.recognize(entry['prepared'], fallback=False)
+            except Exception as e:
+                job['prepared'][region_key] = self.engine._failed_result(region_key, self.regions[region_key], e)
+
+    def _postprocess(self, job: Dict[str, Any]):
+        extracted_data = {}
+        job['fallback'] = []
+        for region_key, region_data in self.regions.items():
+            entry = job['prepared'][region_key]
+            try:
+                if region_key in job['mosaic']:
+                    extraction_result = job['mosaic'][region_key]
+                elif 'recognized' in entry:
+                    if self.engine.text_extractor.needs_fallback(entry['recognized']):
+                        job['fallback'].append(region_key)
+                        continue
+                    extraction_result = self.engine._select_region(entry['recognized'], entry['features'])
+                else:
+                    extracted_data[region_key] = entry
+                    continue
+                extracted_data[region_key] = self.engine._region_result(region_key, region_data, extraction_result,
+                                                                        self.site)
+            except Exception as e:
+                extracted_data[region_key] = self.engine._failed_result(region_key, region_data, e)
+
+        job['extracted_data'] = extracted_data
+        job['reread'] = (self.engine.consistency_checker.regions_to_reread(extracted_data)
+                         if self.engine.consistency_checker else [])
+
+    def _reread(self, job: Dict[str, Any]):
+        for region_key in list(job['fallback']):
+            try:
+                self.engine.text_extractor.recognize_fallback(job['prepared'][region_key]['recognized'])
+            except Exception as e:
+                job['fallback'].remove(region_key)
+                job['extracted_data'][region_key] = self.engine._failed_result(region_key, self.regions[region_key], e)
+
+        job['reread_recognized'] = {}
+        for region_key in job['reread']:
+            region_data = self.regions[region_key]
+            try:
+                prepared = self.engine.text_extractor.prepare(job['image'], region_data['coordinates'],
+                                                              region_data['type'], self.template_key, effort='full')
+                job['reread_recognized'][region_key] = self.engine.text_extractor.recognize(prepared)
+            except Exception as e:
+                job['extracted_data'][region_key] = dict(self.engine._failed_result(region_key, region_data, e),
+                                                         reread=True)
+
+    def _finalize(self, job: Dict[str, Any]):
+        if job['error'] is None:
+            try:
+                self._complete(job)
+            except Exception as e:
+                job['error'] = e
+        if job['error'] is not None:
+            self.images_failed.inc()
+            job['results'] = self.engine._error_results(job['error'], self.template, job['image_name'])
+
+        self.latency.observe(time.perf_counter() - job['submitted'])
+        # Release the pixels before the results are handed on
+        job.pop('image', None)
+        job.pop('prepared', None)
+        job.pop('reread_recognized', None)
+        self.on_result(job['results'])
+
+    def _complete(self, job: Dict[str, Any]):
+        extracted_data = job['extracted_data']
+        for region_key in job['fallback']:
+            region_data = self.regions[region_key]
+            entry = job['prepared'][region_key]
+            try:
+                extracted_data[region_key] = self.engine._region_result(
+                    region_key, region_data, self.engine._select_region(entry['recognized'], entry['features']),
+                    self.site)
+            except Exception as e:
+                extracted_data[region_key] = self.engine._failed_result(region_key, region_data, e)
+
+        for region_key, recognized in job['reread_recognized'].items():
+            region_data = self.regions[region_key]
+            try:
+                region_result = self.engine._region_result(region_key, region_data,
+                                                           self.engine.text_extractor.select(recognized), self.site)
+            except Exception as e:
+                region_result = self.engine._failed_result(region_key, region_data, e)
+            region_result['reread'] = True
+            extracted_data[region_key] = region_result
+
+        analysis_results = job['results']
+        analysis_results['extracted_data'] = {key: extracted_data[key] for key in self.regions if key in extracted_data}
+        analysis_results['timestamp'] = datetime.now().isoformat()
+        job['results'] = self.engine._finalize_results(analysis_results,
+                                                       time.perf_counter() - job['submitted'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse screenshots through a staged pipeline")
+    parser.add_argument('paths', nargs='+', help="Screenshot files or directories")
+    parser.add_argument('--template', required=True, help="Template name (e.g. yaya_6p) or path to a template JSON")
+    parser.add_argument('--templates-dir', default='templates')
+    parser.add_argument('--results-dir', default='results')
+    parser.add_argument('--decode-workers', type=int, default=1)
+    parser.add_argument('--preprocess-workers', type=int, default=1)
+    parser.add_argument('--ocr-workers', type=int, default=2)
+    parser.add_argument('--postprocess-workers', type=int, default=1)
+    parser.add_argument('--reread-workers', type=int, default=1)
+    parser.add_argument('--finalize-workers', type=int, default=1)
+    parser.add_argument('--queue-size', type=int, default=8, help="Images buffered between two stages")
+    parser.add_argument('--no-save', action='store_true', help="Only report, do not store results")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not OCR_AVAILABLE:
+        raise SystemExit("OCR engine not available - install dependencies: pytesseract, easyocr, opencv-python")
+
+    template = resolve_template(args.template, args.templates_dir)
+    results_store = None if args.no_save else ResultsStore(args.results_dir)
+    images = collect_images(args.paths)
+
+    def on_result(analysis_results):
+        if 'error' in analysis_results:
+            logger.error("%s: %s", analysis_results.get('image_file'), analysis_results['error'])
+        elif results_store:
+            results_store.save(analysis_results, template.get('site'), image_name=analysis_results['image_file'])
+
+    pipeline = AnalysisPipeline(
+        template, on_result,
+        decode_workers=args.decode_workers,
+        preprocess_workers=args.preprocess_workers,
+        ocr_workers=args.ocr_workers,
+        postprocess_workers=args.postprocess_workers,
+        reread_workers=args.reread_workers,
+        finalize_workers=args.finalize_workers,
+        queue_size=args.queue_size
+    )
+    started = time.perf_counter()
+    pipeline.run(images)
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(images)} images in {elapsed:.1f}s ({len(images) / elapsed if elapsed else 0:.2f}/s)")
+    print(f"{'stage':<12}{'workers':>8}{'util':>7}{'mean s':>9}{'blocked s':>11}{'max queue':>11}")
+    report = pipeline.report()
+    for stage in report:
+        print(f"{stage['stage']:<12}{stage['workers']:>8}{stage['utilization']:>7.0%}{stage['mean_seconds']:>9.3f}"
+              f"{stage['blocked_seconds']:>11.1f}{stage['max_queue_depth']:>11}")
+    bottleneck = max(report, key=lambda stage: stage['utilization'])
+    print(f"\nBottleneck: {bottleneck['stage']} ({bottleneck['utilization']:.0%} busy)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Player observation index
+
+Every analysis contributes one row per player seen (seated players and the
+hero) with site, table, seat, stack in BB and time. Rows live in SQLite with
+indexes on (player, site, time) and (site, table, time), and a trigger
+keeps a per-site 1 BB stack histogram, so history, table and
+stack-distribution queries stay in the millisecond range over millions of
+observations. The index is fed incrementally through a ResultsStore
+listener, or rebuilt from a results directory. Both key the rows by the
+absolute path of the result file, so a result is indexed once either way,
+and frames of one video (which share a source_path) each keep their rows.
+
+Usage (from the app directory):
+    python -m service.player_index build results
+    python -m service.player_index history BelezIIAAa
+    python -m service.player_index table yaya --table 46
+    python -m service.player_index stacks --site yaya
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from .hand_aggregator import analysis_time, load_results
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    table_id TEXT NOT NULL DEFAULT '',
+    player TEXT NOT NULL,
+    seat TEXT NOT NULL,
+    stack_bb REAL,
+    hand_id INTEGER,
+    observed_at REAL NOT NULL,
+    source TEXT,
+    UNIQUE (source, seat)
+);
+CREATE INDEX IF NOT EXISTS idx_observations_player ON observations (player, site, observed_at);
+CREATE INDEX IF NOT EXISTS idx_observations_table ON observations (site, table_id, observed_at);
+CREATE INDEX IF NOT EXISTS idx_observations_time ON observations (site, observed_at);
+
+CREATE TABLE IF NOT EXISTS stack_summary (
+    site TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    min_bb REAL NOT NULL,
+    max_bb REAL NOT NULL,
+    PRIMARY KEY (site, bucket)
+);
+CREATE TRIGGER IF NOT EXISTS trg_observations_stack AFTER INSERT ON observations
+WHEN NEW.stack_bb IS NOT NULL
+BEGIN
+    INSERT INTO stack_summary (site, bucket, count, total, min_bb, max_bb)
+    VALUES (NEW.site, CAST(NEW.stack_bb AS INTEGER), 1, NEW.stack_bb, NEW.stack_bb, NEW.stack_bb)
+    ON CONFLICT (site, bucket) DO UPDATE SET
+        count = count + 1,
+        total = total + excluded.total,
+        min_bb = MIN(min_bb, excluded.min_bb),
+        max_bb = MAX(max_bb, excluded.max_bb);
+END;
+"""
+
+
+def observations_from_analysis(analysis_results: Dict[str, Any], source: Optional[str] = None) -> List[tuple]:
+    """Rows for the ``observations`` table from one analysis result."""
+    insights = analysis_results.get('poker_insights') or {}
+    player_info = insights.get('player_info', {})
+    hand_id = insights.get('game_state', {}).get('current_hand_id')
+    table = insights.get('tournament_info', {}).get('table')
+    site = analysis_results.get('site', 'unknown')
+    observed_at = analysis_time(analysis_results).timestamp()
+    source = source or analysis_results.get('source_path') or analysis_results.get('image_file')
+    table_id = '' if table is None else str(table)
+
+    rows = []
+    for player in player_info.get('active_players', []):
+        if player.get('name'):
+            rows.append((site, table_id, player['name'], player['seat'], player.get('stack_bb'),
+                         hand_id, observed_at, source))
+    if player_info.get('hero_name'):
+        rows.append((site, table_id, player_info['hero_name'], 'hero', player_info.get('hero_stack_bb'),
+                     hand_id, observed_at, source))
+    return rows
+
+
+class PlayerIndex:
+    def __init__(self, db_path: str = "players.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if db_path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def add_analysis(self, analysis_results: Dict[str, Any], source: Optional[str] = None) -> int:
+        return self.add_many([(analysis_results, source)])
+
+    def add_many(self, items: Iterable) -> int:
+        """Index ``(analysis_results, source)`` pairs in one transaction; already indexed sources are skipped."""
+        rows = [row for analysis_results, source in items
+                for row in observations_from_analysis(analysis_results, source)]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO observations "
+                "(site, table_id, player, seat, stack_bb, hand_id, observed_at, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            return self._conn.total_changes - before
+
+    def on_saved(self, analysis_results: Dict[str, Any], filepath: str):
+        """ResultsStore listener."""
+        self.add_analysis(analysis_results, os.path.abspath(filepath))
+
+    def player_history(self, player: str, site: Optional[str] = None, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        clauses, params = self._time_filter(since, until)
+        clauses.insert(0, "player = ?")
+        params.insert(0, player)
+        if site:
+            clauses.insert(1, "site = ?")
+            params.insert(1, site)
+        return self._query(
+            f"SELECT site, table_id, seat, stack_bb, hand_id, observed_at "
+            f"FROM observations INDEXED BY idx_observations_player "
+            f"WHERE {' AND '.join(clauses)} ORDER BY observed_at DESC LIMIT ?", params + [limit]
+        )
+
+    def table_players(self, site: str, table: Optional[str] = None, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        clauses, params = self._time_filter(since, until)
+        clauses.insert(0, "site = ?")
+        params.insert(0, site)
+        if table is not None:
+            clauses.insert(1, "table_id = ?")
+            params.insert(1, str(table))
+        return self._query(
+            f"SELECT player, COUNT(*) AS observations, MIN(observed_at) AS first_seen, "
+            f"MAX(observed_at) AS last_seen, AVG(stack_bb) AS avg_stack_bb "
+            f"FROM observations INDEXED BY idx_observations_table "
+            f"WHERE {' AND '.join(clauses)} GROUP BY player ORDER BY last_seen DESC", params
+        )
+
+    def stack_distribution(self, site: Optional[str] = None, player: Optional[str] = None,
+                           since: Optional[datetime] = None, until: Optional[datetime] = None,
+                           bucket_bb: float = 5.0) -> Dict[str, Any]:
+        """
+        Count, mean, min/max, p50/p90 and a histogram of stacks in BB. Site-wide
+        queries without a time range read the trigger-maintained histogram, so
+        their percentiles are interpolated within 1 BB buckets.
+        """
+        if player is None and since is None and until is None:
+            return self._summary_distribution(site, bucket_bb)
+
+        clauses, params = self._time_filter(since, until)
+        clauses.insert(0, "stack_bb IS NOT NULL")
+        if player:
+            index = "idx_observations_player"
+            clauses.insert(0, "player = ?")
+            params.insert(0, player)
+            if site:
+                clauses.insert(1, "site = ?")
+                params.insert(1, site)
+        else:
+            index = "idx_observations_time"
+            if site:
+                clauses.insert(0, "site = ?")
+                params.insert(0, site)
+
+        with self._lock:
+            values = sorted(row[0] for row in self._conn.execute(
+                f"SELECT stack_bb FROM observations INDEXED BY {index} WHERE {' AND '.join(clauses)}", params
+            ))
+
+        buckets = {}
+        for value in values:
+            bucket = int(value // bucket_bb) * bucket_bb
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+        return {
+            'count': len(values),
+            'mean': sum(values) / len(values) if values else None,
+            'min': values[0] if values else None,
+            'max': values[-1] if values else None,
+            'p50': values[int(0.5 * (len(values) - 1))] if values else None,
+            'p90': values[int(0.9 * (len(values) - 1))] if values else None,
+            'bucket_bb': bucket_bb,
+            'buckets': [{'bucket_bb': bucket, 'count': count} for bucket, count in sorted(buckets.items())]
+        }
+
+    def _summary_distribution(self, site: Optional[str], bucket_bb: float) -> Dict[str, Any]:
+        rows = self._query(
+            "SELECT bucket, SUM(count) AS count, SUM(total) AS total, MIN(min_bb) AS min_bb, "
+            "MAX(max_bb) AS max_bb FROM stack_summary" + (" WHERE site = ?" if site else "") +
+            " GROUP BY bucket ORDER BY bucket", [site] if site else []
+        )
+        count = sum(row['count'] for row in rows)
+
+        def percentile(q: float) -> Optional[float]:
+            target = q * count
+            seen = 0
+            for row in rows:
+                if seen + row['count'] >= target:
+                    lower = max(row['bucket'], row['min_bb'])
+                    upper = min(row['bucket'] + 1, row['max_bb'])
+                    return lower + (upper - lower) * (target - seen) / row['count']
+                seen += row['count']
+            return None
+
+        buckets = {}
+        for row in rows:
+            bucket = int(row['bucket'] // bucket_bb) * bucket_bb
+            buckets[bucket] = buckets.get(bucket, 0) + row['count']
+        return {
+            'count': count,
+            'mean': sum(row['total'] for row in rows) / count if count else None,
+            'min': rows[0]['min_bb'] if rows else None,
+            'max': rows[-1]['max_bb'] if rows else None,
+            'p50': percentile(0.5) if count else None,
+            'p90': percentile(0.9) if count else None,
+            'bucket_bb': bucket_bb,
+            'buckets': [{'bucket_bb': bucket, 'count': bucket_count} for bucket, bucket_count in sorted(buckets.items())]
+        }
+
+    def count(self) -> int:
+        return self._query("SELECT COUNT(*) AS count FROM observations", [])[0]['count']
+
+    @staticmethod
+    def _time_filter(since: Optional[datetime], until: Optional[datetime]):
+        clauses, params = [], []
+        if since:
+            clauses.append("observed_at >= ?")
+            params.append(since.timestamp())
+        if until:
+            clauses.append("observed_at < ?")
+            params.append(until.timestamp())
+        return clauses, params
+
+    def _query(self, sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query or rebuild the player observation index")
+    parser.add_argument('--db', default='players.db')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="Index every result file in a directory")
+    build.add_argument('results_dir', nargs='?', default='results')
+
+    history = subparsers.add_parser('history', help="Stack history for one player")
+    history.add_argument('player')
+    history.add_argument('--site')
+    history.add_argument('--limit', type=int, default=50)
+
+    table = subparsers.add_parser('table', help="Players seen at a table")
+    table.add_argument('site')
+    table.add_argument('--table')
+
+    stacks = subparsers.add_parser('stacks', help="Stack distribution in BB")
+    stacks.add_argument('--site')
+    stacks.add_argument('--player')
+    stacks.add_argument('--bucket', type=float, default=5.0)
+
+    args = parser.parse_args(argv)
+    index = PlayerIndex(args.db)
+
+    if args.command == 'build':
+        added = index.add_many((analysis_results, os.path.abspath(analysis_results['result_path']))
+                               for analysis_results in load_results(args.results_dir))
+        print(f"Indexed {added} new observations ({index.count()} total) in {os.path.abspath(args.db)}")
+
+    elif args.command == 'history':
+        for row in index.player_history(args.player, args.site, limit=args.limit):
+            stack = f"{row['stack_bb']:.2f} BB" if row['stack_bb'] is not None else "-"
+            print(f"{_format_time(row['observed_at'])}  {row['site']:<8} table {row['table_id'] or '?':<4} "
+                  f"{row['seat']:<8} {stack}")
+
+    elif args.command == 'table':
+        for row in index.table_players(args.site, args.table):
+            avg_stack = f"{row['avg_stack_bb']:.2f} BB" if row['avg_stack_bb'] is not None else "-"
+            print(f"{row['player']:<20} {row['observations']:6d} obs  last {_format_time(row['last_seen'])}  "
+                  f"avg {avg_stack}")
+
+    elif args.command == 'stacks':
+        distribution = index.stack_distribution(args.site, args.player, bucket_bb=args.bucket)
+        print(f"{distribution['count']} stacks, mean {distribution['mean'] or 0:.2f} BB, "
+              f"p50 {distribution['p50'] or 0:.2f} BB, p90 {distribution['p90'] or 0:.2f} BB")
+        for bucket in distribution['buckets']:
+            print(f"  {bucket['bucket_bb']:7.1f}+ BB  {bucket['count']}")
+
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
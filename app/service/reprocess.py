@@ -0,0 +1,184 @@
+"""
+Reprocess logged OCR candidates
+
+Re-runs everything after OCR over a candidate log (see ocr.candidate_log):
+cleaning of the raw text, validation and scoring, selection of the winner,
+name lexicon snapping, parsing and poker insights. The OCR engines are not
+loaded. Use it after changing TextCleaner, TextValidator, result scoring
+or the insights to see their effect on the whole archive.
+
+The name lexicon is applied as it is on disk but not written back. Each
+record is compared with the text stored at analysis time. The summary
+counts changed regions per region type; ``--show-changes`` prints examples.
+
+Usage (from the app directory):
+    python -m service.reprocess ocr_candidates.jsonl.gz --output reprocessed.jsonl.gz --workers 4
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import multiprocessing
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Tuple
+
+try:
+    from ocr.analysis_engine import PokerAnalysisEngine
+    from ocr.candidate_log import read_lines
+    from ocr.config import OCRConfig
+    from ocr.name_lexicon import NameLexicon
+    from ocr.text_extractor import TextExtractor
+    OCR_AVAILABLE = True
+except ImportError:
+    PokerAnalysisEngine = None
+    read_lines = None
+    OCRConfig = None
+    NameLexicon = None
+    TextExtractor = None
+    OCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class Reprocessor:
+    def __init__(self, engine=None, clean_cache_size: int = 100000):
+        if engine is None:
+            engine = PokerAnalysisEngine(
+                name_lexicon=NameLexicon(save_every=0, learn=False) if OCRConfig.NAME_LEXICON_ENABLED else None,
+                text_extractor=TextExtractor(load_readers=False)
+            )
+            # Reprocessing must not append to the log it reads
+            engine.candidate_log = None
+        self.engine = engine
+        self.text_extractor = engine.text_extractor
+        self.clean_cache_size = clean_cache_size
+        self._cleaned = {}
+
+    def reprocess(self, record: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Tuple[str, str, str, str]]]:
+        """Analysis results rebuilt from one record, and ``(region, type, old, new)`` for changed texts."""
+        template = {
+            'site': record['site'],
+            'player_count': record['template_info'].get('player_count'),
+            'regions': record['regions']
+        }
+        analysis_results = self.engine._new_results(record['image_size'], template, record['image_file'])
+        changes = []
+        for region_key, region_data in record['regions'].items():
+            region_result = self._region_result(region_key, region_data, record['site'])
+            analysis_results['extracted_data'][region_key] = region_result
+            if region_result['text'] != region_data['text']:
+                changes.append((region_key, region_data['type'], region_data['text'], region_result['text']))
+
+        analysis_results['timestamp'] = record['recorded_at']
+        return self.engine._finalize_results(analysis_results, record['processing_time']), changes
+
+    def _region_result(self, region_key: str, region_data: Dict[str, Any], site: str) -> Dict[str, Any]:
+        status = region_data.get('status')
+        if status == 'empty':
+            return self.engine._empty_result(region_key, region_data)
+        if status == 'pending':
+            return self.engine._pending_result(region_key, region_data)
+        if status == 'error':
+            return self.engine._failed_result(region_key, region_data, RuntimeError(region_data.get('error', '')))
+
+        region_type = region_data['type']
+        results = [
+            {'method': method, 'text': self._clean(raw_text, region_type), 'raw_text': raw_text, 'confidence': confidence}
+            for method, raw_text, confidence in region_data['candidates']
+        ]
+        best_result = self.text_extractor._select_best_result(results, region_type)
+        extraction_result = {
+            'text': best_result['text'] if best_result else '',
+            'confidence': best_result['confidence'] if best_result else 0,
+            'method': best_result['method'] if best_result else 'none',
+            'all_results': results
+        }
+        return self.engine._region_result(region_key, region_data, extraction_result, site)
+
+    def _clean(self, raw_text: str, region_type: str) -> str:
+        # The same raw reads recur across frames (stacks, names, blinds)
+        key = (raw_text, region_type)
+        cleaned = self._cleaned.get(key)
+        if cleaned is None:
+            if len(self._cleaned) >= self.clean_cache_size:
+                self._cleaned.clear()
+            cleaned = self._cleaned[key] = self.text_extractor.text_cleaner.clean_text(raw_text, region_type)
+        return cleaned
+
+
+_worker_reprocessor = None
+
+
+def _init_worker():
+    global _worker_reprocessor
+    _worker_reprocessor = Reprocessor()
+
+
+def _reprocess_line(line: str):
+    return _worker_reprocessor.reprocess(json.loads(line))
+
+
+def reprocess_lines(lines: Iterator[str], workers: int = 1,
+                    chunksize: int = 256) -> Iterator[Tuple[Dict[str, Any], List[Tuple[str, str, str, str]]]]:
+    """Reprocessed results in log order, spread over ``workers`` processes."""
+    if workers <= 1:
+        reprocessor = Reprocessor()
+        for line in lines:
+            yield reprocessor.reprocess(json.loads(line))
+        return
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        yield from pool.imap(_reprocess_line, lines, chunksize=chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run cleaning, selection and insights over logged OCR candidates")
+    parser.add_argument('logs', nargs='*', help="Candidate logs (default: the configured log)")
+    parser.add_argument('--output', help="Write reprocessed results as JSON Lines (gzip if it ends in .gz)")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--show-changes', type=int, default=0, metavar='N',
+                        help="Print up to N regions whose text changed")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not OCR_AVAILABLE:
+        raise SystemExit("OCR package not available - install dependencies: pytesseract, opencv-python")
+
+    paths = args.logs or [OCRConfig.CANDIDATE_LOG_PATH]
+    lines = (line for path in paths for line in read_lines(path))
+    output = None
+    if args.output:
+        output = (gzip.open(args.output, 'wt', encoding='utf-8') if args.output.endswith('.gz')
+                  else open(args.output, 'w', encoding='utf-8'))
+
+    records = 0
+    changed_records = 0
+    changed_types = Counter()
+    examples = []
+    started = time.perf_counter()
+    try:
+        for analysis_results, changes in reprocess_lines(lines, args.workers):
+            records += 1
+            if changes:
+                changed_records += 1
+                changed_types.update(region_type for _, region_type, _, _ in changes)
+                examples.extend((analysis_results['image_file'],) + change
+                                for change in changes[:args.show_changes - len(examples)])
+            if output:
+                output.write(json.dumps(analysis_results, ensure_ascii=False) + '\n')
+    finally:
+        if output:
+            output.close()
+    elapsed = time.perf_counter() - started
+
+    print(f"{records} analyses in {elapsed:.1f}s ({records / elapsed if elapsed > 0 else 0:.0f}/s), "
+          f"{changed_records} with changed text")
+    for region_type, count in changed_types.most_common():
+        print(f"  {region_type:<24}{count:>8}")
+    for image_file, region_key, _, old, new in examples:
+        print(f"  {image_file} {region_key}: {old!r} -> {new!r}")
+
+
+if __name__ == "__main__":
+    main()
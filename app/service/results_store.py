@@ -0,0 +1,69 @@
+"""
+Results Store
+
+Persists analysis results as YAML files in the results directory,
+using the same naming scheme as the desktop UI. Listeners registered with
+``add_listener`` are called with ``(analysis_results, filepath)`` after
+each save, e.g. to keep the player index up to date.
+"""
+
+import logging
+import os
+import re
+import threading
+import yaml
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResultsStore:
+    def __init__(self, results_dir: str = "results"):
+        self.results_dir = results_dir
+        self._lock = threading.Lock()
+        self._listeners = []
+        os.makedirs(self.results_dir, exist_ok=True)
+
+    def add_listener(self, listener: Callable[[Dict[str, Any], str], None]):
+        self._listeners.append(listener)
+
+    def build_filename(self, analysis_results: Dict[str, Any], site: Optional[str] = None,
+                       image_name: Optional[str] = None) -> str:
+        site = site or analysis_results.get('site', 'unknown')
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        player_count = analysis_results.get('template_info', {}).get('player_count')
+        if site == 'yaya' and player_count:
+            base = f"{site}_{player_count}p_analysis_{timestamp}"
+        else:
+            base = f"{site}_analysis_{timestamp}"
+
+        if image_name:
+            stem = os.path.splitext(os.path.basename(image_name))[0]
+            base += "_" + re.sub(r'[^\w\-]', '_', stem)
+
+        return f"{base}.yml"
+
+    def save(self, analysis_results: Dict[str, Any], site: Optional[str] = None,
+             image_name: Optional[str] = None) -> str:
+        filename = self.build_filename(analysis_results, site, image_name)
+        filepath = os.path.join(self.results_dir, filename)
+
+        with self._lock:
+            counter = 1
+            while os.path.exists(filepath):
+                filepath = os.path.join(self.results_dir, f"{filename[:-4]}_{counter}.yml")
+                counter += 1
+
+            with open(filepath, 'w') as f:
+                yaml.dump(analysis_results, f, default_flow_style=False,
+                          sort_keys=False, allow_unicode=True)
+
+        for listener in self._listeners:
+            try:
+                listener(analysis_results, filepath)
+            except Exception:
+                logger.exception("Results listener failed for %s", filepath)
+
+        return filepath
@@ -0,0 +1,349 @@
+"""
+Local HTTP/JSON analysis service
+
+Keeps a pool of warm analysis engines (each with its own TextExtractor and
+loaded EasyOCR models) so other tools on the machine can analyse
+screenshots without paying model load time on every call.
+
+Endpoints:
+    POST /analyze          JSON {"template": "yaya_6p", "image_path": "..."}
+                           or {"template": ..., "image_base64": "..."}
+                           or a raw image body with ?template=yaya_6p
+    POST /analyze/batch    JSON {"template": ..., "items": [{...}, ...]}
+    GET  /health
+    GET  /metrics          Prometheus text format
+
+Usage (from the app directory):
+    python -m service.server --port 8765 --workers 2
+"""
+
+import argparse
+import base64
+import io
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+from .metrics import MetricsRegistry
+from .templates import load_templates
+
+try:
+    from ocr.analysis_engine import PokerAnalysisEngine
+    OCR_AVAILABLE = True
+except ImportError:
+    PokerAnalysisEngine = None
+    OCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0]
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class AnalysisService:
+    """
+    Pool of warm engines behind a bounded executor. At most ``max_queue``
+    images wait for a free engine; requests beyond that get a 503. A
+    request's timeout is also the engine's deadline, so regions not read in
+    time come back pending instead of holding the engine.
+    """
+
+    def __init__(self, templates: Dict[str, Dict[str, Any]], workers: int = 2, default_timeout: float = 60.0,
+                 max_batch_size: int = 32, engine_factory: Optional[Callable[[], Any]] = None,
+                 max_queue: Optional[int] = None):
+        engine_factory = engine_factory or PokerAnalysisEngine
+        if engine_factory is None:
+            raise RuntimeError("OCR engine not available - install dependencies: pytesseract, easyocr, opencv-python")
+
+        self.templates = templates
+        self.workers = max(1, workers)
+        self.default_timeout = default_timeout
+        self.max_batch_size = max_batch_size
+        self.max_queue = max_queue if max_queue is not None else max(max_batch_size, self.workers * 4)
+
+        self._engines = queue.Queue()
+        for _ in range(self.workers):
+            self._engines.put(engine_factory())
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='analysis')
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+        self.metrics = MetricsRegistry(prefix='analysis_')
+        self.requests_total = self.metrics.counter('requests_total', 'HTTP requests handled')
+        self.errors_total = self.metrics.counter('errors_total', 'Requests that returned an error')
+        self.timeouts_total = self.metrics.counter('timeouts_total', 'Analyses that exceeded their timeout')
+        self.rejected_total = self.metrics.counter('rejected_total', 'Images refused because the queue was full')
+        self.images_total = self.metrics.counter('images_total', 'Images analysed')
+        self.metrics.gauge('workers', 'Warm engines in the pool', fn=lambda: self.workers)
+        self.metrics.gauge('in_flight', 'Images submitted and not yet finished', fn=lambda: self._in_flight)
+        self.request_latency = self.metrics.histogram('request_seconds', 'End-to-end request latency',
+                                                      LATENCY_BUCKETS)
+        self.engine_latency = self.metrics.histogram('engine_seconds', 'Engine time per image', LATENCY_BUCKETS)
+        self.queue_latency = self.metrics.histogram('queue_seconds', 'Wait for a free engine', LATENCY_BUCKETS)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def get_template(self, name: Optional[str]) -> Dict[str, Any]:
+        if not name:
+            raise RequestError(400, "Missing 'template'")
+        if name not in self.templates:
+            raise RequestError(404, f"Unknown template '{name}'")
+        return self.templates[name]
+
+    def submit(self, image_source, template: Dict[str, Any], image_name: Optional[str] = None,
+               deadline: Optional[float] = None):
+        """Queue one image; ``deadline`` is a ``time.time()`` by which the engine should finish."""
+        self._reserve(1)
+        return self._submit(image_source, template, image_name, deadline)
+
+    def _reserve(self, count: int):
+        with self._in_flight_lock:
+            if self._in_flight + count > self.workers + self.max_queue:
+                self.rejected_total.inc(count)
+                raise RequestError(503, "Analysis queue is full, try again later")
+            self._in_flight += count
+
+    def _release(self, future=None):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+
+    def _submit(self, image_source, template: Dict[str, Any], image_name: Optional[str], deadline: Optional[float]):
+        try:
+            future = self._executor.submit(self._run, image_source, template, image_name, time.time(), deadline)
+        except Exception:
+            self._release()
+            raise
+        # Also called for futures cancelled before they started
+        future.add_done_callback(self._release)
+        return future
+
+    def analyze(self, image_source, template: Dict[str, Any], image_name: Optional[str] = None,
+                timeout: Optional[float] = None) -> Dict[str, Any]:
+        return self.analyze_batch([(image_source, image_name)], template, timeout)[0]
+
+    def analyze_batch(self, items: List, template: Dict[str, Any], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        if len(items) > self.max_batch_size:
+            raise RequestError(413, f"Batch of {len(items)} exceeds limit of {self.max_batch_size}")
+
+        deadline = time.time() + (timeout or self.default_timeout)
+        self._reserve(len(items))
+        futures = []
+        try:
+            for source, name in items:
+                futures.append(self._submit(source, template, name, deadline))
+        finally:
+            # Reservations of items that could not be submitted
+            for _ in range(len(items) - len(futures)):
+                self._release()
+
+        results = []
+        for future, (source, name) in zip(futures, items):
+            try:
+                results.append(future.result(timeout=max(0.0, deadline - time.time())))
+            except FutureTimeout:
+                # Not started yet: dropped. Running: the engine deadline stops it shortly
+                future.cancel()
+                self.timeouts_total.inc()
+                results.append({'error': 'Analysis timed out', 'image_file': name or 'unknown'})
+        return results
+
+    def _run(self, image_source, template: Dict[str, Any], image_name: Optional[str], submitted_at: float,
+             deadline: Optional[float] = None):
+        engine = self._engines.get()
+        try:
+            started = time.time()
+            self.queue_latency.observe(started - submitted_at)
+            if deadline is not None and started >= deadline:
+                self.timeouts_total.inc()
+                return {'error': 'Analysis timed out', 'image_file': image_name or 'unknown'}
+            budget = deadline - started if deadline is not None else None
+            result = engine.analyze_poker_image(image_source, template, image_name=image_name, deadline=budget)
+            self.engine_latency.observe(time.time() - started)
+            self.images_total.inc()
+            return result
+        finally:
+            self._engines.put(engine)
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    service = None
+    max_body_bytes = 32 * 1024 * 1024
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/metrics':
+            self._send(200, self.service.metrics.render_prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+        elif path == '/health':
+            self._send_json(200, {
+                'status': 'ok',
+                'workers': self.service.workers,
+                'templates': sorted(self.service.templates)
+            })
+        else:
+            self._send_json(404, {'error': f"Unknown endpoint {path}"})
+
+    def do_POST(self):
+        started = time.time()
+        self.service.requests_total.inc()
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        try:
+            if url.path == '/analyze':
+                status, payload = 200, self._handle_analyze(params)
+            elif url.path == '/analyze/batch':
+                status, payload = 200, self._handle_batch(params)
+            else:
+                raise RequestError(404, f"Unknown endpoint {url.path}")
+        except RequestError as e:
+            status, payload = e.status, {'error': str(e)}
+        except Exception as e:
+            logger.exception("Request failed")
+            status, payload = 500, {'error': f"Analysis failed: {str(e)}"}
+
+        if status != 200:
+            self.service.errors_total.inc()
+        self.service.request_latency.observe(time.time() - started)
+        self._send_json(status, payload)
+
+    def _handle_analyze(self, params: Dict[str, str]) -> Dict[str, Any]:
+        content_type = self.headers.get('Content-Type', '')
+        body = self._read_body()
+
+        if content_type.startswith('image/') or content_type == 'application/octet-stream':
+            template = self.service.get_template(params.get('template'))
+            image = self._decode_image(body)
+            result = self.service.analyze(image, template, params.get('name', 'upload'),
+                                          self._timeout(params.get('timeout')))
+        else:
+            request = self._parse_json(body)
+            template = self.service.get_template(request.get('template') or params.get('template'))
+            source, name = self._image_from_item(request)
+            result = self.service.analyze(source, template, name,
+                                          self._timeout(request.get('timeout', params.get('timeout'))))
+
+        if result.get('error') == 'Analysis timed out':
+            raise RequestError(504, result['error'])
+        return result
+
+    def _handle_batch(self, params: Dict[str, str]) -> Dict[str, Any]:
+        request = self._parse_json(self._read_body())
+        template = self.service.get_template(request.get('template') or params.get('template'))
+        items = request.get('items')
+        if not isinstance(items, list) or not items:
+            raise RequestError(400, "'items' must be a non-empty list")
+
+        sources = [self._image_from_item(item) for item in items]
+        results = self.service.analyze_batch(sources, template,
+                                             self._timeout(request.get('timeout', params.get('timeout'))))
+        return {'results': results}
+
+    def _image_from_item(self, item: Dict[str, Any]):
+        if item.get('image_path'):
+            return item['image_path'], None
+        if item.get('image_base64'):
+            try:
+                data = base64.b64decode(item['image_base64'])
+            except ValueError:
+                raise RequestError(400, "Invalid base64 image data")
+            return self._decode_image(data), item.get('name', 'upload')
+        raise RequestError(400, "Each request needs 'image_path' or 'image_base64'")
+
+    def _decode_image(self, data: bytes) -> Image.Image:
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+            return image
+        except Exception as e:
+            raise RequestError(400, f"Cannot decode image: {str(e)}")
+
+    def _timeout(self, value) -> Optional[float]:
+        if value in (None, ''):
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise RequestError(400, f"Invalid timeout '{value}'")
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > self.max_body_bytes:
+            raise RequestError(413, "Request body too large")
+        return self.rfile.read(length)
+
+    def _parse_json(self, body: bytes) -> Dict[str, Any]:
+        try:
+            request = json.loads(body or b'{}')
+        except ValueError:
+            raise RequestError(400, "Request body is not valid JSON")
+        if not isinstance(request, dict):
+            raise RequestError(400, "Request body must be a JSON object")
+        return request
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        self._send(status, json.dumps(payload, default=str).encode('utf-8'), 'application/json')
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+def create_server(service: AnalysisService, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    handler = type('BoundAnalysisRequestHandler', (AnalysisRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve poker screenshot analysis over local HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2, help="Number of warm OCR engines")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Default per-request timeout in seconds")
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-queue', type=int, help="Images allowed to wait for an engine before returning 503 "
+                                                     "(default: the larger of the batch size and 4 x workers)")
+    parser.add_argument('--templates-dir', default='templates')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    templates = load_templates(args.templates_dir)
+    logger.info("Loading %d OCR engines...", args.workers)
+    service = AnalysisService(templates, workers=args.workers, default_timeout=args.timeout,
+                              max_batch_size=args.max_batch_size, max_queue=args.max_queue)
+    server = create_server(service, args.host, args.port)
+    logger.info("Listening on http://%s:%d (templates: %s)", args.host, args.port, ", ".join(templates) or "none")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
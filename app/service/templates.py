@@ -0,0 +1,37 @@
+"""
+Template lookup helpers for headless services
+"""
+
+import json
+import os
+from typing import Any, Dict
+
+
+def load_templates(templates_dir: str = "templates") -> Dict[str, Dict[str, Any]]:
+    """Load saved templates keyed by name (e.g. 'yaya_6p') and by site."""
+    templates = {}
+    if not os.path.isdir(templates_dir):
+        return templates
+
+    for filename in sorted(os.listdir(templates_dir)):
+        if not filename.endswith('_template.json'):
+            continue
+        with open(os.path.join(templates_dir, filename), 'r') as f:
+            template_data = json.load(f)
+        name = filename[:-len('_template.json')]
+        templates[name] = template_data
+        templates.setdefault(template_data.get('site', name), template_data)
+
+    return templates
+
+
+def resolve_template(name_or_path: str, templates_dir: str = "templates") -> Dict[str, Any]:
+    if os.path.isfile(name_or_path):
+        with open(name_or_path, 'r') as f:
+            return json.load(f)
+
+    templates = load_templates(templates_dir)
+    if name_or_path not in templates:
+        available = ", ".join(templates) or "none"
+        raise ValueError(f"Unknown template '{name_or_path}' (available: {available})")
+    return templates[name_or_path]
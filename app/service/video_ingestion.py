@@ -0,0 +1,222 @@
+"""
+Session-recording ingestion
+
+Decodes a local video file with OpenCV and analyses only the frames where
+the table state changed. Frames are sampled every ``sample_interval``
+seconds. ``grab()`` skips the frames in between without colour conversion
+or copying. Each sampled frame is hashed pixel by pixel over the template's
+regions (see ocr.frame_dedupe). A frame is analysed once its hash differs
+from the last analysed state and the next sample confirms it (``settle``),
+so transitions and animations are not read half-drawn. Any difference
+counts: a stack going from 8 to 9 BB changes only a few pixels, and one
+that goes back to 8 BB is a new state too.
+
+Frames go to the engine as in-memory BGR arrays; nothing is written to
+disk except the results. Every result carries the frame index, the offset
+into the recording (``frame_offset``, seconds) and a wall-clock
+``timestamp`` derived from the recording's end time (file mtime) minus its
+duration.
+
+Usage (from the app directory):
+    python -m service.video_ingestion session.mp4 --template yaya_6p --hands-output hands.jsonl
+"""
+
+import argparse
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from .hand_aggregator import HandAggregator, HandRecordWriter
+from .metrics import MetricsRegistry
+from .results_store import ResultsStore
+from .templates import resolve_template
+
+try:
+    import cv2
+    from ocr.analysis_engine import PokerAnalysisEngine
+    from ocr.frame_dedupe import FrameDeduper
+    from ocr.frame_gate import FrameGate
+    OCR_AVAILABLE = True
+except ImportError:
+    cv2 = None
+    PokerAnalysisEngine = None
+    FrameDeduper = None
+    FrameGate = None
+    OCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class VideoIngestion:
+    def __init__(self, video_path: str, template: Dict[str, Any], on_result: Callable[[Dict[str, Any]], None],
+                 engine=None, sample_interval: float = 0.5, settle: bool = True,
+                 frame_gate: Optional['FrameGate'] = None, recent_states: int = 1,
+                 start_time: Optional[datetime] = None):
+        self.video_path = video_path
+        self.template = template
+        self.on_result = on_result
+        self.engine = engine or PokerAnalysisEngine()
+        self.sample_interval = sample_interval
+        self.settle = settle
+        self.frame_gate = frame_gate
+        # Exact full-resolution hashes whatever the screenshot dedupe is tuned to;
+        # recent_states above 1 also skips returns to older states (A -> B -> A)
+        self.deduper = FrameDeduper(template, max_entries=recent_states, max_distance=0, cell=1)
+
+        self.capture = cv2.VideoCapture(video_path)
+        if not self.capture.isOpened():
+            raise ValueError(f"Cannot open video {video_path}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.duration = self.frame_count / self.fps if self.frame_count > 0 else 0.0
+        self.start_time = start_time or (datetime.fromtimestamp(os.path.getmtime(video_path)) -
+                                         timedelta(seconds=self.duration))
+
+        self.metrics = MetricsRegistry(prefix='video_')
+        self.frames_decoded = self.metrics.counter('frames_decoded_total', 'Frames grabbed from the video')
+        self.frames_sampled = self.metrics.counter('frames_sampled_total', 'Frames retrieved and hashed')
+        self.frames_unchanged = self.metrics.counter('frames_unchanged_total', 'Samples matching a known state')
+        self.frames_unsettled = self.metrics.counter('frames_unsettled_total',
+                                                     'Changed samples not confirmed by the next sample')
+        self.frames_gated = self.metrics.counter('frames_gated_total', 'Changed frames skipped by the frame gate')
+        self.frames_analyzed = self.metrics.counter('frames_analyzed_total', 'Frames run through the engine')
+        self.analysis_time = self.metrics.histogram('analysis_seconds', 'Engine time per frame')
+
+    def close(self):
+        self.capture.release()
+
+    def samples(self) -> Iterator[Tuple[int, float, Any]]:
+        """``(frame_index, offset_seconds, bgr_array)`` every ``sample_interval`` seconds."""
+        step = max(1, int(round(self.fps * self.sample_interval)))
+        index = -1
+        while True:
+            if not self.capture.grab():
+                return
+            index += 1
+            self.frames_decoded.inc()
+            if index % step:
+                continue
+            ok, frame = self.capture.retrieve()
+            if not ok:
+                return
+            self.frames_sampled.inc()
+            yield index, index / self.fps, frame
+
+    def run(self) -> int:
+        """Process the whole recording; returns the number of frames analysed."""
+        candidate = None
+        for index, offset, frame in self.samples():
+            signature = self.deduper.signature(frame)
+            if candidate is not None:
+                pending_index, pending_offset, pending_frame, pending_signature = candidate
+                candidate = None
+                if self._same_state(signature, pending_signature):
+                    self._analyze(pending_index, pending_offset, pending_frame, pending_signature)
+                    continue
+                self.frames_unsettled.inc()
+
+            if self.deduper.lookup(signature):
+                self.frames_unchanged.inc()
+                continue
+
+            if self.settle:
+                candidate = (index, offset, frame, signature)
+            else:
+                self._analyze(index, offset, frame, signature)
+
+        if candidate is not None:
+            self._analyze(*candidate)
+        return int(self.frames_analyzed.value)
+
+    def _same_state(self, signature, other) -> bool:
+        distance = self.deduper.distance(signature, other)
+        return distance is not None and distance <= self.deduper.max_distance
+
+    def _analyze(self, index: int, offset: float, frame, signature):
+        # Recorded even if gated or failed, so the same state is not retried on every sample
+        self.deduper.add(signature, index)
+        if self.frame_gate:
+            verdict = self.frame_gate.check(frame)
+            if not verdict['accepted']:
+                self.frames_gated.inc()
+                logger.debug("frame %d: %s (%s)", index, verdict['action'], verdict['reason'])
+                return
+
+        image_name = f"{os.path.basename(self.video_path)}@{offset:.2f}s"
+        started = time.perf_counter()
+        analysis_results = self.engine.analyze_poker_image(frame, self.template, image_name=image_name)
+        self.analysis_time.observe(time.perf_counter() - started)
+        if 'error' in analysis_results:
+            logger.error("%s: %s", image_name, analysis_results['error'])
+            return
+
+        self.frames_analyzed.inc()
+        analysis_results['timestamp'] = (self.start_time + timedelta(seconds=offset)).isoformat()
+        analysis_results['source_path'] = os.path.abspath(self.video_path)
+        analysis_results['frame_index'] = index
+        analysis_results['frame_offset'] = round(offset, 3)
+        self.on_result(analysis_results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse table state changes in a session recording")
+    parser.add_argument('video')
+    parser.add_argument('--template', required=True, help="Template name (e.g. yaya_6p) or path to a template JSON")
+    parser.add_argument('--templates-dir', default='templates')
+    parser.add_argument('--results-dir', default='results')
+    parser.add_argument('--sample-interval', type=float, default=0.5,
+                        help="Seconds of video between change checks")
+    parser.add_argument('--no-settle', action='store_true',
+                        help="Analyse a changed frame at once instead of waiting for the next sample to confirm it")
+    parser.add_argument('--frame-gate', action='store_true', help="Skip blurred or obstructed frames")
+    parser.add_argument('--start-time', help="Wall-clock start of the recording (ISO 8601); default mtime - duration")
+    parser.add_argument('--hands-output', help="Append one consolidated record per hand to this JSON Lines file")
+    parser.add_argument('--no-frame-results', action='store_true',
+                        help="Only keep hand records, not one YAML file per analysed frame")
+    args = parser.parse_args(argv)
+
+    if args.no_frame_results and not args.hands_output:
+        parser.error("--no-frame-results requires --hands-output")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not OCR_AVAILABLE:
+        raise SystemExit("OCR engine not available - install dependencies: pytesseract, easyocr, opencv-python")
+
+    template = resolve_template(args.template, args.templates_dir)
+    templates_dir = os.path.dirname(args.template) if os.path.isfile(args.template) else args.templates_dir
+    results_store = None if args.no_frame_results else ResultsStore(args.results_dir)
+    hand_aggregator = HandAggregator(on_hand=HandRecordWriter(args.hands_output)) if args.hands_output else None
+
+    def on_result(analysis_results):
+        if results_store:
+            results_store.save(analysis_results, template.get('site'), image_name=analysis_results['image_file'])
+        if hand_aggregator:
+            hand_aggregator.add(analysis_results)
+
+    ingestion = VideoIngestion(
+        args.video, template, on_result,
+        sample_interval=args.sample_interval,
+        settle=not args.no_settle,
+        frame_gate=FrameGate(template, templates_dir) if args.frame_gate else None,
+        start_time=datetime.fromisoformat(args.start_time) if args.start_time else None
+    )
+    started = time.perf_counter()
+    try:
+        analyzed = ingestion.run()
+    except KeyboardInterrupt:
+        analyzed = int(ingestion.frames_analyzed.value)
+    finally:
+        ingestion.close()
+        if hand_aggregator:
+            hand_aggregator.flush()
+
+    elapsed = time.perf_counter() - started
+    speed = ingestion.duration / elapsed if elapsed > 0 else 0.0
+    print(f"{ingestion.duration:.0f}s of video in {elapsed:.1f}s ({speed:.1f}x real time): "
+          f"{analyzed} frames analysed of {int(ingestion.frames_sampled.value)} sampled")
+    logger.info("metrics %s", ingestion.metrics.snapshot())
+
+
+if __name__ == "__main__":
+    main()
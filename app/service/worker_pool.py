@@ -0,0 +1,433 @@
+"""
+Fork-server analysis worker pool
+
+Builds one engine (imports, Tesseract configs and the EasyOCR detection and
+recognition weights) in the parent, freezes it, and forks the workers, so
+the model pages stay shared copy-on-write instead of being loaded once per
+worker. Before forking:
+
+- every torch module is switched to eval mode with ``requires_grad`` off, so
+  inference never writes to the weight tensors;
+- ``gc.freeze()`` moves every object alive at fork time into the permanent
+  generation, so the collector never writes GC headers into the shared
+  pages.
+
+The parent never runs inference itself. OpenMP thread pools and the region
+scheduler's executor are therefore only created after the fork, inside each
+worker.
+
+Each result carries the worker's memory: RSS, PSS (shared pages split
+between the processes that map them) and private bytes. PSS summed over the
+workers is the real footprint of the pool.
+
+Each worker gets its tasks and sends its results through its own pipe, and
+the parent hands it the next task only once it is idle. A worker that dies
+(OOM kill, segfault in a native library), busy or idle, therefore holds no
+lock another process waits on, and the parent always knows which task it
+was running. The parent waits on the pipes and the process sentinels
+together, replaces a dead worker with a new fork and resubmits its task
+once; if that task kills a second worker it comes back as an error result.
+
+Usage (from the app directory):
+    python -m service.worker_pool captures/*.png --template yaya_6p --workers 16
+"""
+
+import argparse
+import gc
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .metrics import MetricsRegistry, peak_rss_mb
+from .results_store import ResultsStore
+from .templates import resolve_template
+
+try:
+    from ocr.analysis_engine import PokerAnalysisEngine
+    OCR_AVAILABLE = True
+except ImportError:
+    PokerAnalysisEngine = None
+    OCR_AVAILABLE = False
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+logger = logging.getLogger(__name__)
+
+
+def memory_usage() -> Dict[str, Optional[float]]:
+    """RSS, PSS and private memory of the current process in MB (Linux); peak RSS elsewhere."""
+    usage = {'rss_mb': None, 'pss_mb': None, 'private_mb': None, 'peak_rss_mb': peak_rss_mb()}
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                    fields[key] = int(value.split()[0])
+    except OSError:
+        return usage
+
+    usage['rss_mb'] = fields.get('Rss', 0) / 1024
+    usage['pss_mb'] = fields.get('Pss', 0) / 1024
+    usage['private_mb'] = (fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)) / 1024
+    return usage
+
+
+def freeze_engine(engine) -> int:
+    """Make the engine's models read-only for inference and freeze the heap; returns frozen torch modules."""
+    frozen = 0
+    if torch is not None:
+        reader = getattr(getattr(getattr(engine, 'text_extractor', None), 'ocr_engine', None), 'easyocr_reader', None)
+        for name in ('detector', 'recognizer'):
+            model = getattr(reader, name, None)
+            if isinstance(model, torch.nn.Module):
+                model.eval()
+                for parameter in model.parameters():
+                    parameter.requires_grad_(False)
+                frozen += 1
+
+    gc.collect()
+    gc.freeze()
+    return frozen
+
+
+def _save_engine_state(engine):
+    # Forked workers exit without running atexit handlers; the stats files merge on save
+    text_extractor = getattr(engine, 'text_extractor', None)
+    savers = [
+        getattr(getattr(engine, 'candidate_log', None), 'flush', None),
+        getattr(getattr(engine, 'name_lexicon', None), 'save', None),
+        getattr(getattr(engine, 'empty_detector', None), 'save', None),
+        getattr(getattr(text_extractor, 'variant_selector', None), 'save', None)
+    ]
+    for save in savers:
+        if save is None:
+            continue
+        try:
+            save()
+        except Exception:
+            logger.exception("Could not save %s", type(save.__self__).__name__)
+
+
+def _worker_main(index: int, engine, connection, threads: int):
+    # Ctrl+C is handled by the parent, which stops the workers in order
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if torch is not None and threads:
+        torch.set_num_threads(threads)
+
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        task_id, image_source, template, image_name = task
+        started = time.perf_counter()
+        try:
+            analysis_results = engine.analyze_poker_image(image_source, template, image_name)
+        except Exception as e:
+            analysis_results = {'error': str(e), 'image_file': image_name}
+        connection.send((task_id, index, analysis_results, time.perf_counter() - started, memory_usage()))
+
+    _save_engine_state(engine)
+
+
+class ForkWorkerPool:
+    """
+    ``workers`` forked processes sharing one preloaded engine. Tasks and
+    results cross process boundaries through pipes, so image sources must
+    be paths or picklable arrays.
+    """
+
+    def __init__(self, workers: int = 4, engine_factory: Optional[Callable[[], Any]] = None,
+                 threads_per_worker: int = 1, max_task_attempts: int = 2):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("ForkWorkerPool needs the 'fork' start method (Linux or macOS)")
+        engine_factory = engine_factory or PokerAnalysisEngine
+        if engine_factory is None:
+            raise RuntimeError("OCR engine not available - install dependencies: pytesseract, easyocr, opencv-python")
+
+        self.worker_count = max(1, workers)
+        self.threads_per_worker = threads_per_worker
+        self.max_task_attempts = max(1, max_task_attempts)
+        self._context = multiprocessing.get_context('fork')
+        self._processes = []
+        self._connections = []
+        # Per worker, the id of the task it is running (None when idle)
+        self._assigned = []
+        self._next_task_id = 0
+        self._outstanding = 0
+        # task id -> (task, attempts) until its result is returned
+        self._pending = {}
+        # Ids of pending tasks not handed to a worker yet
+        self._waiting = deque()
+        self._failed = deque()
+        # Results read from the pipes of dead workers, not yet returned
+        self._received = deque()
+        self._lock = threading.Lock()
+
+        self.parent_memory = None
+        self.worker_memory = {}
+
+        started = time.perf_counter()
+        self._engine = engine_factory()
+        self.frozen_modules = freeze_engine(self._engine)
+        self.load_time = time.perf_counter() - started
+
+        self.metrics = MetricsRegistry(prefix='pool_')
+        self.tasks_completed = self.metrics.counter('tasks_completed_total', 'Images analysed by workers')
+        self.tasks_failed = self.metrics.counter('tasks_failed_total', 'Analyses that returned an error')
+        self.tasks_resubmitted = self.metrics.counter('tasks_resubmitted_total', 'Tasks of dead workers run again')
+        self.workers_died = self.metrics.counter('workers_died_total', 'Workers that exited unexpectedly')
+        self.metrics.gauge('workers', 'Forked workers', fn=lambda: self.worker_count)
+        self.metrics.gauge('outstanding', 'Tasks submitted and not yet returned', fn=lambda: self._outstanding)
+        self.metrics.gauge('parent_rss_mb', 'Parent RSS after loading the engine',
+                           fn=lambda: (self.parent_memory or {}).get('rss_mb') or 0)
+        self.metrics.gauge('workers_pss_mb', 'Proportional set size summed over workers',
+                           fn=lambda: sum(usage.get('pss_mb') or 0 for usage in self.worker_memory.values()))
+        self.metrics.gauge('workers_peak_rss_mb', 'Largest peak RSS of any worker',
+                           fn=lambda: max((usage.get('peak_rss_mb') or 0 for usage in self.worker_memory.values()),
+                                          default=0))
+        self.task_time = self.metrics.histogram('task_seconds', 'Engine time per image in a worker')
+
+    def start(self):
+        self.parent_memory = memory_usage()
+        for index in range(self.worker_count):
+            self._processes.append(None)
+            self._connections.append(None)
+            self._assigned.append(None)
+            self._fork(index)
+        logger.info("Forked %d workers from a %.0f MB parent (engine loaded in %.1fs)", self.worker_count,
+                    self.parent_memory.get('rss_mb') or self.parent_memory.get('peak_rss_mb') or 0, self.load_time)
+
+    def _fork(self, index: int):
+        connection, worker_connection = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, name=f"ocr-worker-{index}",
+            args=(index, self._engine, worker_connection, self.threads_per_worker),
+            daemon=True
+        )
+        process.start()
+        # Only the worker holds the other end, so its death shows up as end of file
+        worker_connection.close()
+        self._processes[index] = process
+        self._connections[index] = connection
+        self._assigned[index] = None
+
+    def _dispatch(self):
+        """Hand waiting tasks to idle workers, one task per worker. Call with the lock held."""
+        for index, connection in enumerate(self._connections):
+            while self._assigned[index] is None and self._waiting:
+                task_id = self._waiting.popleft()
+                if task_id not in self._pending:
+                    continue
+                try:
+                    connection.send(self._pending[task_id][0])
+                except OSError:
+                    # The worker is gone; its sentinel fires and _check_workers replaces it
+                    self._waiting.appendleft(task_id)
+                    break
+                self._assigned[index] = task_id
+
+    def _check_workers(self):
+        """Replace dead workers and resubmit or fail the task each one was running."""
+        for index, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+            self.workers_died.inc()
+            logger.warning("Worker %d died with exit code %s; forking a replacement", index, process.exitcode)
+            process.join()
+            # Another worker's death can bring us here before this worker's last result was read
+            connection = self._connections[index]
+            drained = set()
+            while connection.poll():
+                try:
+                    received = connection.recv()
+                except EOFError:
+                    break
+                self._received.append(received)
+                drained.add(received[0])
+            connection.close()
+
+            with self._lock:
+                task_id = self._assigned[index]
+                self._fork(index)
+                pending = self._pending.get(task_id) if task_id not in drained else None
+                if pending is not None:
+                    task, attempts = pending
+                    if attempts >= self.max_task_attempts:
+                        del self._pending[task_id]
+                        self._failed.append((task_id, index, {
+                            'error': f"Worker died analysing this image (exit code {process.exitcode})",
+                            'image_file': task[3]
+                        }))
+                    else:
+                        self._pending[task_id] = (task, attempts + 1)
+                        self._waiting.appendleft(task_id)
+                        self.tasks_resubmitted.inc()
+                self._dispatch()
+
+    def stop(self, timeout: float = 10.0):
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        for connection in self._connections:
+            connection.close()
+        self._processes = []
+        self._connections = []
+        self._assigned = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def submit(self, image_source, template: Dict[str, Any], image_name: Optional[str] = None) -> int:
+        """Queue one image for the next idle worker. Returns the task id."""
+        with self._lock:
+            task_id = self._next_task_id
+            self._next_task_id += 1
+            self._outstanding += 1
+            self._pending[task_id] = ((task_id, image_source, template, image_name), 1)
+            self._waiting.append(task_id)
+            self._dispatch()
+        return task_id
+
+    def get_result(self, timeout: Optional[float] = None) -> Tuple[int, Dict[str, Any]]:
+        """Next finished task; raises ``queue.Empty`` after ``timeout`` seconds (None waits indefinitely)."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            if self._failed:
+                task_id, worker, analysis_results = self._failed.popleft()
+                usage, elapsed = None, None
+                break
+
+            if self._received:
+                received = self._received.popleft()
+            else:
+                remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+                ready = wait(self._connections + [process.sentinel for process in self._processes], remaining)
+                received = self._receive(ready)
+            if received is None:
+                if not ready:
+                    raise queue.Empty
+                # Nothing left to read from a worker whose sentinel fired: it died
+                self._check_workers()
+                continue
+            task_id, worker, analysis_results, elapsed, usage = received
+
+            with self._lock:
+                # A resubmitted task can also come back from the worker that died after sending it
+                if self._pending.pop(task_id, None) is None:
+                    continue
+            break
+
+        with self._lock:
+            self._outstanding -= 1
+        if usage is not None:
+            self.worker_memory[worker] = usage
+            self.task_time.observe(elapsed)
+        self.tasks_completed.inc()
+        if 'error' in analysis_results:
+            self.tasks_failed.inc()
+        return task_id, analysis_results
+
+    def _receive(self, ready: List[Any]) -> Optional[Tuple]:
+        for index, connection in enumerate(self._connections):
+            if connection not in ready:
+                continue
+            try:
+                received = connection.recv()
+            except EOFError:
+                continue
+            with self._lock:
+                if self._assigned[index] == received[0]:
+                    self._assigned[index] = None
+                    self._dispatch()
+            return received
+        return None
+
+    def imap_unordered(self, items: List[Tuple[Any, Optional[str]]],
+                       template: Dict[str, Any]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Analyse ``(image_source, image_name)`` items; yields ``(index, results)`` as workers finish."""
+        submitted = 0
+        received = 0
+        task_index = {}
+        while received < len(items):
+            # Keep the task queue topped up without blocking on it while results wait
+            while submitted < len(items) and self._outstanding < self.worker_count * 2:
+                source, name = items[submitted]
+                task_index[self.submit(source, template, name)] = submitted
+                submitted += 1
+            task_id, analysis_results = self.get_result()
+            received += 1
+            yield task_index.pop(task_id), analysis_results
+
+    def analyze_batch(self, items: List[Tuple[Any, Optional[str]]], template: Dict[str, Any]) -> List[Dict[str, Any]]:
+        results = [None] * len(items)
+        for index, analysis_results in self.imap_unordered(items, template):
+            results[index] = analysis_results
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse screenshots with forked workers sharing one engine")
+    parser.add_argument('images', nargs='+')
+    parser.add_argument('--template', required=True, help="Template name (e.g. yaya_6p) or path to a template JSON")
+    parser.add_argument('--templates-dir', default='templates')
+    parser.add_argument('--results-dir', default='results')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--threads-per-worker', type=int, default=1,
+                        help="Torch intra-op threads in each worker")
+    parser.add_argument('--no-save', action='store_true', help="Only report, do not store results")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not OCR_AVAILABLE:
+        raise SystemExit("OCR engine not available - install dependencies: pytesseract, easyocr, opencv-python")
+
+    template = resolve_template(args.template, args.templates_dir)
+    results_store = None if args.no_save else ResultsStore(args.results_dir)
+    items = [(path, path) for path in args.images]
+
+    started = time.perf_counter()
+    with ForkWorkerPool(args.workers, threads_per_worker=args.threads_per_worker) as pool:
+        for index, analysis_results in pool.imap_unordered(items, template):
+            if 'error' in analysis_results:
+                logger.error("%s: %s", os.path.basename(args.images[index]), analysis_results['error'])
+            elif results_store:
+                results_store.save(analysis_results, template.get('site'), image_name=args.images[index])
+        elapsed = time.perf_counter() - started
+
+        print(f"{len(items)} images in {elapsed:.1f}s ({len(items) / elapsed if elapsed else 0:.2f}/s)")
+        parent = pool.parent_memory or {}
+        print(f"parent: rss {parent.get('rss_mb') or 0:.0f} MB after loading")
+        print(f"{'worker':<8}{'rss MB':>9}{'pss MB':>9}{'private MB':>12}{'peak MB':>9}")
+        for worker, usage in sorted(pool.worker_memory.items()):
+            print(f"{worker:<8}{usage.get('rss_mb') or 0:>9.0f}{usage.get('pss_mb') or 0:>9.0f}"
+                  f"{usage.get('private_mb') or 0:>12.0f}{usage.get('peak_rss_mb') or 0:>9.0f}")
+        total_pss = sum(usage.get('pss_mb') or 0 for usage in pool.worker_memory.values())
+        print(f"total worker pss: {total_pss:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
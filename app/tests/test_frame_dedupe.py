@@ -0,0 +1,44 @@
+import cv2
+import numpy as np
+import pytest
+
+# Importing the ocr package loads the OCR engines
+pytest.importorskip('pytesseract')
+pytest.importorskip('easyocr')
+
+from ocr.frame_dedupe import FrameDeduper
+
+TEMPLATE = {'regions': {'stack': {'coordinates': {'x': 10, 'y': 10, 'width': 160, 'height': 40}}}}
+
+AMOUNT_CHANGES = [('3 BB', '8 BB'), ('8 BB', '9 BB'), ('12.5 BB', '13.5 BB'), ('$1,250', '$1,230')]
+
+
+def render(text, scale=0.5, background=30):
+    frame = np.full((60, 200, 3), background, dtype=np.uint8)
+    cv2.putText(frame, text, (14, 40), cv2.FONT_HERSHEY_SIMPLEX, scale, (230, 230, 230), 1, cv2.LINE_AA)
+    return frame
+
+
+def test_repeated_frame_is_an_exact_match():
+    deduper = FrameDeduper(TEMPLATE)
+    deduper.add(deduper.signature(render('12.5 BB')), 'first')
+    assert deduper.lookup(deduper.signature(render('12.5 BB'))) == ('first', 0)
+    assert deduper.counts['exact'] == 1
+
+
+def test_changes_outside_the_regions_are_ignored():
+    deduper = FrameDeduper(TEMPLATE)
+    deduper.add(deduper.signature(render('12.5 BB')), 'first')
+    frame = render('12.5 BB')
+    frame[52:, 180:] = 255
+    assert deduper.lookup(deduper.signature(frame)) == ('first', 0)
+
+
+@pytest.mark.parametrize('scale', [0.3, 0.4, 0.5, 0.8])
+@pytest.mark.parametrize('before,after', AMOUNT_CHANGES)
+def test_one_digit_amount_change_is_not_a_duplicate(before, after, scale):
+    deduper = FrameDeduper(TEMPLATE)
+    deduper.add(deduper.signature(render(before, scale)), before)
+    signature = deduper.signature(render(after, scale))
+    assert deduper.lookup(signature) is None
+    assert deduper.distance(signature, deduper.signature(render(before, scale))) > 4
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+from service.frame_ring import FrameRingReader, FrameRingWriter, RingAnalysisLoop, write_images
+
+
+def test_frames_round_trip_through_the_ring(tmp_path):
+    path = str(tmp_path / 'ring')
+    frame = np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3)
+    with FrameRingWriter(path, slot_count=4, max_width=8, max_height=8) as writer:
+        seq = writer.write(frame, timestamp=12.5)
+        with FrameRingReader(path) as reader:
+            read = reader.latest()
+            assert read.seq == seq
+            assert read.timestamp == 12.5
+            assert np.array_equal(read.array, frame)
+            assert reader.next().seq == seq
+            assert reader.next() is None
+
+
+def test_lapped_reader_counts_dropped_frames_and_torn_views(tmp_path):
+    path = str(tmp_path / 'ring')
+    with FrameRingWriter(path, slot_count=4, max_width=2, max_height=2) as writer:
+        with FrameRingReader(path) as reader:
+            writer.write(np.zeros((2, 2, 3), dtype=np.uint8))
+            first = reader.next()
+            assert first.valid()
+
+            for value in range(1, 8):
+                writer.write(np.full((2, 2, 3), value, dtype=np.uint8))
+            assert not first.valid()
+            assert first.copy() is None
+
+            frame = reader.next()
+            assert frame.seq == 6
+            assert reader.frames_dropped == 4
+
+
+def test_reference_writer_stores_bgr(tmp_path):
+    image_path = str(tmp_path / 'red.png')
+    Image.new('RGB', (3, 2), (255, 0, 0)).save(image_path)
+    path = str(tmp_path / 'ring')
+    write_images(path, [image_path], fps=0, loop=False, slot_count=2)
+
+    with FrameRingReader(path) as reader:
+        frame = reader.latest()
+        assert frame.array.shape == (2, 3, 3)
+        assert frame.array[0, 0].tolist() == [0, 0, 255]
+
+
+class StoppingEngine:
+    def __init__(self):
+        self.loop = None
+
+    def analyze_poker_image(self, image, template, image_name=None):
+        self.loop.stop()
+        return {'image_file': image_name, 'timestamp': '2026-01-01T00:00:00'}
+
+
+def test_results_are_dated_by_capture_time(tmp_path):
+    path = str(tmp_path / 'ring')
+    captured_at = datetime(2026, 3, 1, 18, 30, 5).timestamp()
+    with FrameRingWriter(path, slot_count=2, max_width=2, max_height=2) as writer:
+        writer.write(np.zeros((2, 2, 3), dtype=np.uint8), timestamp=captured_at)
+        with FrameRingReader(path) as reader:
+            results = []
+            engine = StoppingEngine()
+            engine.loop = RingAnalysisLoop(reader, {}, results.append, engine=engine)
+            engine.loop.run()
+
+    assert results[0]['timestamp'] == '2026-03-01T18:30:05'
+    assert results[0]['frame_captured_at'] == captured_at
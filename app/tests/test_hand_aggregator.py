@@ -0,0 +1,85 @@
+from service.hand_aggregator import HandAggregator
+
+
+def frame(hand_id, second, previous_hand_id=None, table=3, source='table3.mp4', pot='100'):
+    return {
+        'site': 'yaya',
+        'timestamp': f"2026-01-01T12:00:{second:02d}",
+        'source_path': source,
+        'poker_insights': {
+            'game_state': {'current_hand_id': hand_id, 'previous_hand_id': previous_hand_id},
+            'tournament_info': {'table': table} if table is not None else {}
+        },
+        'extracted_data': {
+            'total_pot': {'text': pot, 'confidence': 90, 'success': True, 'type': 'total_pot'}
+        }
+    }
+
+
+def test_misread_hand_number_does_not_close_the_open_hand():
+    aggregator = HandAggregator()
+    assert aggregator.add(frame(5001, 1)) == []
+    # A misread of 5001
+    assert aggregator.add(frame(4001, 2)) == []
+    assert aggregator.add(frame(5001, 3)) == []
+
+    records = aggregator.add(frame(5002, 4, previous_hand_id=5001))
+    assert [record['hand_id'] for record in records] == [5001]
+    assert records[0]['frame_count'] == 2
+    assert aggregator.frames_late.value == 0
+
+    aggregator.flush()
+    assert aggregator.frames_discarded.value == 1
+
+
+def test_misread_higher_hand_number_does_not_close_the_open_hand():
+    aggregator = HandAggregator()
+    aggregator.add(frame(2492611261, 1))
+    aggregator.add(frame(2492611261, 2))
+    # A misread digit of 2492611261
+    assert aggregator.add(frame(2492671261, 3)) == []
+    assert aggregator.add(frame(2492611261, 4)) == []
+    assert aggregator.add(frame(2492611261, 5)) == []
+
+    records = aggregator.add(frame(2492611262, 6, previous_hand_id=2492611261))
+    assert [(record['hand_id'], record['frame_count']) for record in records] == [(2492611261, 4)]
+    assert aggregator.frames_late.value == 0
+
+    records = aggregator.flush()
+    assert [(record['hand_id'], record['frame_count']) for record in records] == [(2492611262, 1)]
+    assert aggregator.frames_discarded.value == 1
+
+
+def test_chained_or_confirmed_hand_number_closes_the_open_hand():
+    aggregator = HandAggregator(confirm_frames=2)
+    aggregator.add(frame(5001, 1))
+    assert [record['hand_id'] for record in aggregator.add(frame(10, 2, previous_hand_id=5001))] == [5001]
+
+    assert aggregator.add(frame(5020, 3)) == []
+    records = aggregator.add(frame(5020, 4))
+    assert [record['hand_id'] for record in records] == [10]
+    assert [(record['hand_id'], record['frame_count']) for record in aggregator.flush()] == [(5020, 2)]
+
+
+def test_repeated_lower_hand_number_is_confirmed():
+    aggregator = HandAggregator(confirm_frames=2)
+    aggregator.add(frame(5001, 1))
+    assert aggregator.add(frame(12, 2)) == []
+    records = aggregator.add(frame(12, 3))
+    assert [record['hand_id'] for record in records] == [5001]
+
+    records = aggregator.flush()
+    assert [(record['hand_id'], record['frame_count']) for record in records] == [(12, 2)]
+
+
+def test_unread_table_falls_back_to_the_last_table_of_the_source():
+    aggregator = HandAggregator()
+    aggregator.add(frame(5001, 1, table=3))
+    aggregator.add(frame(5001, 2, table=None))
+    aggregator.add(frame(7001, 3, table=8, source='table8.mp4'))
+    aggregator.add(frame(5001, 4, table=None))
+
+    records = aggregator.flush()
+    assert sorted((record['table'], record['hand_id'], record['frame_count']) for record in records) == [
+        (3, 5001, 3), (8, 7001, 1)
+    ]
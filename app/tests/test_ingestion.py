@@ -0,0 +1,175 @@
+import os
+import time
+
+from service.ingestion import DirectoryWatcher, IngestionService
+
+
+def write_capture(directory, name, content=b'capture'):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    # Old enough to count as settled
+    past = time.time() - 5
+    os.utime(path, (past, past))
+    return path
+
+
+def make_watcher(directory, **kwargs):
+    return DirectoryWatcher(str(directory), settle_time=0.0, poll_interval=0.0, use_inotify=False, **kwargs)
+
+
+def test_failed_file_is_retried_after_backoff(tmp_path):
+    path = write_capture(tmp_path, 'a.png')
+    watcher = make_watcher(tmp_path, retry_backoff=0.2)
+    assert watcher.poll(10) == [path]
+
+    assert not watcher.record_failure(path)
+    assert watcher.poll(10) == []
+    time.sleep(0.25)
+    assert watcher.poll(10) == [path]
+
+
+def test_success_clears_failures(tmp_path):
+    path = write_capture(tmp_path, 'a.png')
+    watcher = make_watcher(tmp_path, retry_backoff=0.0)
+    watcher.poll(10)
+    watcher.record_failure(path)
+    assert watcher.poll(10) == [path]
+    watcher.record_success(path)
+    assert watcher.poll(10) == []
+
+
+def test_file_is_quarantined_after_max_attempts(tmp_path):
+    path = write_capture(tmp_path, 'a.png')
+    quarantine = tmp_path / 'quarantine'
+    watcher = make_watcher(tmp_path, retry_backoff=0.0, max_attempts=3, quarantine_dir=str(quarantine))
+
+    results = []
+    for _ in range(3):
+        assert watcher.poll(10) == [path]
+        results.append(watcher.record_failure(path))
+
+    assert results == [False, False, True]
+    assert watcher.poll(10) == []
+    assert not os.path.exists(path)
+    assert os.path.exists(quarantine / 'a.png')
+
+
+def test_quarantined_file_stays_put_without_quarantine_dir(tmp_path):
+    path = write_capture(tmp_path, 'a.png')
+    watcher = make_watcher(tmp_path, retry_backoff=0.0, max_attempts=1)
+    watcher.poll(10)
+    assert watcher.record_failure(path)
+    assert watcher.poll(10) == []
+    assert os.path.exists(path)
+
+
+def test_rewritten_file_starts_attempts_over(tmp_path):
+    path = write_capture(tmp_path, 'a.png')
+    watcher = make_watcher(tmp_path, retry_backoff=0.0, max_attempts=1)
+    watcher.poll(10)
+    assert watcher.record_failure(path)
+
+    write_capture(tmp_path, 'a.png', b'rewritten')
+    os.utime(path, (time.time() - 2, time.time() - 2))
+    assert watcher.poll(10) == [path]
+    assert watcher.record_failure(path)
+
+
+class FakeEngine:
+    def analyze_poker_image(self, source, template, image_name=None):
+        return {'site': 'test', 'image_file': image_name}
+
+
+class FlakyStore:
+    def __init__(self):
+        self.saved = []
+        self.calls = 0
+
+    def save(self, analysis_results, site=None, image_name=None):
+        self.calls += 1
+        if self.calls == 1:
+            raise OSError("disk full")
+        self.saved.append(analysis_results['image_file'])
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_worker_survives_processing_errors(tmp_path):
+    store = FlakyStore()
+    service = IngestionService(str(tmp_path), {'site': 'test', 'regions': {}}, results_store=store, workers=1,
+                               settle_time=0.0, poll_interval=0.05, use_inotify=False,
+                               engine_factory=FakeEngine)
+    service.watcher.retry_backoff = 0.0
+    service.start()
+    try:
+        write_capture(tmp_path, 'a.png')
+        write_capture(tmp_path, 'b.png')
+        assert wait_for(lambda: sorted(store.saved) == ['a.png', 'b.png'])
+    finally:
+        service.stop()
+
+    assert service.files_failed.value == 1
+    assert service.files_processed.value == 2
+
+
+def test_rescan_skips_files_deleted_before_their_stat(tmp_path, monkeypatch):
+    kept = write_capture(tmp_path, 'a.png')
+    gone = write_capture(tmp_path, 'b.png')
+    scandir = os.scandir
+
+    def scan_then_delete(path):
+        entries = list(scandir(path))
+        os.remove(gone)
+        return iter(entries)
+
+    monkeypatch.setattr(os, 'scandir', scan_then_delete)
+    watcher = make_watcher(tmp_path)
+    assert watcher.poll(10) == [kept]
+
+
+class OpenedFrame:
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class NewFrames:
+    def signature(self, frame):
+        return frame.path
+
+    def lookup(self, signature):
+        return None
+
+    def add(self, signature, analysis_results):
+        pass
+
+
+def test_opened_frame_is_closed_after_analysis(tmp_path, monkeypatch):
+    frames = []
+
+    def open_frame(path):
+        frames.append(OpenedFrame(path))
+        return frames[-1]
+
+    monkeypatch.setattr('service.ingestion.open_frame', open_frame)
+    store = FlakyStore()
+    store.calls = 1
+    service = IngestionService(str(tmp_path), {'site': 'test', 'regions': {}}, results_store=store, workers=1,
+                               settle_time=0.0, poll_interval=0.05, use_inotify=False,
+                               engine_factory=FakeEngine, deduper=NewFrames())
+    path = write_capture(tmp_path, 'a.png')
+    service._process(FakeEngine(), path, time.time())
+
+    assert store.saved == ['a.png']
+    assert [frame.closed for frame in frames] == [True]
@@ -0,0 +1,58 @@
+import pytest
+
+# Importing the ocr package loads the OCR engines
+pytest.importorskip('pytesseract')
+pytest.importorskip('easyocr')
+
+from ocr.name_lexicon import NameLexicon
+
+
+def make_lexicon(tmp_path, *names, **kwargs):
+    lexicon = NameLexicon(path=str(tmp_path / 'lexicon.json'), save_every=0, **kwargs)
+    for name in names:
+        lexicon.observe('site', name)
+    return lexicon
+
+
+def test_exact_name_matches_at_distance_zero(tmp_path):
+    lexicon = make_lexicon(tmp_path, 'BelezIIAAa')
+    assert lexicon.lookup('site', 'BelezIIAAa') == ('BelezIIAAa', 0)
+
+
+def test_confusable_characters_snap_through_the_skeleton(tmp_path):
+    lexicon = make_lexicon(tmp_path, 'BelezIIAAa', max_distance=2)
+    assert lexicon.lookup('site', 'BelezllAAa') == ('BelezIIAAa', 2)
+
+
+def test_skeleton_match_beyond_max_distance_is_rejected(tmp_path):
+    lexicon = make_lexicon(tmp_path, 'SOLO1010', max_distance=2)
+    # Same skeleton, but every character differs
+    assert lexicon.lookup('site', '5o10lOlO') is None
+
+
+def test_deletion_index_finds_one_edit(tmp_path):
+    lexicon = make_lexicon(tmp_path, 'Fishhunter', 'Sharkbait')
+    assert lexicon.lookup('site', 'Fishhuter') == ('Fishhunter', 1)
+    assert lexicon.lookup('site', 'Nobody') is None
+    assert lexicon.lookup('other', 'Fishhunter') is None
+
+
+def test_save_merges_names_from_other_lexicons(tmp_path):
+    first = make_lexicon(tmp_path, 'Fishhunter')
+    second = make_lexicon(tmp_path, 'Sharkbait')
+    first.save()
+    second.save()
+
+    assert second.names('site') == {'Fishhunter': 1, 'Sharkbait': 1}
+    reloaded = NameLexicon(path=str(tmp_path / 'lexicon.json'))
+    assert reloaded.names('site') == {'Fishhunter': 1, 'Sharkbait': 1}
+
+
+def test_frozen_lexicon_neither_learns_nor_saves(tmp_path):
+    make_lexicon(tmp_path, 'Fishhunter').save()
+    frozen = make_lexicon(tmp_path, 'Sharkbait', learn=False)
+    frozen.save()
+
+    assert frozen.lookup('site', 'Fishhuter') == ('Fishhunter', 1)
+    assert frozen.names('site') == {'Fishhunter': 1}
+    assert NameLexicon(path=str(tmp_path / 'lexicon.json')).names('site') == {'Fishhunter': 1}
@@ -0,0 +1,50 @@
+import random
+import re
+
+import pytest
+
+# Importing the ocr package loads the OCR engines
+pytest.importorskip('pytesseract')
+pytest.importorskip('easyocr')
+
+from ocr.parsing import parse_text
+from ocr.text_cleaner import TextValidator
+
+# What the validators matched before parse_text
+BASELINE_NUMBER = re.compile(r'\d+\.?\d*')
+# A '.' that is not between two digits, or a thousands separator
+NON_DECIMAL_DOT_OR_COMMA = re.compile(r'(?<!\d)\.|\.(?!\d)|,')
+
+
+def fuzz_texts(count=3000, seed=7):
+    rng = random.Random(seed)
+    alphabet = '0123456789..,,$  BBTotal:Pot'
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))) for _ in range(count)]
+
+
+@pytest.mark.parametrize('text,amount', [('.5 BB', 0.5), ('Pot: .75 BB', 0.75), ('12.5 BB', 12.5),
+                                         ('Total: 1,250.5 BB', 1250.5), ('$25,953.40', 25953.4)])
+def test_amounts_parse(text, amount):
+    assert parse_text(text, 'hero_stack').amount == amount
+
+
+def test_any_digit_is_a_number():
+    for text in fuzz_texts():
+        assert parse_text(text, 'total_pot').has_number == any(char.isdigit() for char in text), text
+
+
+def test_plain_decimals_parse_as_before():
+    for text in fuzz_texts():
+        if NON_DECIMAL_DOT_OR_COMMA.search(text):
+            continue
+        assert parse_text(text, 'hero_stack').numbers == tuple(
+            float(number) for number in BASELINE_NUMBER.findall(text)), text
+
+
+@pytest.mark.parametrize('region_type', ['total_pot', 'current_pot', 'hero_stack', 'seat_1_stack'])
+def test_validity_matches_the_digit_check(region_type):
+    for text in fuzz_texts():
+        validation = TextValidator.validate_extraction(text, region_type, 80)
+        has_digit = any(char.isdigit() for char in text)
+        assert validation['is_valid'] == has_digit, text
+        assert ("No numeric value found" in validation['issues']) != has_digit, text
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+# Importing the ocr package loads the OCR engines
+pytest.importorskip('pytesseract')
+pytest.importorskip('easyocr')
+import numpy as np
+
+from ocr.text_extractor import TextExtractor
+from service.pipeline import AnalysisPipeline
+
+TEMPLATE = {'site': 'test', 'regions': {
+    'hero_name': {'type': 'hero_name', 'coordinates': {'x': 0, 'y': 0, 'width': 4, 'height': 4}},
+    'seat1_name': {'type': 'seat1_name', 'coordinates': {'x': 4, 'y': 0, 'width': 4, 'height': 4}}
+}}
+
+
+class FirstAttemptSelector:
+    def select(self, region_type, template_key, planned, top_k=None):
+        return planned[:1]
+
+    def record(self, region_type, template_key, method, attempted):
+        pass
+
+
+class ScriptedExtractor(TextExtractor):
+    """Reads a fixed text per region and variant, recording which stage ran each attempt."""
+
+    def __init__(self, reads):
+        super().__init__(variant_profile={}, variant_selector=FirstAttemptSelector(), load_readers=False)
+        self.reads = reads
+        self.calls = []
+
+    def _run_attempt(self, processed_img, region_type, attempt):
+        self.calls.append((region_type, attempt['variant'], threading.current_thread().name.split('-')[1]))
+        text = self.reads[region_type].get(attempt['variant'])
+        return {'method': attempt['engine'], 'raw_text': text, 'confidence': 90} if text else None
+
+
+class ScriptedEngine:
+    consistency_checker = None
+
+    def __init__(self, reads):
+        self.text_extractor = ScriptedExtractor(reads)
+
+    def _template_key(self, template):
+        return 'test'
+
+    def _image_name(self, source):
+        return source
+
+    def _load_image(self, source):
+        return np.zeros((4, 8, 3), dtype=np.uint8)
+
+    def _new_results(self, image, template, image_name):
+        return {'image_file': image_name}
+
+    def _prepare_region(self, image, region_key, region_data, template_key):
+        return {'prepared': self.text_extractor.prepare(image, region_data['coordinates'], region_data['type'],
+                                                        template_key), 'features': None}
+
+    def _select_region(self, recognized, features):
+        return self.text_extractor.select(recognized)
+
+    def _region_result(self, region_key, region_data, extraction_result, site):
+        return {'text': extraction_result['text']}
+
+    def _failed_result(self, region_key, region_data, error):
+        return {'text': '', 'error': str(error)}
+
+    def _finalize_results(self, analysis_results, elapsed):
+        return analysis_results
+
+    def _error_results(self, error, template, image_name):
+        return {'image_file': image_name, 'error': str(error)}
+
+
+def test_fallback_attempts_run_in_the_reread_stage():
+    engine = ScriptedEngine({'hero_name': {0: 'Alice'}, 'seat1_name': {2: 'Bob'}})
+    results = []
+    AnalysisPipeline(TEMPLATE, results.append, engine=engine).run(['shot.png'])
+
+    assert results[0]['extracted_data'] == {'hero_name': {'text': 'Alice'}, 'seat1_name': {'text': 'Bob'}}
+    assert list(results[0]['extracted_data']) == list(TEMPLATE['regions'])
+
+    stages = {}
+    for region_type, variant, stage in engine.text_extractor.calls:
+        stages.setdefault(region_type, set()).add(stage)
+    assert stages == {'hero_name': {'ocr'}, 'seat1_name': {'ocr', 'reread'}}
+    assert [call for call in engine.text_extractor.calls if call[2] == 'ocr'] == [
+        ('hero_name', 0, 'ocr'), ('seat1_name', 0, 'ocr')]
@@ -0,0 +1,53 @@
+from service.player_index import PlayerIndex, main
+from service.results_store import ResultsStore
+
+
+def frame_result(frame_index, stack_bb):
+    return {
+        'site': 'yaya',
+        'timestamp': f"2026-01-01T12:00:{frame_index:02d}",
+        'source_path': '/recordings/session.mp4',
+        'frame_index': frame_index,
+        'poker_insights': {
+            'game_state': {'current_hand_id': 5001},
+            'tournament_info': {'table': 3},
+            'player_info': {
+                'active_players': [{'name': 'Fishhunter', 'seat': 'seat_1', 'stack_bb': stack_bb}],
+                'hero_name': 'BelezIIAAa',
+                'hero_stack_bb': 20.0
+            }
+        }
+    }
+
+
+def test_listener_and_build_index_a_result_once(tmp_path):
+    results_dir = tmp_path / 'results'
+    db_path = str(tmp_path / 'players.db')
+    index = PlayerIndex(db_path)
+    store = ResultsStore(str(results_dir))
+    store.add_listener(index.on_saved)
+    store.save(frame_result(1, 12.5), image_name='frame_1')
+    assert index.count() == 2
+    index.close()
+
+    main(['--db', db_path, 'build', str(results_dir)])
+
+    index = PlayerIndex(db_path)
+    assert index.count() == 2
+    assert index.stack_distribution('yaya')['count'] == 2
+    index.close()
+
+
+def test_build_keeps_every_frame_of_a_video(tmp_path):
+    results_dir = tmp_path / 'results'
+    store = ResultsStore(str(results_dir))
+    for frame_index, stack_bb in enumerate([12.5, 11.0, 9.5]):
+        store.save(frame_result(frame_index, stack_bb), image_name=f"frame_{frame_index}")
+
+    db_path = str(tmp_path / 'players.db')
+    main(['--db', db_path, 'build', str(results_dir)])
+
+    index = PlayerIndex(db_path)
+    assert index.count() == 6
+    assert sorted(row['stack_bb'] for row in index.player_history('Fishhunter')) == [9.5, 11.0, 12.5]
+    index.close()
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from service.server import AnalysisService, RequestError
+
+TEMPLATE = {'site': 'test', 'regions': {}}
+
+
+class BlockingEngine:
+    def __init__(self, release):
+        self.release = release
+        self.deadlines = []
+
+    def analyze_poker_image(self, image_source, template, image_name=None, deadline=None):
+        self.deadlines.append(deadline)
+        self.release.wait(5)
+        return {'image_file': image_name, 'extracted_data': {}}
+
+
+def make_service(release, **kwargs):
+    engines = []
+
+    def factory():
+        engines.append(BlockingEngine(release))
+        return engines[-1]
+
+    service = AnalysisService({'test': TEMPLATE}, engine_factory=factory, **kwargs)
+    return service, engines
+
+
+def wait_for(condition, timeout=2.0):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_in_flight_returns_to_zero_after_timeouts():
+    release = threading.Event()
+    service, engines = make_service(release, workers=1)
+    try:
+        results = service.analyze_batch([('a', 'a'), ('b', 'b'), ('c', 'c')], TEMPLATE, timeout=0.1)
+        assert [result.get('error') for result in results] == ['Analysis timed out'] * 3
+        release.set()
+        # The queued images were cancelled and never ran; the running one finishes
+        assert wait_for(lambda: service._in_flight == 0)
+        assert len(engines[0].deadlines) == 1
+        assert 0 < engines[0].deadlines[0] <= 0.1
+    finally:
+        release.set()
+        service.shutdown()
+
+
+def test_full_queue_is_rejected_with_503():
+    release = threading.Event()
+    service, _ = make_service(release, workers=1, max_queue=1)
+    try:
+        service.submit('a', TEMPLATE)
+        service.submit('b', TEMPLATE)
+        with pytest.raises(RequestError) as error:
+            service.analyze('c', TEMPLATE, timeout=0.1)
+        assert error.value.status == 503
+        assert service.rejected_total.value == 1
+        release.set()
+        assert wait_for(lambda: service._in_flight == 0)
+        assert service.analyze('d', TEMPLATE, 'd')['image_file'] == 'd'
+    finally:
+        release.set()
+        service.shutdown()
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+# Importing the ocr package loads the OCR engines
+pytest.importorskip('pytesseract')
+pytest.importorskip('easyocr')
+cv2 = pytest.importorskip('cv2')
+import numpy as np
+
+from service.video_ingestion import VideoIngestion
+
+TEMPLATE = {'regions': {'hero_stack': {'type': 'hero_stack',
+                                       'coordinates': {'x': 10, 'y': 10, 'width': 160, 'height': 40}}}}
+
+
+class RecordingEngine:
+    def __init__(self):
+        self.frames = []
+
+    def analyze_poker_image(self, frame, template, image_name=None):
+        self.frames.append(image_name)
+        return {'image_file': image_name, 'extracted_data': {}}
+
+
+def write_clip(path, stacks, samples_per_state=3, fps=2):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (200, 60))
+    for stack in stacks:
+        frame = np.full((60, 200, 3), 30, dtype=np.uint8)
+        cv2.putText(frame, stack, (14, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (230, 230, 230), 1, cv2.LINE_AA)
+        for _ in range(samples_per_state):
+            writer.write(frame)
+    writer.release()
+
+
+def test_every_amount_change_is_analysed(tmp_path):
+    path = str(tmp_path / 'session.avi')
+    write_clip(path, ['8 BB', '9 BB', '8 BB', '12.5 BB', '13.5 BB'])
+    engine = RecordingEngine()
+    results = []
+    ingestion = VideoIngestion(path, TEMPLATE, results.append, engine=engine, sample_interval=0.5,
+                               start_time=datetime(2026, 1, 1, 12, 0))
+    try:
+        assert ingestion.run() == 5
+    finally:
+        ingestion.close()
+
+    assert [result['frame_index'] for result in results] == [0, 3, 6, 9, 12]
+    assert ingestion.frames_unchanged.value == 5
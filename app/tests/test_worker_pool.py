@@ -0,0 +1,57 @@
+import multiprocessing
+import os
+import signal
+
+import pytest
+
+from service.worker_pool import ForkWorkerPool
+
+pytestmark = pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+                                reason="needs the fork start method")
+
+
+class CrashingEngine:
+    """Kills its worker on 'crash', and on 'crash_once' the first time only."""
+
+    def __init__(self, marker):
+        self.marker = marker
+
+    def analyze_poker_image(self, image_source, template, image_name=None):
+        if image_source == 'crash':
+            os._exit(9)
+        if image_source == 'crash_once' and not os.path.exists(self.marker):
+            open(self.marker, 'w').close()
+            os._exit(9)
+        return {'image_file': image_name}
+
+
+def test_dead_workers_are_replaced_and_their_tasks_resubmitted_or_failed(tmp_path):
+    marker = str(tmp_path / 'crashed')
+    items = [('a', 'a'), ('crash', 'crash'), ('crash_once', 'flaky'), ('b', 'b')]
+    with ForkWorkerPool(2, engine_factory=lambda: CrashingEngine(marker)) as pool:
+        results = pool.analyze_batch(items, {})
+
+        assert [result['image_file'] for result in results] == ['a', 'crash', 'flaky', 'b']
+        assert 'error' not in results[2]
+        assert 'Worker died' in results[1]['error']
+        assert pool.workers_died.value == 3
+        assert pool.tasks_resubmitted.value == 2
+        assert pool._outstanding == 0
+        # The replacements keep working
+        assert pool.analyze_batch([('c', 'c')], {}) == [{'image_file': 'c'}]
+
+
+def test_killing_an_idle_worker_does_not_stall_the_pool(tmp_path):
+    marker = str(tmp_path / 'crashed')
+    with ForkWorkerPool(2, engine_factory=lambda: CrashingEngine(marker)) as pool:
+        assert pool.analyze_batch([('a', 'a')], {}) == [{'image_file': 'a'}]
+        idle = pool._processes[0]
+        os.kill(idle.pid, signal.SIGKILL)
+        idle.join()
+
+        pool.submit('b', {}, 'b')
+        pool.submit('c', {}, 'c')
+        results = sorted(pool.get_result(timeout=10)[1]['image_file'] for _ in range(2))
+        assert results == ['b', 'c']
+        assert pool.workers_died.value == 1
+        assert pool.tasks_resubmitted.value == 0